@@ -9,6 +9,7 @@ sys.path.insert(0, '/opt/airflow')
 from src.utils.logger import setup_logger
 from src.ingestion.data_fetcher import Datafetcher
 from src.processing.pipeline import ProcessingPipeline
+from src.storage.raw_storage import RawStorage
 logger = setup_logger(__name__, )
 default_args = {
     'owner': 'data-engineering',
@@ -88,6 +89,10 @@ def fetch_standings():
     logger.info('Task: Fetching (storing) league standings...')
     results = fetcher.fetch_and_store_standings(season=2024)
     return results
+def maintain_raw_storage():
+    logger.info('Task: Creating raw partitions and archiving superseded snapshots...')
+    summary = RawStorage().run_maintenance()
+    return {'archived': summary['rows'], 'files': len(summary['files']), 'skipped': summary.get('skipped')}
 
 repair_player_profiles_task = PythonOperator(
     task_id='repair_player_profiles',
@@ -159,6 +164,13 @@ fetch_standings_task = PythonOperator(
 )
 
 
+# Phase 4: Move superseded raw snapshots to the archive once processed
+maintain_raw_storage_task = PythonOperator(
+    task_id='maintain_raw_storage',
+    python_callable=maintain_raw_storage,
+    provide_context=True,
+    dag=dag,
+)
 
 
 # ============================================================================
@@ -172,4 +184,7 @@ fetch_standings_task = PythonOperator(
 # 1. Syncing rosters (2024) ensures all players exist in DB.
 # 2. Fetching match stats finds who played.
 # 3. Repair fills detailed bios for those who actually featured.
-process_data_initial_task >> fetch_player_stats_task >> repair_player_profiles_task >> process_data_final_task
\ No newline at end of file
+process_data_initial_task >> fetch_player_stats_task >> repair_player_profiles_task >> process_data_final_task
+
+# Phase 4: Raw storage maintenance after everything is processed
+process_data_final_task >> maintain_raw_storage_task
@@ -0,0 +1,51 @@
+"""
+Raw response storage maintenance.
+
+    python scripts/archive_raw_responses.py                 # create partitions, archive superseded snapshots
+    python scripts/archive_raw_responses.py --dry-run       # report what would be archived
+    python scripts/archive_raw_responses.py --sizes         # rows / bytes per partition
+    python scripts/archive_raw_responses.py --restore /teams [--since 2024-08-01] [--until 2025-05-31]
+    python scripts/archive_raw_responses.py --reproject     # (re)build payload projections after a schema change
+
+Archiving deletes the archived rows, so it only runs with RAW_ARCHIVE_DURABLE=true
+(RAW_ARCHIVE_DIR on storage that outlives the machine or container).
+"""
+from pathlib import Path
+import sys
+import argparse
+import json
+from datetime import date
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.storage.projections import PROJECTIONS, reproject
+from src.storage.raw_storage import RawStorage
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--grace-days', type=int, help='keep superseded snapshots younger than this (default RAW_ARCHIVE_GRACE_DAYS)')
+    parser.add_argument('--dry-run', action='store_true')
+    parser.add_argument('--sizes', action='store_true', help='print partition sizes and exit')
+    parser.add_argument('--restore', metavar='ENDPOINT', help='restore archived responses of ENDPOINT for reprocessing')
+    parser.add_argument('--reproject', action='store_true', help='rebuild missing or outdated payload projections')
+    parser.add_argument('--since', type=date.fromisoformat)
+    parser.add_argument('--until', type=date.fromisoformat)
+    args = parser.parse_args()
+
+    storage = RawStorage()
+    if args.sizes:
+        for name, rows, size in storage.partition_sizes():
+            print(f"{name:45} {max(rows, 0):>10} rows (est.) {size / 1e6:>10.1f} MB")
+    elif args.reproject:
+        for endpoint in PROJECTIONS:
+            print(f"{endpoint}: {reproject(storage.db_handler, endpoint)} projections rebuilt")
+    elif args.restore:
+        print(f"Restored {storage.restore(args.restore, args.since, args.until)} responses")
+    elif args.dry_run:
+        summary = storage.archive_superseded(args.grace_days, dry_run=True)
+        print(json.dumps(summary, indent=2, default=str))
+    else:
+        summary = storage.run_maintenance(args.grace_days)
+        print(json.dumps(summary, indent=2, default=str))
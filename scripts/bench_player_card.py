@@ -0,0 +1,90 @@
+"""
+Benchmark the player card lookup: search_player followed by
+get_player_latest_stats (two statements, two connections) against
+QueryEngine.get_player_card (one statement, one connection).
+
+Runs against the configured database with names sampled from dim_players:
+full names (one match, so the card includes latest stats) and short
+fragments (several matches, profile list only). Both variants must return
+the same players and stats; any difference fails the run.
+
+    python scripts/bench_player_card.py [--requests 500] [--repeat 3]
+"""
+from pathlib import Path
+import sys
+import argparse
+import statistics
+import time
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.bot.query_engine import QueryEngine
+
+
+def two_queries(engine, name):
+    players = engine.search_player(name)
+    stats = engine.get_player_latest_stats(players[0]['id']) if len(players) == 1 else None
+    return {'players': players, 'stats': stats}
+
+
+def sample_names(engine, requests):
+    """Unique full names with a latest appearance, plus ambiguous fragments."""
+    unique = engine.db.execute_query("""
+        SELECT p.player_name
+        FROM dim_players p
+        JOIN player_latest_appearance l ON l.player_id = p.player_id
+        WHERE (SELECT COUNT(*) FROM dim_players d WHERE d.player_name ILIKE '%%' || p.player_name || '%%') = 1
+        ORDER BY random()
+        LIMIT %s
+    """, (requests,))
+    names = [row[0] for row in unique or []]
+    fragments = [name.split()[-1][:3] for name in names[:len(names) // 4]]
+    return names + fragments
+
+
+def time_variant(fn, engine, names, repeat):
+    """Per-request latencies (ms) of the best of `repeat` passes, and the results."""
+    best, results = None, None
+    for _ in range(repeat):
+        latencies, outputs = [], []
+        for name in names:
+            started = time.perf_counter()
+            outputs.append(fn(engine, name))
+            latencies.append((time.perf_counter() - started) * 1000)
+        if best is None or sum(latencies) < sum(best):
+            best, results = latencies, outputs
+    return best, results
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=500, help='unique player names to look up')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    engine = QueryEngine()
+    names = sample_names(engine, args.requests)
+    if not names:
+        print("No players with a latest appearance; run the pipeline first.")
+        sys.exit(1)
+
+    variants = (('search + stats', two_queries),
+                ('player card', lambda engine, name: engine.get_player_card(name)))
+    outputs = {}
+    print(f"{len(names)} lookups per pass, best of {args.repeat}\n")
+    print(f"{'variant':16} {'mean ms':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for label, fn in variants:
+        latencies, outputs[label] = time_variant(fn, engine, names, args.repeat)
+        print(f"{label:16} {statistics.mean(latencies):>8.2f} {percentile(latencies, 50):>8.2f} "
+              f"{percentile(latencies, 95):>8.2f} {percentile(latencies, 99):>8.2f}")
+
+    if outputs['search + stats'] != outputs['player card']:
+        print("\nResults differ between the two variants.")
+        sys.exit(1)
+    print("\nBoth variants return the same players and stats.")
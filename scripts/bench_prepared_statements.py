@@ -0,0 +1,162 @@
+"""
+Benchmark the bot's hot queries three ways:
+- connect per query: a new connection and full SQL text for every call
+  (BOT_DB_POOL_SIZE=0, the previous behaviour)
+- pooled: reused connections, full SQL text (parsed and planned every call)
+- pooled + prepared: reused connections, named prepared statements
+
+The request mix covers search_player, get_player_latest_stats,
+get_team_latest_results, search_fixture and get_latest_standings with
+arguments sampled from the configured database. All variants must return
+the same answers. Afterwards the server-side planning time of each
+statement is read from EXPLAIN ANALYZE, as plain SQL and as EXECUTE of the
+warmed-up prepared statement.
+
+    python scripts/bench_prepared_statements.py [--requests 500] [--repeat 3]
+"""
+from pathlib import Path
+import sys
+import argparse
+import random
+import statistics
+import time
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.bot.query_engine import QueryEngine
+from src.utils.configs import config
+
+
+class UnpreparedQueryEngine(QueryEngine):
+    """Pooled connections, but every statement sent as SQL text."""
+
+    def _execute(self, query, params=None, prepared=None):
+        return super()._execute(query, params)
+
+
+def create_engine(pool_size, engine_class=QueryEngine):
+    saved, config.BOT_DB_POOL_SIZE = config.BOT_DB_POOL_SIZE, pool_size
+    try:
+        return engine_class()
+    finally:
+        config.BOT_DB_POOL_SIZE = saved
+
+
+def sample_requests(engine, requests):
+    """(method name, args) tuples in a fixed shuffled order."""
+    db = engine.db
+    names = [r[0] for r in db.execute_query(
+        "SELECT player_name FROM dim_players ORDER BY random() LIMIT %s", (requests,)) or []]
+    player_ids = [r[0] for r in db.execute_query(
+        "SELECT player_id FROM player_latest_appearance ORDER BY random() LIMIT %s", (requests,)) or []]
+    teams = [r[0] for r in db.execute_query("SELECT team_name FROM dim_teams") or []]
+    if not names or not player_ids or len(teams) < 2:
+        return []
+
+    rng = random.Random(42)
+    mix = []
+    for i in range(requests):
+        kind = i % 5
+        if kind == 0:
+            mix.append(('search_player', (rng.choice(names),)))
+        elif kind == 1:
+            mix.append(('get_player_latest_stats', (rng.choice(player_ids),)))
+        elif kind == 2:
+            mix.append(('get_team_latest_results', (rng.choice(teams),)))
+        elif kind == 3:
+            mix.append(('search_fixture', tuple(rng.sample(teams, 2))))
+        else:
+            mix.append(('get_latest_standings', ()))
+    rng.shuffle(mix)
+    return mix
+
+
+def time_variant(engine, mix, repeat):
+    """Per-request latencies (ms) of the best of `repeat` passes, and the answers."""
+    best, answers = None, None
+    for _ in range(repeat):
+        latencies, outputs = [], []
+        for method, args in mix:
+            started = time.perf_counter()
+            outputs.append(getattr(engine, method)(*args))
+            latencies.append((time.perf_counter() - started) * 1000)
+        if best is None or sum(latencies) < sum(best):
+            best, answers = latencies, outputs
+    return best, answers
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def planning_times(engine, mix):
+    """Per prepared statement: planning ms as plain SQL and as EXECUTE (after warm-up)."""
+    calls = {}
+    original = engine.db.execute_prepared
+
+    def recording(name, query, params=None, *args, **kwargs):
+        calls.setdefault(name, (query, params))
+        return original(name, query, params, *args, **kwargs)
+
+    engine.db.execute_prepared = recording
+    try:
+        for method, args in mix:
+            getattr(engine, method)(*args)
+    finally:
+        engine.db.execute_prepared = original
+
+    times = {}
+    with engine.db.get_connection() as conn:
+        with conn.cursor() as cur:
+            for name, (query, params) in sorted(calls.items()):
+                statement = engine.db._statements[name]
+                for _ in range(10):
+                    # Past the first five executions the server may switch to a cached generic plan
+                    statement.execute(cur, params)
+                    cur.fetchall()
+                cur.execute(f"EXPLAIN (ANALYZE, FORMAT JSON) {query}", params)
+                plain = cur.fetchone()[0][0]['Planning Time']
+                cur.execute(f"EXPLAIN (ANALYZE, FORMAT JSON) {statement.execute_sql}",
+                            statement.values(params) if statement.args else None)
+                prepared = cur.fetchone()[0][0]['Planning Time']
+                times[name] = (plain, prepared)
+    return times
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=500, help='requests per pass')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    pool_size = config.BOT_DB_POOL_SIZE or 8
+    variants = (
+        ('connect per query', create_engine(0)),
+        ('pooled', create_engine(pool_size, UnpreparedQueryEngine)),
+        ('pooled + prepared', create_engine(pool_size)),
+    )
+    mix = sample_requests(variants[0][1], args.requests)
+    if not mix:
+        print("Not enough players or teams; run the pipeline first.")
+        sys.exit(1)
+
+    answers = {}
+    print(f"{len(mix)} requests per pass, best of {args.repeat}\n")
+    print(f"{'variant':18} {'mean ms':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for label, engine in variants:
+        latencies, answers[label] = time_variant(engine, mix, args.repeat)
+        print(f"{label:18} {statistics.mean(latencies):>8.2f} {percentile(latencies, 50):>8.2f} "
+              f"{percentile(latencies, 95):>8.2f} {percentile(latencies, 99):>8.2f}")
+
+    print(f"\n{'statement':26} {'plan ms (SQL)':>14} {'plan ms (EXECUTE)':>18}")
+    for name, (plain, prepared) in planning_times(variants[-1][1], mix).items():
+        print(f"{name:26} {plain:>14.3f} {prepared:>18.3f}")
+
+    for _, engine in variants:
+        engine.db.close_pools()
+    if len({repr(a) for a in answers.values()}) != 1:
+        print("\nAnswers differ between variants.")
+        sys.exit(1)
+    print("\nAll variants return the same answers.")
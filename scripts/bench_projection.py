@@ -0,0 +1,257 @@
+"""
+Benchmark projected raw payloads (src/storage/projections.py) against full ones.
+
+Creates a scratch database (<POSTGRES_DB>_projbench by default), stores
+synthetic API-Football payloads shaped like the real responses with
+RAW_PROJECTION='alongside' (full payload and projection side by side) and
+reports, per endpoint:
+
+    storage   bytes per fixture / per player page, full payload vs projection
+    read      time to read and parse every response of the endpoint through
+              BaseProcessor, full payload vs projection (best of --repeat)
+
+Parsed rows are compared between the two variants; any difference fails the run.
+
+    python scripts/bench_projection.py [--fixtures 380] [--pages 40] [--repeat 5] [--keep]
+"""
+from pathlib import Path
+import sys
+import argparse
+import re
+import time
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import psycopg2
+
+from src.utils.configs import config
+
+DDL_FILE = project_root / 'sql' / 'ddl' / 'create_tables.sql'
+
+STAT_BLOCK_KEYS = ('shots', 'goals', 'passes', 'tackles', 'duels', 'dribbles', 'fouls', 'cards', 'penalty')
+
+
+def team(team_id):
+    return {'id': team_id, 'name': f'Team {team_id}', 'logo': f'https://media.api-sports.io/football/teams/{team_id}.png'}
+
+
+def league(season):
+    return {'id': 39, 'name': 'Premier League', 'country': 'England', 'season': season,
+            'logo': 'https://media.api-sports.io/football/leagues/39.png',
+            'flag': 'https://media.api-sports.io/flags/gb.svg', 'round': 'Regular Season - 12'}
+
+
+def fixture_payload(fixture_id, home, away):
+    return {
+        'fixture': {
+            'id': fixture_id, 'referee': 'M. Oliver', 'timezone': 'UTC',
+            'date': '2024-11-30T15:00:00+00:00', 'timestamp': 1732978800,
+            'periods': {'first': 1732978800, 'second': 1732982400},
+            'venue': {'id': 500 + home, 'name': f'Stadium {home}', 'city': f'City {home}'},
+            'status': {'long': 'Match Finished', 'short': 'FT', 'elapsed': 90, 'extra': None},
+        },
+        'league': league(2024),
+        'teams': {'home': {**team(home), 'winner': True}, 'away': {**team(away), 'winner': False}},
+        'goals': {'home': 2, 'away': 1},
+        'score': {'halftime': {'home': 1, 'away': 0}, 'fulltime': {'home': 2, 'away': 1},
+                  'extratime': {'home': None, 'away': None}, 'penalty': {'home': None, 'away': None}},
+    }
+
+
+def envelope(endpoint, parameters, response):
+    return {'get': endpoint.strip('/'), 'parameters': parameters, 'errors': [], 'results': len(response),
+            'paging': {'current': 1, 'total': 1}, 'response': response}
+
+
+def match_stats(n):
+    return {
+        'games': {'minutes': 90 - n, 'number': n + 1, 'position': 'M', 'rating': f'{6 + n % 3}.{n % 10}',
+                  'captain': n == 0, 'substitute': n > 10},
+        'offsides': None,
+        'shots': {'total': n % 4, 'on': n % 2},
+        'goals': {'total': None, 'conceded': 0, 'assists': None, 'saves': None},
+        'passes': {'total': 30 + n, 'key': n % 3, 'accuracy': str(70 + n)},
+        'tackles': {'total': n % 3, 'blocks': None, 'interceptions': 1},
+        'duels': {'total': 10, 'won': 6},
+        'dribbles': {'attempts': 2, 'success': 1, 'past': None},
+        'fouls': {'drawn': 1, 'committed': 2},
+        'cards': {'yellow': 0, 'red': 0},
+        'penalty': {'won': None, 'commited': None, 'scored': 0, 'missed': 0, 'saved': None},
+    }
+
+
+def fixture_players_payload(fixture_id, home, away):
+    response = []
+    for team_id in (home, away):
+        players = []
+        for n in range(16):
+            player_id = team_id * 100 + n
+            players.append({
+                'player': {'id': player_id, 'name': f'P. Player{player_id}',
+                           'photo': f'https://media.api-sports.io/football/players/{player_id}.png'},
+                'statistics': [match_stats(n)],
+            })
+        response.append({'team': {**team(team_id), 'update': '2024-12-01T04:03:12+00:00'}, 'players': players})
+    return envelope('/fixtures/players', {'fixture': str(fixture_id)}, response)
+
+
+def season_stats(team_id, n):
+    block = match_stats(n)
+    return {
+        'team': team(team_id),
+        'league': league(2024),
+        'games': {'appearences': 12, 'lineups': 10, 'minutes': 900 - n, 'number': None,
+                  'position': 'Midfielder', 'rating': '6.9', 'captain': False},
+        'substitutes': {'in': 2, 'out': 3, 'bench': 4},
+        **{key: block[key] for key in STAT_BLOCK_KEYS},
+    }
+
+
+def players_page_payload(page):
+    response = []
+    for n in range(20):
+        player_id = page * 1000 + n
+        team_id = (page + n) % 20 + 1
+        response.append({
+            'player': {'id': player_id, 'name': f'P. Player{player_id}', 'firstname': 'First', 'lastname': f'Last{player_id}',
+                       'age': 20 + n % 15, 'birth': {'date': '2000-01-01', 'place': 'London', 'country': 'England'},
+                       'nationality': 'England', 'height': '180 cm', 'weight': '75 kg', 'number': n + 1,
+                       'position': 'Midfielder', 'injured': False,
+                       'photo': f'https://media.api-sports.io/football/players/{player_id}.png'},
+            'statistics': [season_stats(team_id, n), season_stats(team_id, n + 1)],
+        })
+    return envelope('/players', {'league': '39', 'season': '2024', 'page': str(page)}, response)
+
+
+def admin_connection():
+    params = dict(host=config.POSTGRES_HOST, port=config.POSTGRES_PORT, user=config.POSTGRES_USER,
+                  password=config.POSTGRES_PASSWORD, database='postgres')
+    conn = psycopg2.connect(**params)
+    conn.autocommit = True
+    return conn
+
+
+def create_database(name, fixtures, pages):
+    conn = admin_connection()
+    with conn.cursor() as cur:
+        cur.execute(f'DROP DATABASE IF EXISTS "{name}"')
+        cur.execute(f'CREATE DATABASE "{name}"')
+    conn.close()
+
+    config.POSTGRES_DB = name
+    config.RAW_PROJECTION = 'alongside'
+    from src.storage.postgres_handler import PostgresHandler
+    from src.storage.raw_storage import RawStorage
+
+    handler = PostgresHandler()
+    ddl = re.sub(r'--[^\n]*', '', DDL_FILE.read_text())
+    conn = psycopg2.connect(**{k: v for k, v in handler.connection_params.items() if k != 'cursor_factory'})
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        for statement in (s.strip() for s in ddl.split(';')):
+            try:
+                if statement:
+                    cur.execute(statement)
+            except psycopg2.Error:
+                pass  # e.g. pg_trgm on a server without contrib; irrelevant here
+    conn.close()
+    RawStorage(handler).ensure_partitions()
+
+    fixture_rows = []
+    for n in range(fixtures):
+        fixture_id = 1200000 + n
+        home, away = n % 20 + 1, (n + 7) % 20 + 1
+        fixture_rows.append(fixture_payload(fixture_id, home, away))
+        handler.insert_raw_responses('/fixtures/players', {'fixture': fixture_id},
+                                     fixture_players_payload(fixture_id, home, away))
+    handler.insert_raw_responses('/fixtures', {'league': 39, 'season': 2024},
+                                 envelope('/fixtures', {'league': '39', 'season': '2024'}, fixture_rows))
+    for page in range(1, pages + 1):
+        handler.insert_raw_responses('/players', {'league': 39, 'season': 2024, 'page': page}, players_page_payload(page))
+    handler.execute_query("ANALYZE raw_api_responses", fetch=False)
+    return handler
+
+
+def drop_database(name):
+    conn = admin_connection()
+    with conn.cursor() as cur:
+        cur.execute(f'DROP DATABASE IF EXISTS "{name}"')
+    conn.close()
+
+
+def storage_report(handler):
+    query = """
+        SELECT endpoint, COUNT(*),
+               AVG(pg_column_size(response_data)), AVG(pg_column_size(projected_data)),
+               AVG(octet_length(response_data::text)), AVG(octet_length(projected_data::text))
+        FROM raw_api_responses
+        GROUP BY endpoint
+        ORDER BY endpoint
+    """
+    return handler.execute_query(query)
+
+
+def parse_profiles(raw_responses):
+    # The /players parse in process_player_profiles, minus the upsert
+    return ([(item.get('player') or {}).get('id') for raw in raw_responses
+             for item in (raw[3] or {}).get('response', [])],)
+
+
+def time_reads(endpoint, parse_fn, use_projection, repeat):
+    from src.processing.base_processor import BaseProcessor
+
+    processor = BaseProcessor()
+    processor.read_projection = use_projection
+    best_read, best_parse, parsed = float('inf'), float('inf'), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        raw_responses = processor.get_raw_api_responses(endpoint)
+        read_done = time.perf_counter()
+        parsed = parse_fn(raw_responses)
+        best_read = min(best_read, read_done - started)
+        best_parse = min(best_parse, time.perf_counter() - read_done)
+    return best_read, best_parse, parsed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database', default=f"{config.POSTGRES_DB}_projbench")
+    parser.add_argument('--fixtures', type=int, default=380, help='fixtures (one /fixtures/players response each)')
+    parser.add_argument('--pages', type=int, default=40, help='/players pages of 20 players')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--keep', action='store_true', help='keep the scratch database afterwards')
+    args = parser.parse_args()
+
+    from src.processing.matches_processor import parse_fixture_responses
+    from src.processing.players_processor import parse_player_stats_responses
+
+    handler = create_database(args.database, args.fixtures, args.pages)
+    mismatches = []
+    try:
+        print(f"{'endpoint':18} {'rows':>5} {'full B/row':>11} {'proj B/row':>11} {'ratio':>6}   "
+              f"{'full json':>10} {'proj json':>10}")
+        for endpoint, rows, full, projected, full_text, projected_text in storage_report(handler):
+            print(f"{endpoint:18} {rows:>5} {float(full):>11.0f} {float(projected):>11.0f} "
+                  f"{float(full) / float(projected):>5.1f}x   {float(full_text):>10.0f} {float(projected_text):>10.0f}")
+
+        print(f"\n{'endpoint':18} {'variant':10} {'read ms':>9} {'parse ms':>9} {'total ms':>9}")
+        for endpoint, parse_fn in (('/fixtures/players', parse_player_stats_responses),
+                                   ('/fixtures', parse_fixture_responses),
+                                   ('/players', parse_profiles)):
+            results = {}
+            for variant, use_projection in (('full', False), ('projected', True)):
+                read_s, parse_s, parsed = time_reads(endpoint, parse_fn, use_projection, args.repeat)
+                results[variant] = parsed
+                print(f"{endpoint:18} {variant:10} {read_s * 1000:>9.1f} {parse_s * 1000:>9.1f} "
+                      f"{(read_s + parse_s) * 1000:>9.1f}")
+            if results['full'] != results['projected']:
+                mismatches.append(endpoint)
+    finally:
+        if not args.keep:
+            drop_database(args.database)
+
+    if mismatches:
+        print(f"\nParsed rows differ between full and projected payloads: {mismatches}")
+        sys.exit(1)
+    print("\nParsed rows are identical for both variants.")
@@ -0,0 +1,137 @@
+"""
+Benchmark the processor row representation: the previous tuple -> DataFrame ->
+dict records -> DataFrame path against slotted records handed to the writer as
+tuples (BaseProcessor.upsert_rows).
+
+Each variant runs in a fresh spawned process on the same synthetic
+/fixtures/players payload, so peak RSS is not polluted by the other variant.
+No database is needed: the benchmark stops where execute_values would start.
+
+    python scripts/bench_records.py --rows 100000
+"""
+from pathlib import Path
+import sys
+import argparse
+import gc
+import json
+import multiprocessing
+import resource
+import time
+from operator import attrgetter
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import pandas as pd
+
+from src.processing.players_processor import parse_player_stats_responses
+from src.processing.records import PlayerStatRow, record_columns, record_values
+
+PLAYERS_PER_TEAM = 16
+
+
+def synthetic_responses(rows: int):
+    """Raw (id, endpoint, params, response_data, fetched_at) rows shaped like /fixtures/players."""
+    fixtures = max(1, rows // (2 * PLAYERS_PER_TEAM))
+    responses = []
+    for fixture_id in range(1, fixtures + 1):
+        teams = []
+        for side in range(2):
+            team_id = (fixture_id * 2 + side) % 20 + 1
+            players = []
+            for n in range(PLAYERS_PER_TEAM):
+                player_id = team_id * 100 + n
+                players.append({
+                    'player': {'id': player_id, 'name': f'Player {player_id}', 'photo': f'https://img/{player_id}.png'},
+                    'statistics': [{
+                        'games': {'minutes': 90 - n, 'rating': '7.1' if n % 3 else None,
+                                  'captain': n == 0, 'substitute': n > 10},
+                        'offsides': None,
+                        'shots': {'total': n % 4, 'on': n % 2},
+                        'goals': {'total': n % 5 == 0 and 1 or None, 'conceded': 0, 'assists': None, 'saves': None},
+                        'passes': {'total': 30 + n, 'key': n % 3, 'accuracy': '82'},
+                        'tackles': {'total': n % 3, 'blocks': None, 'interceptions': 1},
+                        'duels': {'total': 10, 'won': 6},
+                        'dribbles': {'attempts': 2, 'success': 1, 'past': None},
+                        'fouls': {'drawn': 1, 'committed': 2},
+                        'cards': {'yellow': 0, 'red': 0},
+                        'penalty': {'won': None, 'commited': None, 'scored': 0, 'missed': 0, 'saved': None},
+                    }],
+                })
+            teams.append({'team': {'id': team_id}, 'players': players})
+        responses.append((fixture_id, '/fixtures/players', {'fixture': fixture_id}, {'response': teams}, None))
+    return responses
+
+
+def prepare_dataframe(raw_responses):
+    """Previous path: tuples -> DataFrame dedup -> to_dict('records') -> DataFrame -> .values."""
+    _, stats = parse_player_stats_responses(raw_responses)
+    # The old parser produced plain tuples; convert here so both variants parse identically
+    as_tuple = record_values(PlayerStatRow)
+    stat_rows = [as_tuple(row) for row in stats]
+    del stats
+    columns = list(record_columns(PlayerStatRow))
+    df = pd.DataFrame(stat_rows, columns=columns).drop_duplicates(subset=['fixture_id', 'player_id'], keep='last')
+    records = df.to_dict('records')
+    values = pd.DataFrame(records).values
+    return len(values)
+
+
+def prepare_records(raw_responses):
+    """Current path: slotted records deduplicated on KEY and read out with attrgetter."""
+    _, stats = parse_player_stats_responses(raw_responses)
+    key_of = attrgetter(*PlayerStatRow.KEY)
+    values_of = record_values(PlayerStatRow)
+    values = list({key_of(row): values_of(row) for row in stats}.values())
+    return len(values)
+
+
+VARIANTS = {
+    'dataframe': prepare_dataframe,
+    'records': prepare_records,
+}
+
+
+def _run_variant(name, rows, repeat, queue):
+    raw_responses = synthetic_responses(rows)
+    gc.collect()
+    # ru_maxrss is in KiB on Linux
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    timings = []
+    produced = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        produced = VARIANTS[name](raw_responses)
+        timings.append(time.perf_counter() - started)
+        gc.collect()
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put({
+        'variant': name,
+        'rows': produced,
+        'best_seconds': min(timings),
+        'peak_rss_mb': round(peak_kb / 1024, 1),
+        'delta_rss_mb': round((peak_kb - baseline_kb) / 1024, 1),
+    })
+
+
+def run_benchmark(rows: int = 100000, repeat: int = 3):
+    ctx = multiprocessing.get_context('spawn')
+    results = []
+    for name in VARIANTS:
+        queue = ctx.Queue()
+        proc = ctx.Process(target=_run_variant, args=(name, rows, repeat, queue))
+        proc.start()
+        result = queue.get()
+        proc.join()
+        result['ms_per_10k_rows'] = round(result.pop('best_seconds') * 1000 * 10000 / max(result['rows'], 1), 1)
+        results.append(result)
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100000, help='player stat rows to generate')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per variant (best time is reported)')
+    args = parser.parse_args()
+    for result in run_benchmark(args.rows, args.repeat):
+        print(json.dumps(result))
@@ -0,0 +1,99 @@
+"""
+Benchmark message rendering for the standings, team results and
+head-to-head replies.
+
+For each intent, with inputs sampled from the configured database:
+- format: the formatter alone, on answers fetched beforehand
+- query + format: what every request cost before the render cache
+- render cache hit: data-version check plus cached message lookup
+
+Cached messages must equal freshly rendered ones; any difference fails
+the run.
+
+    python scripts/bench_render.py [--requests 300] [--repeat 3]
+"""
+from pathlib import Path
+import sys
+import argparse
+import random
+import statistics
+import time
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.bot.formatter import format_head_to_head, format_standings, format_team_results
+from src.bot.query_engine import create_query_engine
+from src.bot.render_cache import RenderCache
+
+
+def sample_cases(engine, requests):
+    """Per intent: (entity, fetch answer, format answer) tuples."""
+    teams = [row[0] for row in engine.db.execute_query("SELECT team_name FROM dim_teams") or []]
+    if len(teams) < 2:
+        return {}
+    rng = random.Random(42)
+    pairs = [tuple(rng.sample(teams, 2)) for _ in range(requests)]
+    return {
+        'standings': [
+            (None, lambda: engine.get_latest_standings(None), lambda rows: format_standings(rows[:15]))
+        ],
+        'team_results': [
+            (team, lambda team=team: engine.get_team_latest_results(team),
+             lambda rows, team=team: format_team_results(team.capitalize(), rows))
+            for team in teams
+        ],
+        'head_to_head': [
+            (pair, lambda pair=pair: engine.search_fixture(*pair),
+             lambda rows, pair=pair: format_head_to_head(pair[0], pair[1], rows))
+            for pair in pairs
+        ],
+    }
+
+
+def time_calls(calls, requests, repeat):
+    """Mean microseconds per call over `requests` calls cycling through `calls`, best of `repeat`."""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for i in range(requests):
+            calls[i % len(calls)]()
+        elapsed = (time.perf_counter() - started) / requests * 1e6
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=300, help='renders per intent and pass')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    engine = create_query_engine()
+    renders = RenderCache(engine)
+    cases = sample_cases(engine, args.requests)
+    if not cases:
+        print("No teams; run the pipeline first.")
+        sys.exit(1)
+
+    mismatches = 0
+    print(f"{args.requests} requests per intent, best of {args.repeat}\n")
+    print(f"{'intent':14} {'format us':>10} {'query+format us':>16} {'cache hit us':>13}")
+    for intent, intent_cases in cases.items():
+        answers = [fetch() for _, fetch, _ in intent_cases]
+        format_calls = [lambda fmt=fmt, rows=rows: fmt(rows) for (_, _, fmt), rows in zip(intent_cases, answers)]
+        uncached = [lambda fetch=fetch, fmt=fmt: fmt(fetch()) for _, fetch, fmt in intent_cases]
+        cached = [lambda entity=entity, fetch=fetch, fmt=fmt: renders.render(intent, entity, lambda: fmt(fetch()))
+                  for entity, fetch, fmt in intent_cases]
+        for call, fresh in zip(cached, uncached):
+            if call() != fresh():
+                mismatches += 1
+        print(f"{intent:14} {time_calls(format_calls, args.requests, args.repeat):>10.1f} "
+              f"{time_calls(uncached, args.requests, args.repeat):>16.1f} "
+              f"{time_calls(cached, args.requests, args.repeat):>13.1f}")
+
+    print(f"\nRender cache: {renders.stats()}")
+    if mismatches:
+        print(f"{mismatches} cached messages differ from fresh renders.")
+        sys.exit(1)
+    print("Cached messages match fresh renders.")
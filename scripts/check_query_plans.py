@@ -0,0 +1,301 @@
+"""
+Plan regression check for the hot queries.
+
+Creates a scratch database (<POSTGRES_DB>_plancheck by default), applies
+sql/ddl/create_tables.sql and the managed index set, seeds it with synthetic
+data at roughly production shape, then runs the real QueryEngine / Datafetcher
+/ processor methods to capture their SQL and EXPLAINs each statement. Exits
+non-zero if any hot query plans a sequential scan on a relation it must reach
+through an index, or reads raw_api_responses partitions of other endpoints.
+
+    python scripts/check_query_plans.py [--scale 1] [--keep]
+"""
+from pathlib import Path
+import sys
+import argparse
+import json
+import re
+from contextlib import contextmanager
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import psycopg2
+
+from src.utils.configs import config
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__, 'plan_check.log')
+
+DDL_FILE = project_root / 'sql' / 'ddl' / 'create_tables.sql'
+
+SEED_SQL = """
+    INSERT INTO leagues (league_id, league_name, country, country_code, number_of_seasons)
+    VALUES (39, 'Premier League', 'England', 'GB', 10);
+
+    INSERT INTO dim_seasons (season_year, season_name, league_id, start_date, end_date, is_current)
+    SELECT y, y || '-' || right((y + 1)::text, 2), 39, make_date(y, 8, 1), make_date(y + 1, 5, 31), y = 2024
+    FROM generate_series(2015, 2024) y;
+
+    INSERT INTO dim_venues (venue_id, venue_name, city)
+    SELECT v, 'Venue ' || v, 'City ' || v FROM generate_series(1, 20) v;
+
+    INSERT INTO dim_teams (team_id, team_name, short_name, team_code, country, venue_id)
+    SELECT t, 'Team ' || t, 'T' || t, 'T' || t, 'England', t FROM generate_series(1, 20) t;
+
+    -- 380 fixtures per season; the current season is half played
+    INSERT INTO matches (fixture_id, league_id, season, home_team_id, away_team_id, venue_id,
+                         match_date, round, status, home_goals, away_goals)
+    SELECT 100000 + s * 1000 + n, 39, s,
+           n %% 20 + 1, (n + 1 + n / 20) %% 20 + 1, n %% 20 + 1,
+           make_date(s, 8, 1) + (n * interval '16 hours'),
+           'Regular Season - ' || (n / 10 + 1),
+           CASE WHEN s = 2024 AND n >= 190 THEN 'NS' ELSE 'FT' END,
+           n %% 4, n %% 3
+    FROM generate_series(2015, 2024) s, generate_series(0, 379) n
+    WHERE n %% 20 + 1 <> (n + 1 + n / 20) %% 20 + 1;
+
+    INSERT INTO dim_players (player_id, player_name, firstname, lastname)
+    SELECT p, 'Player ' || p,
+           CASE WHEN p %% 50 = 0 THEN NULL ELSE 'First' || p END, 'Last' || p
+    FROM generate_series(1, 20000 * %(scale)s) p;
+
+    INSERT INTO fact_player_stats (fixture_id, player_id, team_id, minutes_played, rating,
+                                   goals_total, assists, passes_accuracy, shots_on_target, match_date)
+    SELECT m.fixture_id, (m.fixture_id * 28 + k) %% (20000 * %(scale)s) + 1,
+           CASE WHEN k < 14 THEN m.home_team_id ELSE m.away_team_id END,
+           90, 7.0, k %% 3, k %% 2, '80', k %% 4, m.match_date
+    FROM matches m, generate_series(0, 27) k
+    WHERE m.status = 'FT';
+
+    INSERT INTO fact_standings (league_id, season, rank, team_id, points, played)
+    SELECT 39, s, t, t, 100 - t * 3, 38 FROM generate_series(2015, 2024) s, generate_series(1, 20) t;
+
+    -- Stats already fetched for all but the most recent completed fixtures
+    INSERT INTO raw_api_responses (endpoint, request_params, response_data, fetched_at)
+    SELECT '/fixtures/players', jsonb_build_object('fixture', fixture_id), '{"response": []}', match_date + interval '1 day'
+    FROM matches
+    WHERE status = 'FT' AND fixture_id %% 20 <> 0;
+
+    INSERT INTO ingestion_ledger (endpoint, entity_id, status, attempts, response_id, fetched_at)
+    SELECT endpoint, (request_params->>'fixture')::bigint, 'fetched', 1, response_id, fetched_at
+    FROM raw_api_responses
+    WHERE endpoint = '/fixtures/players';
+
+    -- A few fixtures that keep failing
+    INSERT INTO ingestion_ledger (endpoint, entity_id, status, attempts, last_error)
+    SELECT '/fixtures/players', fixture_id, CASE WHEN fixture_id %% 40 = 0 THEN 'abandoned' ELSE 'failed' END,
+           CASE WHEN fixture_id %% 40 = 0 THEN 5 ELSE 2 END, 'API returned no data'
+    FROM matches
+    WHERE status = 'FT' AND fixture_id %% 20 = 0 AND fixture_id %% 60 = 0;
+
+    INSERT INTO raw_api_responses (endpoint, request_params, response_data)
+    SELECT e.endpoint, jsonb_build_object('league', 39, 'season', s), '{"response": []}'
+    FROM (VALUES ('/fixtures'), ('/teams'), ('/standings')) e(endpoint), generate_series(2015, 2024) s;
+
+    INSERT INTO raw_api_responses (endpoint, request_params, response_data)
+    SELECT '/players', jsonb_build_object('league', 39, 'season', 2024, 'page', p), '{"response": []}'
+    FROM generate_series(1, 800) p;
+"""
+
+
+def hot_queries():
+    """
+    (label, callable running the real code path, relations that must not be
+    seq-scanned, EXPLAIN params override, index the check depends on, raw
+    endpoint whose partitions alone may be read). Methods whose LIMIT would
+    trigger API calls are run with limit=0 and explained with their
+    production limit.
+    """
+    from src.bot.query_engine import QueryEngine
+    from src.ingestion.data_fetcher import Datafetcher
+    from src.processing.base_processor import BaseProcessor
+    from src.processing.latest_appearance import LatestAppearance
+
+    engine = QueryEngine()
+    fetcher = Datafetcher()
+    return [
+        ('QueryEngine.search_player', lambda: engine.search_player('Player 1234'),
+         {'dim_players'}, None, 'idx_players_name_trgm', None),
+        ('QueryEngine.get_player_latest_stats', lambda: engine.get_player_latest_stats(4321),
+         {'player_latest_appearance', 'match_summary'}, None, None, None),
+        ('QueryEngine.get_player_card', lambda: engine.get_player_card('Player 4321'),
+         {'player_latest_appearance', 'match_summary'}, None, None, None),
+        ('QueryEngine.get_team_latest_results', lambda: engine.get_team_latest_results('Team 7'),
+         {'match_summary'}, None, None, None),
+        ('QueryEngine.search_fixture', lambda: engine.search_fixture('Team 3', 'Team 7'),
+         {'match_summary'}, None, None, None),
+        ('LatestAppearance.refresh_players', lambda: LatestAppearance().refresh_players([4321, 4322, 4323]),
+         {'fact_player_stats'}, None, None, None),
+        ('Datafetcher.fetch_and_store_player_stats', lambda: fetcher.fetch_and_store_player_stats(limit=0),
+         {'matches', 'ingestion_ledger'}, (30,), None, None),
+        ('Datafetcher.fetch_and_store_missing_player_profiles',
+         lambda: fetcher.fetch_and_store_missing_player_profiles(limit=0),
+         {'dim_players'}, (80,), None, None),
+        ('BaseProcessor.get_raw_api_responses', lambda: BaseProcessor().get_raw_api_responses('/standings'),
+         set(), None, None, '/standings'),
+        ('BaseProcessor.get_raw_response_ids', lambda: BaseProcessor().get_raw_response_ids('/fixtures/players'),
+         set(), None, None, '/fixtures/players'),
+    ]
+
+
+@contextmanager
+def capture_statements():
+    """Record every (query, params) sent through PostgresHandler.execute_query/execute_prepared."""
+    from src.storage.postgres_handler import PostgresHandler
+
+    captured = []
+    original = PostgresHandler.execute_query
+    original_prepared = PostgresHandler.execute_prepared
+
+    def recording(self, query, params=None, fetch=True, timeout_ms=None, role=None):
+        captured.append((query, params))
+        return original(self, query, params, fetch, timeout_ms, role)
+
+    def recording_prepared(self, name, query, params=None, fetch=True, timeout_ms=None, role=None):
+        captured.append((query, params))
+        return original_prepared(self, name, query, params, fetch, timeout_ms, role)
+
+    PostgresHandler.execute_query = recording
+    PostgresHandler.execute_prepared = recording_prepared
+    try:
+        yield captured
+    finally:
+        PostgresHandler.execute_query = original
+        PostgresHandler.execute_prepared = original_prepared
+
+
+def seq_scans(plan, relations):
+    """Relations from `relations` that the plan reads with a Seq Scan."""
+    found = []
+    if plan.get('Node Type') == 'Seq Scan' and plan.get('Relation Name') in relations:
+        found.append(plan['Relation Name'])
+    for child in plan.get('Plans', []):
+        found.extend(seq_scans(child, relations))
+    return found
+
+
+def relations(plan):
+    """Every relation the plan reads."""
+    found = {plan['Relation Name']} if 'Relation Name' in plan else set()
+    for child in plan.get('Plans', []):
+        found |= relations(child)
+    return found
+
+
+def unpruned_partitions(plan, endpoint):
+    """raw_api_responses partitions the plan reads that don't belong to `endpoint`."""
+    from src.storage.raw_storage import RawStorage
+
+    prefix = RawStorage.endpoint_partition(endpoint)
+    return sorted(name for name in relations(plan)
+                  if name.startswith('raw_api_responses') and not name.startswith(prefix))
+
+
+def admin_connection():
+    params = dict(host=config.POSTGRES_HOST, port=config.POSTGRES_PORT, user=config.POSTGRES_USER,
+                  password=config.POSTGRES_PASSWORD, database='postgres')
+    conn = psycopg2.connect(**params)
+    conn.autocommit = True
+    return conn
+
+
+def create_database(name: str, scale: int):
+    conn = admin_connection()
+    with conn.cursor() as cur:
+        # FORCE: pooled connections of the engines used for the check may still be open
+        cur.execute(f'DROP DATABASE IF EXISTS "{name}" WITH (FORCE)')
+        cur.execute(f'CREATE DATABASE "{name}"')
+    conn.close()
+
+    # The handlers created from here on connect to the scratch database
+    config.POSTGRES_DB = name
+    from src.processing.latest_appearance import LatestAppearance
+    from src.processing.match_summary import MatchSummary
+    from src.storage.postgres_handler import PostgresHandler
+    from src.storage.indexes import ensure_indexes
+    from src.storage.raw_storage import RawStorage
+
+    ddl = re.sub(r'--[^\n]*', '', DDL_FILE.read_text())
+    conn = psycopg2.connect(**{k: v for k, v in PostgresHandler().connection_params.items() if k != 'cursor_factory'})
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        for statement in (s.strip() for s in ddl.split(';')):
+            if not statement:
+                continue
+            try:
+                cur.execute(statement)
+            except psycopg2.Error as e:
+                # e.g. CREATE EXTENSION on a server without contrib; ensure_indexes reports it
+                logger.warning(f"DDL statement failed ({e.pgerror or e}): {statement[:80]}")
+        cur.execute(SEED_SQL, {'scale': scale})
+    conn.close()
+    # Endpoint and month partitions; moves the seeded rows out of the defaults
+    RawStorage().ensure_partitions()
+    MatchSummary().rebuild()
+    LatestAppearance().rebuild()
+    PostgresHandler().execute_query("ANALYZE", fetch=False)
+    return ensure_indexes()
+
+
+def drop_database(name: str):
+    conn = admin_connection()
+    with conn.cursor() as cur:
+        # FORCE: pooled connections of the engines used for the check may still be open
+        cur.execute(f'DROP DATABASE IF EXISTS "{name}" WITH (FORCE)')
+    conn.close()
+
+
+def check_plans():
+    from src.storage.postgres_handler import PostgresHandler
+    from src.storage.indexes import missing_indexes
+
+    handler = PostgresHandler()
+    missing = set(missing_indexes(handler))
+    failures = []
+
+    for label, run, guarded, params_override, needs_index, raw_endpoint in hot_queries():
+        if needs_index and needs_index in missing:
+            logger.warning(f"SKIP {label}: {needs_index} is not available on this server")
+            continue
+        with capture_statements() as captured:
+            run()
+        for query, params in captured:
+            explain_params = params_override if params_override is not None else params
+            rows = handler.execute_query(f"EXPLAIN (FORMAT JSON) {query}", explain_params)
+            plan = rows[0][0][0]['Plan']
+            scanned = seq_scans(plan, guarded)
+            unpruned = unpruned_partitions(plan, raw_endpoint) if raw_endpoint else []
+            if scanned:
+                failures.append((label, scanned, plan))
+                logger.error(f"FAIL {label}: sequential scan on {', '.join(sorted(set(scanned)))}")
+            elif unpruned:
+                failures.append((label, unpruned, plan))
+                logger.error(f"FAIL {label}: reads partitions of other endpoints: {', '.join(unpruned)}")
+            else:
+                logger.info(f"OK   {label} (cost {plan['Total Cost']})")
+
+    return failures
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database', default=f"{config.POSTGRES_DB}_plancheck", help='scratch database name')
+    parser.add_argument('--scale', type=int, default=1, help='multiplier for the synthetic player population')
+    parser.add_argument('--keep', action='store_true', help='keep the scratch database afterwards')
+    args = parser.parse_args()
+
+    indexes = create_database(args.database, args.scale)
+    try:
+        failures = check_plans()
+    finally:
+        if not args.keep:
+            drop_database(args.database)
+
+    if indexes['skipped']:
+        logger.warning(f"Indexes not created on this server: {indexes['skipped']}")
+    if failures:
+        for label, scanned, plan in failures:
+            print(f"{label}: {sorted(set(scanned))}\n{json.dumps(plan, indent=2)}")
+        sys.exit(1)
+    print("All hot query plans use indexes.")
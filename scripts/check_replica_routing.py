@@ -0,0 +1,33 @@
+"""
+Show where each connection role is routed (src/storage/replica.py) and the
+replica's current lag.
+
+    POSTGRES_READ_DSN='host=localhost port=5433 dbname=epl_stats user=postgres' \
+        python scripts/check_replica_routing.py
+
+Locally, a streaming replica of the dev database can be made with
+    pg_basebackup -h localhost -p 5432 -U postgres -D /tmp/pgreplica -R -X stream
+    pg_ctl -D /tmp/pgreplica -o "-p 5433" start
+(the primary needs wal_level=replica and a replication entry in pg_hba.conf).
+"""
+from pathlib import Path
+import sys
+import json
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.storage.postgres_handler import PostgresHandler
+from src.utils.configs import config
+
+
+if __name__ == '__main__':
+    handler = PostgresHandler(connect_timeout=config.BOT_CONNECT_TIMEOUT)
+    report = {'read_dsn': config.POSTGRES_READ_DSN or None}
+    if handler.replica is not None:
+        # Measures now; routing otherwise uses the last background check
+        report['replica_status'] = handler.replica.status()
+    for role in ('primary', 'read'):
+        port, standby = handler.execute_query("SELECT inet_server_port(), pg_is_in_recovery()", role=role)[0]
+        report[role] = {'port': port, 'replica': standby}
+    print(json.dumps(report, indent=2))
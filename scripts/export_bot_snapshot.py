@@ -0,0 +1,26 @@
+"""
+Export the bot's read-only SQLite snapshot (src/storage/snapshot.py) now,
+outside a pipeline run.
+
+    python scripts/export_bot_snapshot.py [--path data/snapshots/bot_snapshot.sqlite]
+
+Bots running with BOT_BACKEND=snapshot pick the new file up within
+BOT_SNAPSHOT_CHECK_SECONDS.
+"""
+from pathlib import Path
+import sys
+import argparse
+import json
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.storage.snapshot import SnapshotExporter
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--path', help='snapshot file (default BOT_SNAPSHOT_PATH)')
+    args = parser.parse_args()
+
+    print(json.dumps(SnapshotExporter(path=args.path).export('manual'), indent=2))
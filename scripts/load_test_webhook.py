@@ -0,0 +1,392 @@
+"""
+Load-test the bot's /webhook: post Twilio-style From/Body form requests
+with a configurable intent mix and concurrency, and report throughput,
+p50/p95/p99 latency and error rates.
+
+By default the bot is launched the way the container does (python
+src/bot/app.py) against the configured (seeded, local) Postgres, with
+replies going to a local Twilio stand-in (scripts/twilio_standin.py) so
+the Twilio send is part of each request without messaging anyone. With
+--url an already running bot is tested instead, sending wherever it is
+configured to.
+
+Message bodies are sampled from the database: player names, team names,
+"<team> vs <team>", "table"/"standings <season>" and greetings.
+
+Errors are counted three ways:
+- http: non-200 responses and connection failures or timeouts
+- handler: requests the bot answered 200 but logged as error or
+  unavailable (epl_bot_requests_total on /metrics)
+- send: replies that didn't reach the stand-in (launched bot only)
+
+    python scripts/load_test_webhook.py [--requests 2000] [--concurrency 16]
+        [--mix player=4,team=2,vs=2,table=1,help=1] [--twilio-latency-ms 100]
+        [--save-baseline [PATH]] [--compare [PATH]] [--tolerance 0.2]
+
+--save-baseline writes the settings and results as JSON; --compare
+checks this run against a saved one and exits non-zero if throughput
+dropped or p95/p99 rose by more than --tolerance, or the error rate rose
+by more than 0.1 percentage points.
+Only compare runs made with the same settings on the same machine.
+"""
+from pathlib import Path
+import sys
+import argparse
+import http.client
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from prometheus_client.parser import text_string_to_metric_families
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / 'scripts'))
+
+from src.storage.postgres_handler import PostgresHandler
+from twilio_standin import TwilioStandIn
+
+DEFAULT_MIX = 'player=4,team=2,vs=2,table=1,help=1'
+DEFAULT_BASELINE = 'data/benchmarks/webhook_baseline.json'
+GREETINGS = ['hi', 'hello', 'help', 'start']
+# Settings that must match for --compare to mean anything
+COMPARABLE_SETTINGS = ('mix', 'concurrency', 'requests', 'twilio_latency_ms')
+ERROR_RATE_SLACK = 0.001
+
+
+def parse_mix(text: str) -> dict:
+    mix = {}
+    for part in text.split(','):
+        intent, _, weight = part.partition('=')
+        intent = intent.strip()
+        if intent not in ('player', 'team', 'vs', 'table', 'help'):
+            raise SystemExit(f"unknown intent in --mix: {intent!r}")
+        mix[intent] = float(weight or 1)
+    return mix
+
+
+def sample_bodies(db) -> dict:
+    """Per intent, the message bodies a user might send."""
+    players = [row[0] for row in db.execute_query(
+        "SELECT player_name FROM dim_players ORDER BY player_id LIMIT 500") or []]
+    teams = [row[0] for row in db.execute_query("SELECT team_name FROM dim_teams ORDER BY team_id") or []]
+    seasons = [row[0] for row in db.execute_query("SELECT DISTINCT season FROM fact_standings") or []]
+    if not players or len(teams) < 2:
+        raise SystemExit("No players or teams; seed the database (run the pipeline) first.")
+    rng = random.Random(7)
+    return {
+        'player': players,
+        'team': teams,
+        'vs': [f"{a} vs {b}" for a, b in (rng.sample(teams, 2) for _ in range(200))],
+        'table': ['table', 'standings'] + [f"table {season}" for season in seasons],
+        'help': GREETINGS,
+    }
+
+
+def build_requests(mix: dict, bodies: dict, count: int, seed: int) -> list:
+    """(intent, From, Body) for each request, drawn from the mix."""
+    rng = random.Random(seed)
+    intents = list(mix)
+    weights = [mix[intent] for intent in intents]
+    plan = []
+    for i, intent in enumerate(rng.choices(intents, weights, k=count)):
+        sender = f"whatsapp:+1555{i % 1000:07d}"
+        plan.append((intent, sender, rng.choice(bodies[intent])))
+    return plan
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def launch_bot(twilio_url: str, max_seconds: float):
+    """Start src/bot/app.py replying through the stand-in; (process, base url) once /ready."""
+    port = free_port()
+    env = dict(os.environ, BOT_PORT=str(port), BOT_RELOAD='false', PYTHONPATH=str(project_root),
+               TWILIO_API_BASE_URL=twilio_url, TWILIO_ACCOUNT_SID='AC' + '0' * 32,
+               TWILIO_AUTH_TOKEN='loadtest')
+    process = subprocess.Popen([sys.executable, str(project_root / 'src' / 'bot' / 'app.py')], env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    while time.perf_counter() - started < max_seconds:
+        if process.poll() is not None:
+            raise SystemExit(f"bot exited with code {process.returncode} before becoming ready")
+        try:
+            with urllib.request.urlopen(f"{base_url}/ready", timeout=2) as response:
+                if response.status == 200:
+                    return process, base_url
+        except (urllib.error.URLError, ConnectionError, socket.timeout):
+            pass
+        time.sleep(0.05)
+    stop_bot(process)
+    raise SystemExit(f"bot not ready within {max_seconds}s")
+
+
+def stop_bot(process):
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def handler_outcomes(base_url: str) -> dict:
+    """epl_bot_requests_total summed by outcome, or {} if /metrics isn't there."""
+    try:
+        with urllib.request.urlopen(f"{base_url}/metrics", timeout=5) as response:
+            text = response.read().decode()
+    except (urllib.error.URLError, ConnectionError, socket.timeout):
+        return {}
+    outcomes = {}
+    for family in text_string_to_metric_families(text):
+        if family.name != 'epl_bot_requests':
+            continue
+        for sample in family.samples:
+            if sample.name == 'epl_bot_requests_total':
+                outcome = sample.labels['outcome']
+                outcomes[outcome] = outcomes.get(outcome, 0) + sample.value
+    return outcomes
+
+
+class Worker:
+    """One client with a keep-alive connection, like a Twilio webhook sender."""
+
+    def __init__(self, base_url: str, timeout: float):
+        parts = urllib.parse.urlsplit(base_url)
+        self.host, self.port, self.timeout = parts.hostname, parts.port or 80, timeout
+        self.conn = None
+
+    def post(self, sender: str, body: str):
+        """(latency ms, error or None)."""
+        data = urllib.parse.urlencode({'From': sender, 'Body': body})
+        headers = {'Content-Type': 'application/x-www-form-urlencoded'}
+        started = time.perf_counter()
+        try:
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            self.conn.request('POST', '/webhook', data, headers)
+            response = self.conn.getresponse()
+            response.read()
+            error = None if response.status == 200 else f"http {response.status}"
+        except (OSError, http.client.HTTPException) as e:
+            error = type(e).__name__
+            self.conn.close()
+            self.conn = None
+        return (time.perf_counter() - started) * 1000, error
+
+
+def run_load(base_url: str, plan: list, concurrency: int, timeout: float):
+    """Post every request in the plan from `concurrency` clients; (samples, seconds)."""
+    samples = []
+    lock = threading.Lock()
+    position = iter(range(len(plan)))
+
+    def client():
+        worker = Worker(base_url, timeout)
+        local = []
+        while True:
+            with lock:
+                i = next(position, None)
+            if i is None:
+                break
+            intent, sender, body = plan[i]
+            latency_ms, error = worker.post(sender, body)
+            local.append((intent, latency_ms, error))
+        with lock:
+            samples.extend(local)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        for future in [pool.submit(client) for _ in range(concurrency)]:
+            future.result()
+    return samples, time.perf_counter() - started
+
+
+def percentile(ordered: list, pct: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not ordered:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def latency_summary(latencies: list) -> dict:
+    ordered = sorted(latencies)
+    return {
+        'count': len(ordered),
+        'p50_ms': round(percentile(ordered, 50), 2),
+        'p95_ms': round(percentile(ordered, 95), 2),
+        'p99_ms': round(percentile(ordered, 99), 2),
+        'max_ms': round(ordered[-1], 2) if ordered else 0.0,
+    }
+
+
+def summarize(samples: list, seconds: float, outcomes_before: dict, outcomes_after: dict,
+              sends: dict = None) -> dict:
+    total = len(samples)
+    http_errors = [error for _, _, error in samples if error]
+    handler = {outcome: int(outcomes_after.get(outcome, 0) - outcomes_before.get(outcome, 0))
+               for outcome in ('ok', 'stale', 'unavailable', 'error')}
+    handler_errors = handler['unavailable'] + handler['error']
+    results = {
+        'requests': total,
+        'seconds': round(seconds, 3),
+        'throughput_rps': round(total / seconds, 1) if seconds else 0.0,
+        'latency': latency_summary([latency for _, latency, _ in samples]),
+        'by_intent': {},
+        'errors': {
+            'http': len(http_errors),
+            'http_kinds': {kind: http_errors.count(kind) for kind in sorted(set(http_errors))},
+            'handler': handler_errors if outcomes_after else None,
+            'handler_outcomes': handler if outcomes_after else None,
+        },
+    }
+    if sends is not None:
+        # every request that reached a handler branch sends exactly one reply
+        expected = total - len(http_errors) - handler['error']
+        results['errors']['send'] = max(0, expected - sends['received']) + sends['failed']
+    counted = len(http_errors) + (handler_errors if outcomes_after else 0) + results['errors'].get('send', 0)
+    results['error_rate'] = round(counted / total, 4) if total else 0.0
+    for intent in sorted({intent for intent, _, _ in samples}):
+        latencies = [latency for i, latency, _ in samples if i == intent]
+        results['by_intent'][intent] = latency_summary(latencies)
+    return results
+
+
+def print_report(settings: dict, results: dict):
+    print(f"\n{results['requests']} requests, concurrency {settings['concurrency']}, "
+          f"mix {settings['mix']}, Twilio stand-in latency {settings['twilio_latency_ms']} ms")
+    print(f"throughput: {results['throughput_rps']} req/s over {results['seconds']}s\n")
+    print(f"{'intent':8} {'count':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    rows = list(results['by_intent'].items()) + [('all', results['latency'])]
+    for intent, summary in rows:
+        print(f"{intent:8} {summary['count']:>6} {summary['p50_ms']:>8.1f} {summary['p95_ms']:>8.1f} "
+              f"{summary['p99_ms']:>8.1f} {summary['max_ms']:>8.1f}")
+    errors = results['errors']
+    print(f"\nerrors: http {errors['http']} {errors['http_kinds'] or ''}, "
+          f"handler {errors['handler']} {errors['handler_outcomes'] or ''}, send {errors.get('send')}")
+    print(f"error rate: {results['error_rate']:.2%}")
+
+
+def compare(baseline: dict, settings: dict, results: dict, tolerance: float) -> list:
+    """Regressions of this run against the baseline, as messages."""
+    different = [key for key in COMPARABLE_SETTINGS if baseline['settings'].get(key) != settings.get(key)]
+    if different:
+        print(f"\nwarning: settings differ from the baseline ({', '.join(different)}); comparison is rough")
+    old = baseline['results']
+    checks = [
+        ('throughput_rps', old['throughput_rps'], results['throughput_rps'], 'lower'),
+        ('p95_ms', old['latency']['p95_ms'], results['latency']['p95_ms'], 'higher'),
+        ('p99_ms', old['latency']['p99_ms'], results['latency']['p99_ms'], 'higher'),
+    ]
+    print(f"\nvs baseline from {baseline['created']} ({baseline.get('commit') or 'unknown commit'}):")
+    regressions = []
+    for name, before, now, worse in checks:
+        change = (now - before) / before if before else 0.0
+        print(f"  {name:15} {before:>9} -> {now:>9}  ({change:+.1%})")
+        if (worse == 'lower' and change < -tolerance) or (worse == 'higher' and change > tolerance):
+            regressions.append(f"{name} {before} -> {now} ({change:+.1%})")
+    print(f"  {'error_rate':15} {old['error_rate']:>9} -> {results['error_rate']:>9}")
+    if results['error_rate'] - old['error_rate'] > ERROR_RATE_SLACK:
+        regressions.append(f"error_rate {old['error_rate']} -> {results['error_rate']}")
+    return regressions
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=project_root,
+                              capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2000, help='measured requests')
+    parser.add_argument('--warmup-requests', type=int, default=100, help='sent first, not measured')
+    parser.add_argument('--concurrency', type=int, default=16, help='concurrent clients')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help='intent=weight,... over player, team, vs, table, help')
+    parser.add_argument('--twilio-latency-ms', type=float, default=100.0,
+                        help="stand-in reply delay; Twilio's API typically takes 100-300 ms")
+    parser.add_argument('--twilio-error-rate', type=float, default=0.0)
+    parser.add_argument('--url', help='test a running bot instead of launching one (no send check)')
+    parser.add_argument('--timeout', type=float, default=30.0, help='per-request timeout, seconds')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--save-baseline', nargs='?', const=DEFAULT_BASELINE, metavar='PATH')
+    parser.add_argument('--compare', nargs='?', const=DEFAULT_BASELINE, metavar='PATH')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed relative regression')
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    bodies = sample_bodies(PostgresHandler())
+    warmup = build_requests(mix, bodies, args.warmup_requests, args.seed + 1)
+    plan = build_requests(mix, bodies, args.requests, args.seed)
+    settings = {
+        'mix': args.mix,
+        'concurrency': args.concurrency,
+        'requests': args.requests,
+        'twilio_latency_ms': None if args.url else args.twilio_latency_ms,
+        'twilio_error_rate': None if args.url else args.twilio_error_rate,
+        'target': args.url or 'launched',
+    }
+
+    standin, process = None, None
+    try:
+        if args.url:
+            base_url = args.url.rstrip('/')
+        else:
+            standin = TwilioStandIn(latency_ms=args.twilio_latency_ms, error_rate=args.twilio_error_rate).start()
+            process, base_url = launch_bot(standin.base_url, max_seconds=30)
+
+        run_load(base_url, warmup, args.concurrency, args.timeout)
+        before = handler_outcomes(base_url)
+        sends_before = standin.counts() if standin else None
+        samples, seconds = run_load(base_url, plan, args.concurrency, args.timeout)
+        after = handler_outcomes(base_url)
+        sends = None
+        if standin:
+            # replies are sent before the webhook returns, so all are in by now
+            sends_after = standin.counts()
+            sends = {key: sends_after[key] - sends_before[key] for key in sends_after}
+        results = summarize(samples, seconds, before, after, sends)
+    finally:
+        if process is not None:
+            stop_bot(process)
+        if standin is not None:
+            standin.stop()
+
+    print_report(settings, results)
+
+    regressions = []
+    if args.compare:
+        path = Path(args.compare)
+        if path.exists():
+            regressions = compare(json.loads(path.read_text()), settings, results, args.tolerance)
+        else:
+            print(f"\nNo baseline at {path}; run with --save-baseline first.")
+    if args.save_baseline:
+        path = Path(args.save_baseline)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({
+            'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'commit': git_commit(),
+            'settings': settings,
+            'results': results,
+        }, indent=2) + '\n')
+        print(f"\nBaseline saved to {path}")
+    if regressions:
+        print("\nRegressions beyond the tolerance:\n  " + "\n  ".join(regressions))
+        sys.exit(1)
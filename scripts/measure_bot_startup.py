@@ -0,0 +1,111 @@
+"""
+Measure the bot service's cold start: launch it the way the container does
+(python src/bot/app.py), wait for GET /ready to return 200, and report the
+time to ready, the service's own startup and warm-up timings, and the
+latency of the first requests after that.
+
+    python scripts/measure_bot_startup.py [--runs 3] [--max-seconds 10] [--webhook]
+
+Exits non-zero if any run isn't ready within --max-seconds. --webhook also
+times the first and a repeated webhook request per intent; replies are
+sent through the configured Twilio account, so only use it with test
+credentials or a local stand-in.
+"""
+from pathlib import Path
+import sys
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+WEBHOOK_PROBES = [('standings', 'table'), ('head_to_head', 'arsenal vs chelsea'),
+                  ('team_results', 'arsenal'), ('help', 'help')]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def get(url: str, timeout: float = 2.0):
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            return response.status, json.loads(response.read() or b'null')
+    except urllib.error.HTTPError as e:
+        return e.code, None
+
+
+def post_webhook(base_url: str, body: str) -> float:
+    data = urllib.parse.urlencode({'From': 'whatsapp:+10000000000', 'Body': body}).encode()
+    started = time.perf_counter()
+    with urllib.request.urlopen(f"{base_url}/webhook", data=data, timeout=30) as response:
+        response.read()
+    return (time.perf_counter() - started) * 1000
+
+
+def measure_run(max_seconds: float, webhook: bool) -> dict:
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    env = dict(os.environ, BOT_PORT=str(port), BOT_RELOAD='false', PYTHONPATH=str(project_root))
+    started = time.perf_counter()
+    process = subprocess.Popen([sys.executable, str(project_root / 'src' / 'bot' / 'app.py')], env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        status, body = None, None
+        while time.perf_counter() - started < max_seconds:
+            if process.poll() is not None:
+                raise RuntimeError(f"bot exited with code {process.returncode} before becoming ready")
+            try:
+                status, body = get(f"{base_url}/ready")
+            except (urllib.error.URLError, ConnectionError, socket.timeout):
+                status = None
+            if status == 200:
+                break
+            time.sleep(0.02)
+        result = {
+            'ready': status == 200,
+            'ready_seconds': round(time.perf_counter() - started, 3),
+            'startup_seconds': (body or {}).get('startup_seconds'),
+            'warmup_ms': (body or {}).get('warmup_ms'),
+        }
+        if result['ready'] and webhook:
+            result['webhook_ms'] = {
+                intent: {'first': round(post_webhook(base_url, text), 1),
+                         'repeat': round(post_webhook(base_url, text), 1)}
+                for intent, text in WEBHOOK_PROBES
+            }
+        return result
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--max-seconds', type=float, default=10.0, help='fail if not ready within this')
+    parser.add_argument('--webhook', action='store_true', help='also time first webhook requests')
+    args = parser.parse_args()
+
+    runs = [measure_run(args.max_seconds, args.webhook) for _ in range(args.runs)]
+    for i, run in enumerate(runs, 1):
+        print(f"run {i}: {json.dumps(run)}")
+    ready = [run['ready_seconds'] for run in runs if run['ready']]
+    if ready:
+        print(f"\ntime to ready: median {statistics.median(ready):.3f}s, max {max(ready):.3f}s")
+    if len(ready) != len(runs):
+        print(f"{len(runs) - len(ready)} of {len(runs)} runs were not ready within {args.max_seconds}s")
+        sys.exit(1)
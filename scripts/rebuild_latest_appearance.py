@@ -0,0 +1,30 @@
+"""
+Recompute player_latest_appearance from fact_player_stats and verify it.
+
+    python scripts/rebuild_latest_appearance.py            # rebuild, then verify
+    python scripts/rebuild_latest_appearance.py --verify   # only compare against a full recomputation
+
+Exits non-zero if the table doesn't match a full recomputation afterwards.
+"""
+from pathlib import Path
+import sys
+import argparse
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.processing.latest_appearance import LatestAppearance
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--verify', action='store_true', help='compare only, do not rebuild')
+    args = parser.parse_args()
+
+    latest = LatestAppearance()
+    if not args.verify:
+        print(f"Rebuilt: {latest.rebuild()}")
+    result = latest.verify()
+    print(f"Verified: {result}")
+    if result['missing'] or result['extra'] or result['different']:
+        sys.exit(1)
@@ -0,0 +1,129 @@
+"""
+A local stand-in for the Twilio Messages API, for load-testing the bot
+without sending real WhatsApp messages.
+
+It accepts POST /2010-04-01/Accounts/<sid>/Messages.json the way
+api.twilio.com does (form body, basic auth not checked), waits
+--latency-ms, and answers 201 with a queued message resource; with
+--error-rate a share of requests gets Twilio's 500 error body instead.
+Point the bot at it with TWILIO_API_BASE_URL=http://127.0.0.1:<port>.
+
+    python scripts/twilio_standin.py [--port 8099] [--latency-ms 100] [--error-rate 0]
+"""
+from pathlib import Path
+import sys
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import urllib.parse
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+MESSAGES_PATH = re.compile(r'^/2010-04-01/Accounts/(?P<sid>[^/]+)/Messages\.json$')
+
+
+class TwilioStandIn:
+    """Messages API stand-in on a background thread; counts what it receives."""
+
+    def __init__(self, port: int = 0, latency_ms: float = 0.0, error_rate: float = 0.0):
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.received = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+        self._rng = random.Random(0)
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'TwilioStandIn':
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def counts(self) -> dict:
+        with self._lock:
+            return {'received': self.received, 'failed': self.failed}
+
+    def _record(self) -> bool:
+        """Count a message; True if it should fail."""
+        with self._lock:
+            self.received += 1
+            fail = self.error_rate > 0 and self._rng.random() < self.error_rate
+            if fail:
+                self.failed += 1
+            return fail
+
+    def _handler(self):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                match = MESSAGES_PATH.match(urllib.parse.urlsplit(self.path).path)
+                length = int(self.headers.get('Content-Length') or 0)
+                form = urllib.parse.parse_qs(self.rfile.read(length).decode())
+                if not match:
+                    return self._reply(404, {'code': 20404, 'message': 'The requested resource was not found',
+                                             'status': 404})
+                if standin.latency_ms:
+                    time.sleep(standin.latency_ms / 1000)
+                if standin._record():
+                    return self._reply(500, {'code': 20500, 'message': 'Internal Server Error', 'status': 500})
+                sid = 'SM' + uuid.uuid4().hex
+                self._reply(201, {
+                    'sid': sid,
+                    'account_sid': match.group('sid'),
+                    'status': 'queued',
+                    'to': form.get('To', [None])[0],
+                    'from': form.get('From', [None])[0],
+                    'body': form.get('Body', [''])[0],
+                    'num_media': str(len(form.get('MediaUrl', []))),
+                    'uri': f"{match.group(0)[:-len('.json')]}/{sid}.json",
+                })
+
+            def _reply(self, status: int, body: dict):
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--latency-ms', type=float, default=100.0, help='delay before each reply')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='share of sends answered with a 500')
+    args = parser.parse_args()
+
+    standin = TwilioStandIn(args.port, args.latency_ms, args.error_rate).start()
+    print(f"Twilio stand-in on {standin.base_url} (set TWILIO_API_BASE_URL to this); Ctrl-C to stop")
+    try:
+        while True:
+            time.sleep(5)
+    except KeyboardInterrupt:
+        print(f"\n{standin.counts()}")
+        standin.stop()
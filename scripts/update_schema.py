@@ -6,6 +6,12 @@ project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 from src.storage.postgres_handler import PostgresHandler
+from src.storage.indexes import ensure_indexes
+from src.storage.ingestion_ledger import IngestionLedger
+from src.storage.raw_storage import RawStorage
+from src.processing.latest_appearance import LatestAppearance
+from src.processing.match_summary import MatchSummary
+from src.processing.player_season import PlayerSeasonAggregate
 from src.utils.logger import setup_logger
 
 logger = setup_logger(__name__, 'schema_update.log')
@@ -120,8 +126,130 @@ def update_schema():
     );
 
     CREATE INDEX IF NOT EXISTS idx_player_stats_fixture ON fact_player_stats(fixture_id);
-    CREATE INDEX IF NOT EXISTS idx_player_stats_player ON fact_player_stats(player_id);
     CREATE INDEX IF NOT EXISTS idx_player_stats_team ON fact_player_stats(team_id);
+
+    -- Match date copied from matches for the (player_id, match_date) index
+    ALTER TABLE fact_player_stats ADD COLUMN IF NOT EXISTS match_date TIMESTAMP;
+
+    -- ============================================================================
+    -- AGGREGATE TABLE: Player Season Totals
+    -- ============================================================================
+    CREATE TABLE IF NOT EXISTS fact_player_season (
+        player_id BIGINT NOT NULL REFERENCES dim_players(player_id),
+        league_id INTEGER NOT NULL,
+        season INTEGER NOT NULL,
+        team_id INTEGER NOT NULL REFERENCES dim_teams(team_id),
+        appearances INTEGER NOT NULL,
+        minutes_played INTEGER NOT NULL,
+        goals INTEGER NOT NULL,
+        assists INTEGER NOT NULL,
+        yellow_cards INTEGER NOT NULL,
+        red_cards INTEGER NOT NULL,
+        avg_rating NUMERIC(4, 2),
+        goals_per90 NUMERIC(6, 3),
+        assists_per90 NUMERIC(6, 3),
+        last_match_date TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (player_id, league_id, season, team_id)
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_player_season_season ON fact_player_season(league_id, season);
+
+    -- ============================================================================
+    -- READ MODEL: Latest Appearance per Player
+    -- ============================================================================
+    CREATE TABLE IF NOT EXISTS player_latest_appearance (
+        player_id BIGINT PRIMARY KEY REFERENCES dim_players(player_id),
+        fixture_id BIGINT NOT NULL REFERENCES matches(fixture_id),
+        team_id INTEGER NOT NULL,
+        match_date TIMESTAMP NOT NULL,
+        minutes_played INTEGER,
+        rating NUMERIC(4, 2),
+        goals_total INTEGER,
+        assists INTEGER,
+        passes_accuracy VARCHAR(10),
+        shots_on_target INTEGER,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+
+    -- ============================================================================
+    -- READ MODEL: Match Summary
+    -- ============================================================================
+    CREATE TABLE IF NOT EXISTS match_summary (
+        fixture_id BIGINT PRIMARY KEY REFERENCES matches(fixture_id),
+        league_id INTEGER NOT NULL,
+        season INTEGER NOT NULL,
+        match_date TIMESTAMP NOT NULL,
+        round VARCHAR(50),
+        status VARCHAR(20) NOT NULL,
+        home_team_id INTEGER NOT NULL,
+        home_team_name VARCHAR(100) NOT NULL,
+        away_team_id INTEGER NOT NULL,
+        away_team_name VARCHAR(100) NOT NULL,
+        home_goals INTEGER,
+        away_goals INTEGER,
+        venue_name VARCHAR(255),
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+
+    -- ============================================================================
+    -- PIPELINE: Changed-entity feed
+    -- ============================================================================
+    CREATE TABLE IF NOT EXISTS pipeline_change_log (
+        change_id BIGSERIAL PRIMARY KEY,
+        run_id VARCHAR(64) NOT NULL,
+        entity_type VARCHAR(20) NOT NULL,
+        entity_key VARCHAR(50) NOT NULL,
+        changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_change_log_run ON pipeline_change_log(run_id);
+    CREATE INDEX IF NOT EXISTS idx_change_log_type ON pipeline_change_log(entity_type, change_id);
+
+    -- ============================================================================
+    -- PIPELINE: Run history and per-stage metrics
+    -- ============================================================================
+    CREATE TABLE IF NOT EXISTS pipeline_runs (
+        run_id VARCHAR(64) PRIMARY KEY,
+        started_at TIMESTAMP NOT NULL,
+        finished_at TIMESTAMP NOT NULL,
+        success BOOLEAN NOT NULL,
+        wall_seconds NUMERIC(10,3),
+        cpu_seconds NUMERIC(10,3),
+        rows_read INTEGER,
+        raw_bytes BIGINT,
+        rows_parsed INTEGER,
+        rows_written INTEGER,
+        peak_rss_mb NUMERIC(10,1),
+        workers INTEGER,
+        stage_metrics JSONB,
+        row_changes JSONB,
+        errors JSONB
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_pipeline_runs_started ON pipeline_runs(started_at DESC);
+
+    -- ============================================================================
+    -- RAW: Projected payloads (src/storage/projections.py)
+    -- ============================================================================
+    ALTER TABLE raw_api_responses ADD COLUMN IF NOT EXISTS projected_data JSONB;
+    ALTER TABLE raw_api_responses ADD COLUMN IF NOT EXISTS projection_version SMALLINT;
+
+    -- ============================================================================
+    -- INGESTION: Fetch ledger
+    -- ============================================================================
+    CREATE TABLE IF NOT EXISTS ingestion_ledger (
+        endpoint VARCHAR(100) NOT NULL,
+        entity_id BIGINT NOT NULL,
+        status VARCHAR(20) NOT NULL,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        last_error TEXT,
+        response_id INTEGER,
+        first_attempt_at TIMESTAMP DEFAULT NOW(),
+        last_attempt_at TIMESTAMP DEFAULT NOW(),
+        fetched_at TIMESTAMP,
+        PRIMARY KEY (endpoint, entity_id)
+    );
     """
     
     try:
@@ -129,6 +257,32 @@ def update_schema():
         with handler.get_connection() as conn:
             with conn.cursor() as cur:
                 cur.execute(ddl)
+        # raw_api_responses partitioned by endpoint and month (migrates an unpartitioned table)
+        raw_storage = RawStorage(handler)
+        raw_storage.partition_existing_table()
+        raw_storage.ensure_partitions()
+        # Fixtures fetched before the ledger existed
+        IngestionLedger(handler).backfill_from_raw('/fixtures/players', 'fixture')
+        # Managed index set (creates missing indexes, drops retired ones)
+        ensure_indexes(handler)
+        # match_date on stat rows processed before the column existed; the
+        # read-model rebuilds below only see rows that have one
+        with handler.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    UPDATE fact_player_stats s
+                    SET match_date = m.match_date
+                    FROM matches m
+                    WHERE s.fixture_id = m.fixture_id
+                    AND s.match_date IS DISTINCT FROM m.match_date
+                """)
+                logger.info(f"Backfilled match_date on {cur.rowcount} player stat rows")
+        # Season aggregates for stats processed before the table existed
+        PlayerSeasonAggregate(handler).rebuild()
+        # Match summaries for fixtures processed before the table existed
+        MatchSummary(handler).rebuild()
+        # Latest-appearance pointers for stats processed before the table existed
+        LatestAppearance(handler).rebuild()
         logger.info("Schema update completed successfully!")
         
     except Exception as e:
@@ -1,6 +1,9 @@
 -- =============================================================================
 -- DROP EXISTING TABLES (for clean setup)
 -- =============================================================================
+DROP TABLE IF EXISTS fact_player_season CASCADE;
+DROP TABLE IF EXISTS player_latest_appearance CASCADE;
+DROP TABLE IF EXISTS match_summary CASCADE;
 DROP TABLE IF EXISTS fact_player_stats CASCADE;
 DROP TABLE IF EXISTS fact_goals CASCADE;
 DROP TABLE IF EXISTS fact_matches CASCADE;
@@ -11,6 +14,9 @@ DROP TABLE IF EXISTS dim_venues CASCADE;
 DROP TABLE IF EXISTS raw_api_responses CASCADE;
 DROP TABLE IF EXISTS leagues CASCADE;
 DROP TABLE IF EXISTS matches CASCADE;
+DROP TABLE IF EXISTS pipeline_change_log CASCADE;
+DROP TABLE IF EXISTS pipeline_runs CASCADE;
+DROP TABLE IF EXISTS ingestion_ledger CASCADE;
 -- =============================================================================
 -- DIMENSION TABLES
 -- =============================================================================
@@ -72,13 +78,42 @@ CREATE INDEX idx_teams_country ON dim_teams(country);
 -- RAW DATA STORAGE (for reprocessing)
 -- =============================================================================
 
+-- Partitioned by endpoint, then by month of fetched_at. The per-endpoint and
+-- monthly partitions are created by src/storage/raw_storage.py (update_schema.py
+-- and the daily DAG); superseded snapshots are archived to data/archive/raw.
 CREATE TABLE raw_api_responses (
-    response_id SERIAL PRIMARY KEY,        -- ← We generate this (auto-increment)
+    response_id SERIAL,                    -- ← We generate this (auto-increment)
     endpoint VARCHAR(100) NOT NULL,        -- ← We set this: '/leagues'
     request_params JSONB,                  -- ← We set this: {"id": "39"}
     response_data JSONB NOT NULL,          -- ← We store the ENTIRE API response here
-    fetched_at TIMESTAMP DEFAULT NOW(),    -- ← Database sets this automatically
-    created_at TIMESTAMP DEFAULT NOW()     -- ← Database sets this automatically
+    fetched_at TIMESTAMP NOT NULL DEFAULT NOW(), -- ← Database sets this automatically
+    created_at TIMESTAMP DEFAULT NOW(),    -- ← Database sets this automatically
+    projected_data JSONB,                  -- ← Fields the processors read (src/storage/projections.py)
+    projection_version SMALLINT,           -- ← Schema version of projected_data
+    PRIMARY KEY (response_id, endpoint, fetched_at)
+) PARTITION BY LIST (endpoint);
+
+-- Endpoints without their own partition
+CREATE TABLE raw_api_responses_other PARTITION OF raw_api_responses DEFAULT;
+
+-- Managed indexes (src/storage/indexes.py)
+CREATE INDEX idx_raw_endpoint_fetched ON raw_api_responses(endpoint, fetched_at DESC);
+CREATE INDEX idx_raw_endpoint_response ON raw_api_responses(endpoint, response_id);
+
+-- Fetch status per (endpoint, entity_id), e.g. ('/fixtures/players', fixture_id).
+-- Maintained by the fetcher in the same transaction as the raw insert; an entity
+-- is 'fetched', 'failed' (retried) or 'abandoned' after LEDGER_MAX_ATTEMPTS failures.
+CREATE TABLE ingestion_ledger (
+    endpoint VARCHAR(100) NOT NULL,
+    entity_id BIGINT NOT NULL,
+    status VARCHAR(20) NOT NULL,           -- 'fetched', 'failed', 'abandoned'
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    response_id INTEGER,                   -- raw_api_responses row of the successful fetch
+    first_attempt_at TIMESTAMP DEFAULT NOW(),
+    last_attempt_at TIMESTAMP DEFAULT NOW(),
+    fetched_at TIMESTAMP,
+    PRIMARY KEY (endpoint, entity_id)
 );
 
 -- =============================================================================
@@ -133,13 +168,38 @@ CREATE TABLE matches (
     CONSTRAINT different_teams CHECK (home_team_id != away_team_id)
 );
 
--- Indexes for performance
--- CREATE INDEX IF NOT EXISTS idx_matches_league_season ON matches(league_id, season);
--- CREATE INDEX IF NOT EXISTS idx_matches_home_team ON matches(home_team_id);
--- CREATE INDEX IF NOT EXISTS idx_matches_away_team ON matches(away_team_id);
--- CREATE INDEX IF NOT EXISTS idx_matches_date ON matches(match_date);
--- CREATE INDEX IF NOT EXISTS idx_matches_status ON matches(status);
--- CREATE INDEX IF NOT EXISTS idx_matches_round ON matches(round);
+-- Indexes for performance (managed in src/storage/indexes.py)
+CREATE INDEX idx_matches_league_season ON matches(league_id, season);
+CREATE INDEX idx_matches_home_team_date ON matches(home_team_id, match_date DESC);
+CREATE INDEX idx_matches_away_team_date ON matches(away_team_id, match_date DESC);
+CREATE INDEX idx_matches_completed_date ON matches(match_date DESC) WHERE status IN ('FT', 'AET', 'PEN');
+
+-- ============================================================================
+-- READ MODEL: Match Summary
+-- ============================================================================
+-- One row per fixture with team and venue names resolved, for the bot's match
+-- lookups. Maintained by MatchesProcessor (src/processing/match_summary.py);
+-- scripts/rebuild_match_summary.py recomputes and verifies it.
+CREATE TABLE IF NOT EXISTS match_summary (
+    fixture_id BIGINT PRIMARY KEY REFERENCES matches(fixture_id),
+    league_id INTEGER NOT NULL,
+    season INTEGER NOT NULL,
+    match_date TIMESTAMP NOT NULL,
+    round VARCHAR(50),
+    status VARCHAR(20) NOT NULL,
+    home_team_id INTEGER NOT NULL,
+    home_team_name VARCHAR(100) NOT NULL,
+    away_team_id INTEGER NOT NULL,
+    away_team_name VARCHAR(100) NOT NULL,
+    home_goals INTEGER,
+    away_goals INTEGER,
+    venue_name VARCHAR(255),
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Managed in src/storage/indexes.py
+CREATE INDEX idx_match_summary_home_date ON match_summary(home_team_id, match_date DESC);
+CREATE INDEX idx_match_summary_away_date ON match_summary(away_team_id, match_date DESC);
 
 -- ============================================================================
 -- DIMENSION TABLE: Players
@@ -163,6 +223,19 @@ CREATE TABLE IF NOT EXISTS dim_players (
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Skeleton players (created from match stats) waiting for a profile
+CREATE INDEX idx_players_skeleton ON dim_players(player_id) WHERE firstname IS NULL;
+-- Substring name search (player_name ILIKE '%...%'); needs the pg_trgm contrib extension,
+-- skipped where it can't be installed (as ensure_indexes() in src/storage/indexes.py does)
+DO $$
+BEGIN
+    CREATE EXTENSION IF NOT EXISTS pg_trgm;
+    CREATE INDEX idx_players_name_trgm ON dim_players USING gin (player_name gin_trgm_ops);
+EXCEPTION WHEN feature_not_supported OR undefined_file OR insufficient_privilege THEN
+    RAISE NOTICE 'Skipping idx_players_name_trgm: extension pg_trgm unavailable (%)', SQLERRM;
+END
+$$;
+
 -- ============================================================================
 -- FACT TABLE: Player Match Stats
 -- ============================================================================
@@ -221,6 +294,9 @@ CREATE TABLE IF NOT EXISTS fact_player_stats (
     penalty_missed INTEGER,
     penalty_saved INTEGER,
     
+    -- Copied from matches by PlayersProcessor, for the (player_id, match_date) path
+    match_date TIMESTAMP,
+    
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     
@@ -228,9 +304,57 @@ CREATE TABLE IF NOT EXISTS fact_player_stats (
 );
 
 CREATE INDEX idx_player_stats_fixture ON fact_player_stats(fixture_id);
-CREATE INDEX idx_player_stats_player ON fact_player_stats(player_id);
+CREATE INDEX idx_player_stats_player_date ON fact_player_stats(player_id, match_date DESC NULLS LAST);
 CREATE INDEX idx_player_stats_team ON fact_player_stats(team_id);
 
+-- ============================================================================
+-- AGGREGATE TABLE: Player Season Totals
+-- ============================================================================
+-- One row per player, league, season and team. Maintained by PlayersProcessor
+-- from the fixtures each run touched (src/processing/player_season.py);
+-- scripts/rebuild_player_season.py recomputes and verifies it.
+CREATE TABLE IF NOT EXISTS fact_player_season (
+    player_id BIGINT NOT NULL REFERENCES dim_players(player_id),
+    league_id INTEGER NOT NULL,
+    season INTEGER NOT NULL,
+    team_id INTEGER NOT NULL REFERENCES dim_teams(team_id),
+    appearances INTEGER NOT NULL,      -- matches with minutes_played > 0
+    minutes_played INTEGER NOT NULL,
+    goals INTEGER NOT NULL,
+    assists INTEGER NOT NULL,
+    yellow_cards INTEGER NOT NULL,
+    red_cards INTEGER NOT NULL,
+    avg_rating NUMERIC(4, 2),
+    goals_per90 NUMERIC(6, 3),
+    assists_per90 NUMERIC(6, 3),
+    last_match_date TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (player_id, league_id, season, team_id)
+);
+
+CREATE INDEX idx_player_season_season ON fact_player_season(league_id, season);
+
+-- ============================================================================
+-- READ MODEL: Latest Appearance per Player
+-- ============================================================================
+-- Pointer to each player's most recent dated stats row, with the stats the
+-- player card shows. Maintained by PlayersProcessor
+-- (src/processing/latest_appearance.py); scripts/rebuild_latest_appearance.py
+-- recomputes and verifies it.
+CREATE TABLE IF NOT EXISTS player_latest_appearance (
+    player_id BIGINT PRIMARY KEY REFERENCES dim_players(player_id),
+    fixture_id BIGINT NOT NULL REFERENCES matches(fixture_id),
+    team_id INTEGER NOT NULL,
+    match_date TIMESTAMP NOT NULL,
+    minutes_played INTEGER,
+    rating NUMERIC(4, 2),
+    goals_total INTEGER,
+    assists INTEGER,
+    passes_accuracy VARCHAR(10),
+    shots_on_target INTEGER,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
 -- ============================================================================
 -- FACT TABLE: League Standings
 -- ============================================================================
@@ -253,4 +377,48 @@ CREATE TABLE IF NOT EXISTS fact_standings (
     UNIQUE(league_id, season, team_id)
 );
 
-CREATE INDEX idx_standings_league_season ON fact_standings(league_id, season);
\ No newline at end of file
+CREATE INDEX idx_standings_league_season ON fact_standings(league_id, season);
+
+-- ============================================================================
+-- PIPELINE: Changed-entity feed
+-- ============================================================================
+-- One row per entity inserted/updated by a processing run. entity_key is the id
+-- for 'fixture' / 'player' / 'team' and 'league_id:season' for 'standings'.
+-- Each run also sends NOTIFY epl_changes with the run_id and counts.
+CREATE TABLE IF NOT EXISTS pipeline_change_log (
+    change_id BIGSERIAL PRIMARY KEY,
+    run_id VARCHAR(64) NOT NULL,
+    entity_type VARCHAR(20) NOT NULL, -- 'fixture', 'player', 'team', 'standings'
+    entity_key VARCHAR(50) NOT NULL,
+    changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX idx_change_log_run ON pipeline_change_log(run_id);
+CREATE INDEX idx_change_log_type ON pipeline_change_log(entity_type, change_id);
+
+
+-- ============================================================================
+-- PIPELINE: Run history and per-stage metrics
+-- ============================================================================
+-- One row per processing pipeline run. stage_metrics holds, per stage:
+-- wall_seconds, cpu_seconds, rows_read, raw_bytes, rows_parsed, rows_written,
+-- rows_unchanged and peak_rss_mb (plus worker_peak_rss_mb for sharded parses).
+CREATE TABLE IF NOT EXISTS pipeline_runs (
+    run_id VARCHAR(64) PRIMARY KEY,
+    started_at TIMESTAMP NOT NULL,
+    finished_at TIMESTAMP NOT NULL,
+    success BOOLEAN NOT NULL,
+    wall_seconds NUMERIC(10,3),
+    cpu_seconds NUMERIC(10,3),
+    rows_read INTEGER,
+    raw_bytes BIGINT,
+    rows_parsed INTEGER,
+    rows_written INTEGER,
+    peak_rss_mb NUMERIC(10,1),
+    workers INTEGER,
+    stage_metrics JSONB,
+    row_changes JSONB,
+    errors JSONB
+);
+
+CREATE INDEX idx_pipeline_runs_started ON pipeline_runs(started_at DESC);
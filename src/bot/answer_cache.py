@@ -0,0 +1,188 @@
+import sys
+import time
+import threading
+import functools
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.bot.metrics import ANSWERS, timed_query
+from src.utils.configs import config
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__, 'bot.log')
+
+# statement_timeout per bot intent (ms); BOT_STATEMENT_TIMEOUTS overrides
+# entries ('standings=300,player_card=800'), BOT_STATEMENT_TIMEOUT_MS covers
+# intents not listed
+INTENT_TIMEOUT_MS = {
+    'player_search': 1000,
+    'player_card': 1000,
+    'player_stats': 500,
+    'season_stats': 500,
+    'team_results': 500,
+    'head_to_head': 500,
+    'standings': 500,
+}
+
+_local = threading.local()
+
+
+class AnswerUnavailable(Exception):
+    """The database didn't answer in time and there is no earlier answer to serve."""
+
+    def __init__(self, intent: str):
+        super().__init__(f"No answer for {intent}: database unavailable and nothing cached")
+        self.intent = intent
+
+
+def intent_timeouts() -> Dict[str, int]:
+    timeouts = dict(INTENT_TIMEOUT_MS)
+    for item in (config.BOT_STATEMENT_TIMEOUTS or '').split(','):
+        if '=' in item:
+            intent, ms = item.split('=', 1)
+            timeouts[intent.strip()] = int(ms)
+    return timeouts
+
+
+def current_timeout_ms() -> Optional[int]:
+    """statement_timeout of the intent running on this thread (None outside serve())."""
+    return getattr(_local, 'timeout_ms', None)
+
+
+class AnswerCache:
+    """
+    Bounded-latency serving for the bot's queries.
+
+    serve() runs a query function on a small thread pool with its intent's
+    statement_timeout and waits at most that long (plus BOT_TIMEOUT_GRACE_MS).
+    Every answer is kept per query key (LRU, BOT_ANSWER_CACHE_SIZE entries).
+    When the database errors or doesn't answer in time, the last good answer
+    is served instead and the key is refreshed in the background: a query
+    that overran keeps running and stores its result when it finishes, a
+    failed one is retried once. Stale serves are recorded per calling thread
+    so the handler can say so (take_stale_age()).
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, max_age: Optional[float] = None,
+                 threads: Optional[int] = None):
+        self.max_entries = max_entries or config.BOT_ANSWER_CACHE_SIZE
+        self.max_age = config.BOT_STALE_MAX_AGE if max_age is None else max_age
+        self.timeouts = intent_timeouts()
+        self._answers: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=threads or config.BOT_QUERY_THREADS,
+                                            thread_name_prefix='bot-query')
+
+    # -- Cache ----------------------------------------------------------------
+
+    def get(self, key: Hashable) -> Optional[Tuple[Any, float]]:
+        """(answer, age in seconds) if an answer younger than max_age is kept."""
+        with self._lock:
+            entry = self._answers.get(key)
+            if entry is None:
+                return None
+            value, stored_at = entry
+            age = time.time() - stored_at
+            if age > self.max_age:
+                del self._answers[key]
+                return None
+            self._answers.move_to_end(key)
+            return value, age
+
+    def put(self, key: Hashable, value: Any):
+        with self._lock:
+            self._answers[key] = (value, time.time())
+            self._answers.move_to_end(key)
+            while len(self._answers) > self.max_entries:
+                self._answers.popitem(last=False)
+
+    # -- Serving --------------------------------------------------------------
+
+    def _run(self, key: Hashable, fn: Callable[[], Any], timeout_ms: int) -> Any:
+        _local.timeout_ms = timeout_ms
+        try:
+            value = fn()
+        finally:
+            _local.timeout_ms = None
+        self.put(key, value)
+        return value
+
+    def _refresh(self, key: Hashable, fn: Callable[[], Any], timeout_ms: int):
+        """Retry a failed key once in the background (one refresh per key at a time)."""
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                self._run(key, fn, timeout_ms)
+                logger.info(f"Background refresh of {key[0]} succeeded")
+            except Exception as e:
+                logger.warning(f"Background refresh of {key[0]} failed: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        self._executor.submit(refresh)
+
+    def serve(self, intent: str, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """fn()'s answer within the intent's time budget, or the last good answer for key."""
+        timeout_ms = self.timeouts.get(intent, config.BOT_STATEMENT_TIMEOUT_MS)
+        future = self._executor.submit(self._run, key, fn, timeout_ms)
+        try:
+            value = future.result(timeout=(timeout_ms + config.BOT_TIMEOUT_GRACE_MS) / 1000)
+            ANSWERS.labels(intent, 'db').inc()
+            return value
+        except FutureTimeout as e:
+            # Still running: it stores its answer if it finishes
+            error = e
+            reason = f"no answer within {timeout_ms} ms"
+        except Exception as e:
+            error = e
+            reason = (str(e).strip() or type(e).__name__).splitlines()[0]
+            self._refresh(key, fn, timeout_ms)
+
+        cached = self.get(key)
+        if cached is None:
+            logger.error(f"{intent}: {reason}; no earlier answer to serve")
+            ANSWERS.labels(intent, 'unavailable').inc()
+            raise AnswerUnavailable(intent) from error
+        value, age = cached
+        _local.stale_age = max(getattr(_local, 'stale_age', 0.0) or 0.0, age)
+        logger.warning(f"{intent}: {reason}; serving the answer from {age:.0f}s ago")
+        ANSWERS.labels(intent, 'stale').inc()
+        return value
+
+    @staticmethod
+    def stale_age() -> Optional[float]:
+        """Like take_stale_age(), without resetting it."""
+        return getattr(_local, 'stale_age', None)
+
+    @staticmethod
+    def take_stale_age() -> Optional[float]:
+        """Age (s) of the oldest stale answer served on this thread since the last call."""
+        age = getattr(_local, 'stale_age', None)
+        _local.stale_age = None
+        return age
+
+
+def cached_answer(intent: str):
+    """
+    Serve a QueryEngine method through its `answers` AnswerCache, keyed on
+    the intent and call arguments, and time it (epl_bot_query_seconds).
+    """
+    def decorator(method):
+        @timed_query
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            key = (intent, args, tuple(sorted(kwargs.items())))
+            return self.answers.serve(intent, key, lambda: method(self, *args, **kwargs))
+        return wrapper
+    return decorator
@@ -1,29 +1,145 @@
+import re
 import sys
+import time
+import asyncio
+from contextlib import asynccontextmanager
 from pathlib import Path
 from fastapi import FastAPI, Form, Request, Response
+from fastapi.responses import JSONResponse
 from typing import Optional
 
 project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
-from src.bot.query_engine import QueryEngine
+from src.bot.answer_cache import AnswerUnavailable
+from src.bot import metrics
+from src.bot.formatter import (format_head_to_head, format_standings, format_team_results,
+                               format_stale_note, format_unavailable)
+from src.bot.query_engine import create_query_engine
+from src.bot.render_cache import RenderCache
 from src.bot.whatsapp_service import WhatsAppService
+from src.utils.configs import config
 from src.utils.logger import setup_logger
 
 logger = setup_logger(__name__, 'bot.log')
 
-app = FastAPI(title="EPL Stats WhatsApp Bot")
+# Routing, compiled once at import
+GREETINGS = frozenset(['hi', 'hello', 'start', 'help'])
+SEASON_PATTERN = re.compile(r'\b(20\d{2})\b')
 
-# Initialize services
-query_engine = QueryEngine()
-whatsapp = WhatsAppService()
+EMPTY_TWIML = '<?xml version="1.0" encoding="UTF-8"?><Response></Response>'
 
+
+def build_standings(query_engine, season: Optional[int]) -> str:
+    standings = query_engine.get_latest_standings(season)
+    if not standings:
+        return f"📉 No standings data available for season {season or 'latest'}."
+    return format_standings(standings[:15]) # Top 15
+
+
+def build_team_results(query_engine, text: str) -> str:
+    results = query_engine.get_team_latest_results(text)
+    if results:
+        return format_team_results(text.capitalize(), results)
+    return (
+        "Sorry, I couldn't find any players or teams matching your search. 😕\n\n"
+        "Try a different name or type *'help'* for instructions."
+    )
+
+
+def warm_up(state) -> dict:
+    """
+    Everything the first request would otherwise pay for: the Twilio
+    client's API modules, the DB pool and prepared statements, team names,
+    data versions, and the standings message. Returns milliseconds per step.
+    """
+    started = time.perf_counter()
+    state.whatsapp.warm_up()
+    steps = {'twilio_client': round((time.perf_counter() - started) * 1000, 1)}
+    steps.update(state.query_engine.warm_up())
+    started = time.perf_counter()
+    state.renders.render('standings', None, lambda: build_standings(state.query_engine, None))
+    steps['standings_message'] = round((time.perf_counter() - started) * 1000, 1)
+    return steps
+
+
+async def keep_warming(state):
+    """Retry a failed warm-up until it succeeds; /ready stays 503 until then."""
+    while not state.ready:
+        await asyncio.sleep(config.BOT_WARMUP_RETRY_SECONDS)
+        try:
+            state.warmup = await asyncio.to_thread(warm_up, state)
+            state.ready = True
+            metrics.READY.set(1)
+            logger.info(f"Bot warm-up succeeded on retry: {state.warmup}")
+        except Exception as e:
+            logger.warning(f"Bot warm-up failed again: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Build the services and warm them before the server accepts requests."""
+    started = time.perf_counter()
+    state = app.state
+    state.ready = False
+    state.warmup = {}
+    metrics.READY.set(0)
+    state.query_engine = create_query_engine()
+    state.renders = RenderCache(state.query_engine)
+    state.whatsapp = WhatsAppService()
+    retry = None
+    try:
+        state.warmup = await asyncio.to_thread(warm_up, state)
+        state.ready = True
+        metrics.READY.set(1)
+    except Exception as e:
+        logger.error(f"Bot warm-up failed, serving cold and retrying: {e}")
+        retry = asyncio.create_task(keep_warming(state))
+    state.startup_seconds = round(time.perf_counter() - started, 3)
+    metrics.STARTUP_SECONDS.set(state.startup_seconds)
+    logger.info(f"Bot started in {state.startup_seconds}s (ready={state.ready}): {state.warmup}")
+
+    yield
+
+    if retry is not None:
+        retry.cancel()
+    if hasattr(state.query_engine.db, 'close_pools'):
+        state.query_engine.db.close_pools()
+
+
+app = FastAPI(title="EPL Stats WhatsApp Bot", lifespan=lifespan)
+
+
+@app.get("/ready")
+async def ready(request: Request):
+    """Readiness: 200 once the warm-up has completed, 503 before."""
+    state = request.app.state
+    body = {
+        'ready': getattr(state, 'ready', False),
+        'startup_seconds': getattr(state, 'startup_seconds', None),
+        'warmup_ms': getattr(state, 'warmup', {}),
+    }
+    return JSONResponse(body, status_code=200 if body['ready'] else 503)
+
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus scrape endpoint (see src/bot/metrics.py for the series)."""
+    body, content_type = metrics.exposition()
+    return Response(content=body, media_type=content_type)
+
+
+# A plain def: the DB queries, the answer-cache wait and the Twilio send all
+# block, so FastAPI runs each request on its threadpool instead of the event loop
 @app.post("/webhook")
-async def handle_whatsapp_webhook(
+def handle_whatsapp_webhook(
+    request: Request,
     From: str = Form(...),
     Body: str = Form(...)
 ):
     """Webhook to handle incoming messages from Twilio."""
+    state = request.app.state
+    query_engine, renders, whatsapp = state.query_engine, state.renders, state.whatsapp
     user_message = Body.strip().lower()
     sender = From
     
@@ -31,9 +147,13 @@ async def handle_whatsapp_webhook(
     
     response_msg = ""
     media_url = None
+    intent, outcome = 'unknown', 'ok'
+    started = time.perf_counter()
+    query_engine.answers.take_stale_age()  # discard anything left on this thread
 
     try:
-        if user_message in ['hi', 'hello', 'start', 'help']:
+        if user_message in GREETINGS:
+            intent = 'help'
             response_msg = (
                 "👋 *Welcome to the EPL Stats Bot!*\n\n"
                 "I can help you with player and team statistics.\n\n"
@@ -44,6 +164,7 @@ async def handle_whatsapp_webhook(
             )
         
         elif user_message.startswith('match') or ' vs ' in user_message:
+            intent = 'vs'
             # Handle "match Arsenal vs Chelsea" or just "Arsenal vs Chelsea"
             query_str = user_message
             if user_message.startswith('match '):
@@ -53,40 +174,34 @@ async def handle_whatsapp_webhook(
                 parts = query_str.split(' vs ')
                 if len(parts) >= 2:
                     t1, t2 = parts[0].strip(), parts[1].strip()
-                    matches = query_engine.search_fixture(t1, t2)
-                    from src.bot.formatter import format_head_to_head
-                    response_msg = format_head_to_head(t1, t2, matches)
+                    response_msg = renders.render('head_to_head', (t1, t2),
+                                                  lambda: format_head_to_head(t1, t2, query_engine.search_fixture(t1, t2)))
                 else:
                     response_msg = "⚠️ Please specify two teams separated by 'vs'. Example: *Arsenal vs Chelsea*"
             else:
                 response_msg = "⚠️ To compare teams, use 'vs'. Example: *Arsenal vs Chelsea*"
 
         elif 'table' in user_message or 'standings' in user_message:
+            intent = 'table'
             # Extract potential year
             season = None
-            import re
-            match = re.search(r'\b(20\d{2})\b', user_message)
+            match = SEASON_PATTERN.search(user_message)
             if match:
                 season = int(match.group(1))
-                
-            standings = query_engine.get_latest_standings(season)
-            from src.bot.formatter import format_standings
-            
-            if not standings:
-                 response_msg = f"📉 No standings data available for season {season or 'latest'}."
-            else:
-                response_msg = format_standings(standings[:15]) # Top 15
+
+            response_msg = renders.render('standings', season, lambda: build_standings(query_engine, season))
 
         else:
-            # 1. Try searching for a player
-            players = query_engine.search_player(user_message)
+            # 1. Try searching for a player (profile and latest stats in one query)
+            intent = 'player'
+            card = query_engine.get_player_card(user_message)
+            players = card['players']
             
             if players:
                 if len(players) == 1:
                     # Exactly one player found
                     player = players[0]
-                    # Fetch latest stats as a separate add-on
-                    stats = query_engine.get_player_latest_stats(player['id'])
+                    stats = card['stats']
                     
                     response_msg = whatsapp.format_player_stats(player, stats)
                     media_url = player['photo']
@@ -99,26 +214,41 @@ async def handle_whatsapp_webhook(
             
             else:
                 # 2. Try searching for a team
-                results = query_engine.get_team_latest_results(user_message)
-                if results:
-                    response_msg = whatsapp.format_team_results(user_message.capitalize(), results)
-                else:
-                    response_msg = (
-                        "Sorry, I couldn't find any players or teams matching your search. 😕\n\n"
-                        "Try a different name or type *'help'* for instructions."
-                    )
+                intent = 'team'
+                response_msg = renders.render('team_results', user_message,
+                                              lambda: build_team_results(query_engine, user_message))
+
+        stale_age = query_engine.answers.take_stale_age()
+        if stale_age is not None:
+            response_msg += format_stale_note(stale_age)
+            outcome = 'stale'
 
         # Send response via WhatsApp
         whatsapp.send_message(sender, response_msg, media_url)
         
         # Twilio expects an empty TwiML response if we send the message via the API
-        return Response(content='<?xml version="1.0" encoding="UTF-8"?><Response></Response>', media_type="application/xml")
+        return Response(content=EMPTY_TWIML, media_type="application/xml")
+
+    except AnswerUnavailable as e:
+        logger.error(f"Error in webhook handler: {e}")
+        outcome = 'unavailable'
+        whatsapp.send_message(sender, format_unavailable())
+        return Response(content=EMPTY_TWIML, media_type="application/xml")
 
     except Exception as e:
         logger.error(f"Error in webhook handler: {e}")
-        return Response(content='<?xml version="1.0" encoding="UTF-8"?><Response></Response>', media_type="application/xml")
+        outcome = 'error'
+        return Response(content=EMPTY_TWIML, media_type="application/xml")
+
+    finally:
+        metrics.REQUESTS.labels(intent, outcome).inc()
+        metrics.REQUEST_SECONDS.labels(intent).observe(time.perf_counter() - started)
 
 if __name__ == "__main__":
     import uvicorn
-    # reload=True ensures the server restarts automatically when code changes
-    uvicorn.run("src.bot.app:app", host="0.0.0.0", port=5000, reload=True)
+    # The app object itself: a "module:app" string would import this file a
+    # second time. Auto-reload is for development only (BOT_RELOAD=true).
+    if config.BOT_RELOAD:
+        uvicorn.run("src.bot.app:app", host="0.0.0.0", port=config.BOT_PORT, reload=True)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=config.BOT_PORT)
@@ -12,12 +12,8 @@ def get_form_visualizer(form_str: str) -> str:
         'L': '🔴'
     }
     
-    visual = ""
     # Process up to last 5 matches
-    for char in form_str[-5:]:
-        visual += mapping.get(char.upper(), '⚪')
-    
-    return visual
+    return ''.join(mapping.get(char.upper(), '⚪') for char in form_str[-5:])
 
 def get_rating_bar(rating: float) -> str:
     """Create a visual bar for ratings (0-10)."""
@@ -64,41 +60,78 @@ def format_player_stats(player: dict, stats: dict = None) -> str:
     else:
         return bio + f"\n\n⚠️ _No recent match stats found._"
 
+# Message templates, filled with %-formatting (as fast as building the same
+# text inline); repeated lines are joined once instead of concatenated per row
+DIVIDER = "━━━━━━━━━━━━━━━━━━"
+
+TEAM_RESULTS_TEMPLATE = (
+    "📊 *LATEST RESULTS: %s*\n"
+    f"{DIVIDER}\n"
+    "📈 *Recent Form:* %s\n\n"
+    "%s"
+)
+TEAM_RESULT_LINE = "📅 %(date)s\n⚔️ %(home_team)s *%(home_goals)s - %(away_goals)s* %(away_team)s\n\n"
+
+H2H_TEMPLATE = (
+    "🆚 *H2H: %s vs %s*\n"
+    f"{DIVIDER}\n"
+    "📊 *Summary (Last %d):*\n"
+    "✅ %s: %dW  |  🤝 Draws: %d  |  ✅ %s: %dW\n\n"
+    "🏁 *LATEST:* %s\n"
+    "🏟️ %s\n"
+    "👉 %s *%s-%s* %s\n\n"
+    "%s"
+)
+H2H_PAST_HEADER = "📜 *PAST ENCOUNTERS:*\n"
+H2H_PAST_LINE = "• %(date)s: %(home_team)s %(home_goals)s-%(away_goals)s %(away_team)s\n"
+
+STANDINGS_TEMPLATE = (
+    "🏆 *PREMIER LEAGUE TABLE*\n"
+    f"{DIVIDER}\n"
+    "`#   TEAM        P   GD   PTS`\n"
+    "%s"
+    f"{DIVIDER}\n"
+    "_⭐ UCL | 🔷 UEL | 🔻 Drop_"
+)
+# marker, rank, team, played, goal difference, points at fixed widths inside a monospaced block
+STANDINGS_ROW = "%s `%-2s %-11s %-2s %3s %3s`\n"
+
+
+def _standings_marker(rank: int) -> str:
+    if rank <= 4:
+        return "⭐"  # UCL
+    if rank <= 6:
+        return "🔷"  # UEL
+    if rank >= 18:
+        return "🔻"  # Relegation
+    return " "
+
+
+def _result_char(goals_for: int, goals_against: int) -> str:
+    if goals_for > goals_against:
+        return 'W'
+    if goals_for < goals_against:
+        return 'L'
+    return 'D'
+
+
 def format_team_results(team_name: str, results: list) -> str:
     """Format team results with form visualizers."""
     if not results:
         return f"🤷 No recent results found for *{team_name}*."
 
-    header = f"📊 *LATEST RESULTS: {team_name.upper()}*"
-    divider = "━━━━━━━━━━━━━━━━━━"
-    
     # Calculate mini-form from results
-    form_chars = ""
-    for r in results:
-        if r['home_team'].lower() in team_name.lower():
-            if r['home_goals'] > r['away_goals']: form_chars += 'W'
-            elif r['home_goals'] < r['away_goals']: form_chars += 'L'
-            else: form_chars += 'D'
-        else:
-            if r['away_goals'] > r['home_goals']: form_chars += 'W'
-            elif r['away_goals'] < r['home_goals']: form_chars += 'L'
-            else: form_chars += 'D'
-            
-    form_visual = get_form_visualizer(form_chars[::-1]) # results are desc, so reverse for chronological
-    
-    msg = f"{header}\n{divider}\n"
-    msg += f"📈 *Recent Form:* {form_visual}\n\n"
-    
-    for r in results:
-        date_short = r['date']
-        home = r['home_team']
-        away = r['away_team']
-        score = f"*{r['home_goals']} - {r['away_goals']}*"
-        
-        msg += f"📅 {date_short}\n"
-        msg += f"⚔️ {home} {score} {away}\n\n"
-        
-    return msg
+    form_chars = ''.join([
+        _result_char(r['home_goals'], r['away_goals']) if r['home_team'].lower() in team_name.lower()
+        else _result_char(r['away_goals'], r['home_goals'])
+        for r in results
+    ])
+
+    return TEAM_RESULTS_TEMPLATE % (
+        team_name.upper(),
+        get_form_visualizer(form_chars[::-1]),  # results are desc, so reverse for chronological
+        ''.join([TEAM_RESULT_LINE % r for r in results]),
+    )
 
 def format_head_to_head(team1: str, team2: str, matches: list) -> str:
     """Format head-to-head match results with analytic summary."""
@@ -120,54 +153,42 @@ def format_head_to_head(team1: str, team2: str, matches: list) -> str:
         else:
             draws += 1
 
-    header = f"🆚 *H2H: {team1.upper()} vs {team2.upper()}*"
-    divider = "━━━━━━━━━━━━━━━━━━"
-    
-    msg = (
-        f"{header}\n"
-        f"{divider}\n"
-        f"📊 *Summary (Last {len(matches)}):*\n"
-        f"✅ {team1}: {t1_wins}W  |  🤝 Draws: {draws}  |  ✅ {team2}: {t2_wins}W\n\n"
-    )
-    
-    latest = matches[0]
-    msg += f"🏁 *LATEST:* {latest['date']}\n"
-    msg += f"🏟️ {latest['venue']}\n"
-    msg += f"👉 {latest['home_team']} *{latest['home_goals']}-{latest['away_goals']}* {latest['away_team']}\n\n"
-    
+    past = ''
     if len(matches) > 1:
-        msg += "📜 *PAST ENCOUNTERS:*\n"
-        for m in matches[1:]:
-            msg += f"• {m['date']}: {m['home_team']} {m['home_goals']}-{m['away_goals']} {m['away_team']}\n"
+        past = H2H_PAST_HEADER + ''.join([H2H_PAST_LINE % m for m in matches[1:]])
 
-    return msg
+    latest = matches[0]
+    return H2H_TEMPLATE % (
+        team1.upper(), team2.upper(), len(matches),
+        team1, t1_wins, draws, team2, t2_wins,
+        latest['date'], latest['venue'],
+        latest['home_team'], latest['home_goals'], latest['away_goals'], latest['away_team'],
+        past,
+    )
 
 def format_standings(standings: list) -> str:
     """Format league standings with qualification markers."""
     if not standings:
         return "📉 No standings data available."
 
-    header = "🏆 *PREMIER LEAGUE TABLE*"
-    divider = "━━━━━━━━━━━━━━━━━━"
-    
-    msg = (
-        f"{header}\n"
-        f"{divider}\n"
-        f"`#   TEAM        P   GD   PTS`\n"
-    )
-    
-    for row in standings:
-        # Markers
-        prefix = " "
-        if row['rank'] <= 4: prefix = "⭐" # UCL
-        elif row['rank'] <= 6: prefix = "🔷" # UEL
-        elif row['rank'] >= 18: prefix = "🔻" # Relegation
-        
-        name = row['team'][:10]
-        # Using fixed widths in monospaced block
-        line = f"{str(row['rank']).ljust(2)} {name.ljust(11)} {str(row['played']).ljust(2)} {str(row['gd']).rjust(3)} {str(row['points']).rjust(3)}"
-        msg += f"{prefix} `{line}`\n"
-    
-    msg += f"{divider}\n"
-    msg += "_⭐ UCL | 🔷 UEL | 🔻 Drop_"
-    return msg
+    rows = ''.join([
+        STANDINGS_ROW % (_standings_marker(row['rank']), row['rank'], row['team'][:10],
+                         row['played'], row['gd'], row['points'])
+        for row in standings
+    ])
+    return STANDINGS_TEMPLATE % rows
+
+def format_stale_note(age_seconds: float) -> str:
+    """Footnote for answers served from cache while the database is unavailable."""
+    minutes = int(age_seconds // 60)
+    if minutes < 1:
+        when = "less than a minute ago"
+    elif minutes < 120:
+        when = f"{minutes} min ago"
+    else:
+        when = f"{minutes // 60} h ago"
+    return f"\n\n⏳ _Live data is temporarily unavailable; showing stats from {when}._"
+
+def format_unavailable() -> str:
+    """Reply when the database is unavailable and there is no earlier answer."""
+    return "⏳ Stats are temporarily unavailable. Please try again in a minute."
@@ -7,8 +7,10 @@ import time
 project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
-from src.bot.query_engine import QueryEngine
-from src.bot.formatter import format_player_stats, format_team_results
+from src.bot.answer_cache import AnswerUnavailable
+from src.bot.query_engine import create_query_engine
+from src.bot.render_cache import RenderCache
+from src.bot.formatter import format_player_stats, format_team_results, format_stale_note, format_unavailable
 from src.utils.logger import setup_logger
 
 logger = setup_logger(__name__, 'group_bot.log')
@@ -17,7 +19,8 @@ logger = setup_logger(__name__, 'group_bot.log')
 # This will open a Chrome window for the QR scan
 whatsapp = Whatsapp()
 
-query_engine = QueryEngine()
+query_engine = create_query_engine()
+renders = RenderCache(query_engine)
 
 @whatsapp.event
 def on_ready():
@@ -39,6 +42,7 @@ def on_message(chat, message):
     query = command_parts[1].strip() if len(command_parts) > 1 else ""
 
     response_msg = ""
+    query_engine.answers.take_stale_age()  # discard anything left on this thread
 
     try:
         if cmd == '!help':
@@ -56,7 +60,8 @@ def on_message(chat, message):
             if not query:
                 response_msg = "⚠️ Please provide a player name. Example: `!stats Salah`"
             else:
-                players = query_engine.search_player(query)
+                card = query_engine.get_player_card(query)
+                players = card['players']
                 if not players:
                     response_msg = f"🔍 Sorry, I couldn't find any player matching *'{query}'*."
                 elif len(players) > 1:
@@ -65,18 +70,19 @@ def on_message(chat, message):
                         response_msg += f"• {p['name']} ({p['position']})\n"
                 else:
                     player = players[0]
-                    stats = query_engine.get_player_latest_stats(player['id'])
-                    response_msg = format_player_stats(player, stats)
+                    response_msg = format_player_stats(player, card['stats'])
 
         elif cmd == '!results':
             if not query:
                 response_msg = "⚠️ Please provide a team name. Example: `!results Chelsea`"
             else:
-                results = query_engine.get_team_latest_results(query)
-                if not results:
-                    response_msg = f"🔍 No results found for *'{query}'*."
-                else:
-                    response_msg = format_team_results(query.capitalize(), results)
+                def build_team_results():
+                    results = query_engine.get_team_latest_results(query)
+                    if not results:
+                        return f"🔍 No results found for *'{query}'*."
+                    return format_team_results(query.capitalize(), results)
+
+                response_msg = renders.render('team_results', query, build_team_results)
 
         elif cmd == '!match':
             # Expected format: !match TeamA TeamB or !match TeamA vs TeamB
@@ -112,29 +118,42 @@ def on_message(chat, message):
                              t1, t2 = None, None
                     
                     if t1 and t2:
+                        t1, t2 = t1.strip(), t2.strip()
                         from src.bot.formatter import format_head_to_head # Import here to avoid circular if any
-                        response_msg = format_head_to_head(t1.strip(), t2.strip(), matches)
+                        response_msg = renders.render('head_to_head', (t1, t2),
+                                                      lambda: format_head_to_head(t1, t2, query_engine.search_fixture(t1, t2)))
 
         elif cmd == '!table':
             season = None
             if query and query.isdigit() and len(query) == 4:
                 season = int(query)
             
-            standings = query_engine.get_latest_standings(season)
             from src.bot.formatter import format_standings
-            
-            if not standings:
-                response_msg = f"📉 No standings data available for season {season or 'latest'}."
-            else:
-                response_msg = format_standings(standings[:15])
+
+            def build_standings():
+                standings = query_engine.get_latest_standings(season)
+                if not standings:
+                    return f"📉 No standings data available for season {season or 'latest'}."
+                message = format_standings(standings[:15])
                 if len(standings) > 15:
-                    response_msg += f"\n_...and {len(standings)-15} more teams._"
+                    message += f"\n_...and {len(standings)-15} more teams._"
+                return message
+
+            response_msg = renders.render('standings', season, build_standings)
+
+        stale_age = query_engine.answers.take_stale_age()
+        if response_msg and stale_age is not None:
+            response_msg += format_stale_note(stale_age)
 
         if response_msg:
             # Send the message back to the same chat (group or individual)
             chat.send(response_msg)
             logger.info(f"Response sent to {chat.name}")
 
+    except AnswerUnavailable as e:
+        logger.error(f"Error processing command {text}: {e}")
+        chat.send(format_unavailable())
+
     except Exception as e:
         logger.error(f"Error processing command {text}: {e}")
         chat.send("❌ Sorry, I encountered an error while fetching that data.")
@@ -142,6 +161,12 @@ def on_message(chat, message):
 if __name__ == "__main__":
     print("\n🚀 Starting WhatsApp Group Bot...")
     print("👉 A Chrome window will open. Please scan the QR code to log in.")
+
+    # Pay the cold costs (connections, team names, standings) before the first command
+    try:
+        query_engine.warm_up()
+    except Exception as e:
+        logger.error(f"Warm-up failed, starting cold: {e}")
     
     # Run the bot
     # This will block and keep the script running
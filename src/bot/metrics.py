@@ -0,0 +1,63 @@
+import sys
+import time
+import functools
+from pathlib import Path
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+# Bot service metrics, exposed by GET /metrics on src/bot/app.py in the
+# Prometheus text format. Names and labels are part of the alerting contract
+# (e.g. p99 of epl_bot_request_seconds): add new series rather than renaming.
+# One registry per process; with several uvicorn workers each must be
+# scraped on its own (or run prometheus_client in multiprocess mode).
+
+# Seconds; the bot's answers sit between ~1 ms (cached) and a few seconds (Twilio, timeouts)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# intent: help, vs, table, player, team, unknown (failed before routing)
+# outcome: ok, stale (served from the answer cache), unavailable, error
+REQUESTS = Counter('epl_bot_requests_total', 'Webhook requests handled',
+                   ['intent', 'outcome'])
+REQUEST_SECONDS = Histogram('epl_bot_request_seconds', 'Webhook handling time, including the Twilio send',
+                            ['intent'], buckets=LATENCY_BUCKETS)
+
+# method: QueryEngine method name
+QUERY_SECONDS = Histogram('epl_bot_query_seconds', 'QueryEngine method time (database or snapshot)',
+                          ['method'], buckets=LATENCY_BUCKETS)
+# source: db (fresh answer), stale (earlier answer served), unavailable (nothing to serve)
+ANSWERS = Counter('epl_bot_answers_total', 'QueryEngine answers by where they came from',
+                  ['intent', 'source'])
+
+# result: hit, miss, bypass (data version unreadable)
+RENDER_CACHE = Counter('epl_bot_render_cache_lookups_total', 'Rendered-message cache lookups',
+                       ['intent', 'result'])
+
+TWILIO_SEND_SECONDS = Histogram('epl_bot_twilio_send_seconds', 'WhatsAppService.send_message time',
+                                buckets=LATENCY_BUCKETS)
+# outcome: ok, error
+TWILIO_SENDS = Counter('epl_bot_twilio_sends_total', 'Messages sent through Twilio', ['outcome'])
+
+READY = Gauge('epl_bot_ready', '1 once the startup warm-up has completed')
+STARTUP_SECONDS = Gauge('epl_bot_startup_seconds', 'Lifespan startup time: building the services and warming them')
+
+
+def timed_query(method):
+    """Observe a QueryEngine method's duration in epl_bot_query_seconds."""
+    histogram = QUERY_SECONDS.labels(method.__name__)
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            histogram.observe(time.perf_counter() - started)
+    return wrapper
+
+
+def exposition():
+    """(body, content type) for the /metrics response."""
+    return generate_latest(), CONTENT_TYPE_LATEST
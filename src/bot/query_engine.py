@@ -1,21 +1,132 @@
 import sys
+import threading
+import time
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+
+import psycopg2
 
 project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
+from src.bot.answer_cache import AnswerCache, cached_answer, current_timeout_ms
+from src.bot.team_resolver import TeamResolver
+from src.storage.change_feed import ENTITY_TYPES
 from src.storage.postgres_handler import PostgresHandler
+from src.utils.configs import config
 from src.utils.logger import setup_logger
 
 logger = setup_logger(__name__, 'bot.log')
 
+# Latest change per entity type: each an index-only lookup on idx_change_log_type
+DATA_VERSION_SQL = """
+    SELECT t.entity_type, (
+        SELECT MAX(c.change_id) FROM pipeline_change_log c WHERE c.entity_type = t.entity_type
+    )
+    FROM unnest(%s::text[]) AS t(entity_type)
+"""
+
 class QueryEngine:
-    """Engine to query the database for bot responses."""
+    """
+    Engine to query the database for bot responses.
+
+    Public methods are served through an AnswerCache: each runs under its
+    intent's statement_timeout, and if the database errors or is too slow
+    the last good answer for the same arguments is returned instead.
+    Reads use the 'read' role, i.e. the replica when one is configured.
+    Connections are pooled and the hot queries run as named prepared
+    statements on them, so each session parses and plans them once.
+    """
     
     def __init__(self):
-        self.db = PostgresHandler()
+        self.db = PostgresHandler(connect_timeout=config.BOT_CONNECT_TIMEOUT, role='read',
+                                  pool_size=config.BOT_DB_POOL_SIZE)
+        self.teams = TeamResolver(self.db)
+        self.answers = AnswerCache()
+        self._versions = None
+        self._versions_at = None
+        self._versions_refreshing = False
+        self._versions_lock = threading.Lock()
+
+    def data_version(self, *entity_types: str) -> Optional[Tuple]:
+        """
+        Version of the data behind an answer: the latest pipeline_change_log
+        change_id of each entity type ('fixture', 'player', 'team',
+        'standings'), so it moves whenever the pipeline changes such rows.
+
+        This is on the request path ahead of the answer cache, so it never
+        touches the database: it returns the last versions read, and once
+        they are BOT_DATA_VERSION_CHECK_SECONDS old a background thread
+        (one at a time) reads them again. None before the first read or
+        after a failed one, i.e. render without the cache.
+        """
+        with self._versions_lock:
+            now = time.monotonic()
+            due = self._versions_at is None or now - self._versions_at >= config.BOT_DATA_VERSION_CHECK_SECONDS
+            if due and not self._versions_refreshing:
+                self._versions_refreshing = True
+                threading.Thread(target=self._refresh_in_background, name='bot-data-versions', daemon=True).start()
+            versions = self._versions
+        if versions is None:
+            return None
+        return tuple(versions.get(entity_type) for entity_type in entity_types)
+
+    def refresh_data_versions(self) -> Optional[Dict[str, int]]:
+        """Read the data versions now (blocking, under BOT_STATEMENT_TIMEOUT_MS)."""
+        try:
+            rows = self.db.execute_prepared('bot_data_versions', DATA_VERSION_SQL,
+                                            (sorted(set(ENTITY_TYPES.values())),),
+                                            timeout_ms=config.BOT_STATEMENT_TIMEOUT_MS)
+            versions = dict(rows)
+        except psycopg2.Error as e:
+            logger.warning(f"Could not read data versions: {str(e).strip().splitlines()[0]}")
+            versions = None
+        with self._versions_lock:
+            self._versions, self._versions_at = versions, time.monotonic()
+        return versions
+
+    def _refresh_in_background(self):
+        try:
+            self.refresh_data_versions()
+        finally:
+            with self._versions_lock:
+                self._versions_refreshing = False
+
+    def _open_connections(self) -> int:
+        return self.db.warm_pool()
+
+    def warm_up(self) -> Dict[str, float]:
+        """
+        Do the work a cold first request would: open the connection pool,
+        load the team names, and run the standings and player search queries
+        once (preparing them and keeping their answers). Returns milliseconds
+        per step; raises if the database can't be reached.
+        """
+        steps = {}
+
+        def step(name, fn):
+            started = time.perf_counter()
+            fn()
+            steps[name] = round((time.perf_counter() - started) * 1000, 1)
 
+        step('connections', self._open_connections)
+        step('team_names', self.teams.preload)
+        step('data_versions', self.refresh_data_versions)
+        step('standings', self.get_latest_standings)
+        step('player_search', lambda: self.get_player_card(''))
+        logger.info(f"Query engine warmed up: {steps}")
+        return steps
+
+    def _execute(self, query, params=None, prepared: Optional[str] = None):
+        """
+        execute_query under the statement_timeout of the intent being served;
+        with `prepared`, as the prepared statement of that name.
+        """
+        if prepared:
+            return self.db.execute_prepared(prepared, query, params, timeout_ms=current_timeout_ms())
+        return self.db.execute_query(query, params, timeout_ms=current_timeout_ms())
+
+    @cached_answer('player_search')
     def search_player(self, name_query: str) -> List[Dict[str, Any]]:
         """Search for a player by name, returning detailed profile info."""
         query = """
@@ -27,90 +138,204 @@ class QueryEngine:
             LIMIT 5
         """
         search_term = f"%{name_query}%"
-        results = self.db.execute_query(query, (search_term,))
+        results = self._execute(query, (search_term,), prepared='bot_search_player')
         
-        players = []
-        if results:
-            for row in results:
-                players.append({
-                    'id': row[0],
-                    'name': row[1],
-                    'nationality': row[2],
-                    'position': row[3],
-                    'photo': row[4],
-                    'age': row[5],
-                    'height': row[6],
-                    'weight': row[7],
-                    'number': row[8],
-                    'firstname': row[9],
-                    'lastname': row[10]
-                })
-        return players
+        return [self._player_from_row(row) for row in results or []]
 
+    @staticmethod
+    def _player_from_row(row) -> Dict[str, Any]:
+        return {
+            'id': row[0],
+            'name': row[1],
+            'nationality': row[2],
+            'position': row[3],
+            'photo': row[4],
+            'age': row[5],
+            'height': row[6],
+            'weight': row[7],
+            'number': row[8],
+            'firstname': row[9],
+            'lastname': row[10]
+        }
+
+    @staticmethod
+    def _stats_from_row(row) -> Dict[str, Any]:
+        return {
+            'date': row[0].strftime('%Y-%m-%d'),
+            'team': row[1],
+            'matchup': f"{row[2]} vs {row[3]}",
+            'minutes': row[4],
+            'rating': float(row[5]) if row[5] else 0.0,
+            'goals': row[6],
+            'assists': row[7],
+            'passes_acc': row[8],
+            'shots_on_target': row[9]
+        }
+
+    @cached_answer('player_stats')
     def get_player_latest_stats(self, player_id: int) -> Optional[Dict[str, Any]]:
         """Get the most recent match stats for a player."""
+        # Both rows are primary key lookups: the player's latest-appearance
+        # pointer (kept by PlayersProcessor) and its fixture's match_summary
         query = """
             SELECT 
-                m.match_date,
-                t.team_name as team,
-                match_teams.home_team_name,
-                match_teams.away_team_name,
-                s.minutes_played,
-                s.rating,
-                s.goals_total,
-                s.assists,
-                s.passes_accuracy,
-                s.shots_on_target
-            FROM fact_player_stats s
-            JOIN matches m ON s.fixture_id = m.fixture_id
-            JOIN dim_teams t ON s.team_id = t.team_id
-            JOIN (
-                SELECT m2.fixture_id, ht.team_name as home_team_name, at.team_name as away_team_name
-                FROM matches m2
-                JOIN dim_teams ht ON m2.home_team_id = ht.team_id
-                JOIN dim_teams at ON m2.away_team_id = at.team_id
-            ) match_teams ON s.fixture_id = match_teams.fixture_id
-            WHERE s.player_id = %s
-            ORDER BY m.match_date DESC
-            LIMIT 1
-        """
-        results = self.db.execute_query(query, (player_id,))
+                ms.match_date,
+                CASE WHEN p.team_id = ms.home_team_id THEN ms.home_team_name ELSE ms.away_team_name END as team,
+                ms.home_team_name,
+                ms.away_team_name,
+                p.minutes_played,
+                p.rating,
+                p.goals_total,
+                p.assists,
+                p.passes_accuracy,
+                p.shots_on_target
+            FROM player_latest_appearance p
+            JOIN match_summary ms ON p.fixture_id = ms.fixture_id
+            WHERE p.player_id = %s
+        """
+        results = self._execute(query, (player_id,), prepared='bot_player_latest_stats')
         
         if results:
-            row = results[0]
-            return {
-                'date': row[0].strftime('%Y-%m-%d'),
-                'team': row[1],
-                'matchup': f"{row[2]} vs {row[3]}",
-                'minutes': row[4],
-                'rating': float(row[5]) if row[5] else 0.0,
-                'goals': row[6],
-                'assists': row[7],
-                'passes_acc': row[8],
-                'shots_on_target': row[9]
-            }
+            return self._stats_from_row(results[0])
         return None
 
+    @cached_answer('player_card')
+    def get_player_card(self, name_query: str) -> Dict[str, Any]:
+        """
+        search_player and get_player_latest_stats in one statement: the (up to
+        5) matching players and, when exactly one matches, their latest stats.
+        Returns {'players': [...], 'stats': dict or None}.
+        """
+        # The LATERAL only runs for a unique match; its lookups are the same
+        # two primary key fetches as get_player_latest_stats
+        query = """
+            WITH candidates AS (
+                SELECT 
+                    player_id, player_name, nationality, position, photo_url,
+                    age, height, weight, number, firstname, lastname
+                FROM dim_players
+                WHERE player_name ILIKE %s
+                LIMIT 5
+            )
+            SELECT c.*, s.*
+            FROM candidates c
+            LEFT JOIN LATERAL (
+                SELECT 
+                    ms.match_date,
+                    CASE WHEN p.team_id = ms.home_team_id THEN ms.home_team_name ELSE ms.away_team_name END as team,
+                    ms.home_team_name,
+                    ms.away_team_name,
+                    p.minutes_played,
+                    p.rating,
+                    p.goals_total,
+                    p.assists,
+                    p.passes_accuracy,
+                    p.shots_on_target
+                FROM player_latest_appearance p
+                JOIN match_summary ms ON p.fixture_id = ms.fixture_id
+                WHERE p.player_id = c.player_id
+                AND (SELECT COUNT(*) FROM candidates) = 1
+            ) s ON TRUE
+        """
+        search_term = f"%{name_query}%"
+        results = self._execute(query, (search_term,), prepared='bot_player_card') or []
+
+        players = [self._player_from_row(row[:11]) for row in results]
+        stats = None
+        if len(results) == 1 and results[0][11] is not None:
+            stats = self._stats_from_row(results[0][11:])
+        return {'players': players, 'stats': stats}
+
+    @cached_answer('season_stats')
+    def get_player_season_stats(self, player_id: int, season: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Season totals for a player from fact_player_season, one entry per team
+        (a mid-season transfer gives two). Defaults to the player's latest season.
+        """
+        query = """
+            SELECT
+                ps.season,
+                t.team_name,
+                ps.appearances,
+                ps.minutes_played,
+                ps.goals,
+                ps.assists,
+                ps.yellow_cards,
+                ps.red_cards,
+                ps.avg_rating,
+                ps.goals_per90,
+                ps.assists_per90
+            FROM fact_player_season ps
+            JOIN dim_teams t ON ps.team_id = t.team_id
+            WHERE ps.player_id = %s
+            AND ps.league_id = 39
+            AND ps.season = COALESCE(%s, (
+                SELECT MAX(season) FROM fact_player_season WHERE player_id = %s AND league_id = 39
+            ))
+            ORDER BY ps.last_match_date DESC
+        """
+        results = self._execute(query, (player_id, season, player_id), prepared='bot_player_season')
+
+        seasons = []
+        if results:
+            for row in results:
+                seasons.append({
+                    'season': row[0],
+                    'team': row[1],
+                    'appearances': row[2],
+                    'minutes': row[3],
+                    'goals': row[4],
+                    'assists': row[5],
+                    'yellow_cards': row[6],
+                    'red_cards': row[7],
+                    'rating': float(row[8]) if row[8] else 0.0,
+                    'goals_per90': float(row[9]) if row[9] is not None else 0.0,
+                    'assists_per90': float(row[10]) if row[10] is not None else 0.0,
+                })
+        return seasons
+
+    @staticmethod
+    def _team_filter(param: str, team_ids: List[int], prepared: str):
+        """
+        (SQL condition, params, prepared statement name) for a team_id column.
+        One team, the usual case, is an equality, which a prepared
+        statement's generic plan still runs on the team indexes; ambiguous
+        text matching several teams uses ANY() as plain SQL, since a generic
+        plan for an array of unknown size scans the table.
+        """
+        if len(team_ids) == 1:
+            return f"= %({param})s", {param: team_ids[0]}, prepared
+        return f"= ANY(%({param})s)", {param: team_ids}, None
+
+    @cached_answer('team_results')
     def get_team_latest_results(self, team_name: str) -> List[Dict[str, Any]]:
         """Get the latest results for a specific team."""
-        query = """
-            SELECT 
-                m.match_date,
-                ht.team_name as home_team,
-                at.team_name as away_team,
-                m.home_goals,
-                m.away_goals,
-                m.status
-            FROM matches m
-            JOIN dim_teams ht ON m.home_team_id = ht.team_id
-            JOIN dim_teams at ON m.away_team_id = at.team_id
-            WHERE ht.team_name ILIKE %s OR at.team_name ILIKE %s
-            AND m.status = 'FT'
-            ORDER BY m.match_date DESC
+        team_ids = self.teams.resolve(team_name)
+        if not team_ids:
+            return []
+
+        # Each side walks its (team_id, match_date) index newest first and
+        # stops after 3 finished matches
+        team_filter, params, prepared = self._team_filter('teams', team_ids, 'bot_team_results')
+        query = f"""
+            SELECT match_date, home_team_name, away_team_name, home_goals, away_goals, status
+            FROM (
+                (SELECT match_date, home_team_name, away_team_name, home_goals, away_goals, status
+                 FROM match_summary
+                 WHERE home_team_id {team_filter} AND status = 'FT'
+                 ORDER BY match_date DESC
+                 LIMIT 3)
+                UNION ALL
+                (SELECT match_date, home_team_name, away_team_name, home_goals, away_goals, status
+                 FROM match_summary
+                 WHERE away_team_id {team_filter} AND status = 'FT'
+                 ORDER BY match_date DESC
+                 LIMIT 3)
+            ) latest
+            ORDER BY match_date DESC
             LIMIT 3
         """
-        search_term = f"%{team_name}%"
-        results = self.db.execute_query(query, (search_term, search_term))
+        results = self._execute(query, params, prepared=prepared)
         
         matches = []
         if results:
@@ -125,31 +350,38 @@ class QueryEngine:
                 })
         return matches
 
+    @cached_answer('head_to_head')
     def search_fixture(self, team1_name: str, team2_name: str) -> List[Dict[str, Any]]:
         """Search for head-to-head matches between two teams."""
-        query = """
-            SELECT 
-                m.match_date,
-                m.season,
-                ht.team_name as home_team,
-                at.team_name as away_team,
-                m.home_goals,
-                m.away_goals,
-                m.status,
-                v.venue_name
-            FROM matches m
-            JOIN dim_teams ht ON m.home_team_id = ht.team_id
-            JOIN dim_teams at ON m.away_team_id = at.team_id
-            LEFT JOIN dim_venues v ON m.venue_id = v.venue_id
-            WHERE (ht.team_name ILIKE %s AND at.team_name ILIKE %s)
-               OR (ht.team_name ILIKE %s AND at.team_name ILIKE %s)
-            ORDER BY m.match_date DESC
+        team1_ids = self.teams.resolve(team1_name)
+        team2_ids = self.teams.resolve(team2_name)
+        if not team1_ids or not team2_ids:
+            return []
+
+        # Both permutations (T1 at home, T2 at home), each on the home-side index
+        t1_filter, params, prepared = self._team_filter('t1', team1_ids, 'bot_head_to_head')
+        t2_filter, t2_params, t2_prepared = self._team_filter('t2', team2_ids, 'bot_head_to_head')
+        params.update(t2_params)
+        prepared = prepared if t2_prepared else None
+        query = f"""
+            SELECT match_date, season, home_team_name, away_team_name, home_goals, away_goals, status, venue_name
+            FROM (
+                (SELECT match_date, season, home_team_name, away_team_name, home_goals, away_goals, status, venue_name
+                 FROM match_summary
+                 WHERE home_team_id {t1_filter} AND away_team_id {t2_filter}
+                 ORDER BY match_date DESC
+                 LIMIT 5)
+                UNION ALL
+                (SELECT match_date, season, home_team_name, away_team_name, home_goals, away_goals, status, venue_name
+                 FROM match_summary
+                 WHERE home_team_id {t2_filter} AND away_team_id {t1_filter}
+                 ORDER BY match_date DESC
+                 LIMIT 5)
+            ) h2h
+            ORDER BY match_date DESC
             LIMIT 5
         """
-        t1 = f"%{team1_name}%"
-        t2 = f"%{team2_name}%"
-        # We need to check both permutations: T1 vs T2 AND T2 vs T1
-        results = self.db.execute_query(query, (t1, t2, t2, t1))
+        results = self._execute(query, params, prepared=prepared)
         
         matches = []
         if results:
@@ -166,12 +398,13 @@ class QueryEngine:
                 })
         return matches
 
+    @cached_answer('standings')
     def get_latest_standings(self, season: int = None) -> List[Dict[str, Any]]:
         """Get the latest league standings."""
         # If season not provided, find the max season in fact_standings
         if not season:
             season_query = "SELECT MAX(season) FROM fact_standings"
-            res = self.db.execute_query(season_query)
+            res = self._execute(season_query, prepared='bot_standings_season')
             if res and res[0][0]:
                 season = res[0][0]
             else:
@@ -193,7 +426,7 @@ class QueryEngine:
             WHERE fs.league_id = 39 AND fs.season = %s
             ORDER BY fs.rank ASC
         """
-        results = self.db.execute_query(query, (season,))
+        results = self._execute(query, (season,), prepared='bot_standings')
         
         table = []
         if results:
@@ -210,3 +443,11 @@ class QueryEngine:
                     'form': row[8]
                 })
         return table
+
+
+def create_query_engine() -> QueryEngine:
+    """The QueryEngine for BOT_BACKEND: Postgres, or the exported SQLite snapshot."""
+    if config.BOT_BACKEND == 'snapshot':
+        from src.bot.snapshot_engine import SnapshotQueryEngine
+        return SnapshotQueryEngine()
+    return QueryEngine()
@@ -0,0 +1,83 @@
+import sys
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Hashable, Optional
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.bot.answer_cache import AnswerCache
+from src.bot.metrics import RENDER_CACHE
+from src.utils.configs import config
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__, 'bot.log')
+
+# Change-log entity types an intent's message is built from (see QueryEngine.data_version)
+INTENT_ENTITY_TYPES = {
+    'standings': ('standings', 'team'),
+    'team_results': ('fixture', 'team'),
+    'head_to_head': ('fixture', 'team'),
+}
+
+
+class RenderCache:
+    """
+    Finished bot messages keyed by (intent, entity) and stamped with the
+    data version they were rendered from.
+
+    render() returns the kept message while the engine's data_version() for
+    the intent is unchanged, skipping both the queries and the formatting;
+    once the pipeline changes the underlying rows the version moves and the
+    message is rebuilt. Messages built from a stale answer, or while the
+    version can't be read, are returned but not kept.
+    """
+
+    def __init__(self, engine, max_entries: Optional[int] = None):
+        self.engine = engine
+        self.max_entries = max_entries or config.BOT_RENDER_CACHE_SIZE
+        self._messages: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, intent: str, entity: Hashable, build: Callable[[], str]) -> str:
+        """The message for (intent, entity), from build() unless rendered at the current version."""
+        version = self.engine.data_version(*INTENT_ENTITY_TYPES[intent])
+        key = (intent, entity)
+        if version is None:
+            RENDER_CACHE.labels(intent, 'bypass').inc()
+        else:
+            with self._lock:
+                entry = self._messages.get(key)
+                if entry is not None and entry[0] == version:
+                    self._messages.move_to_end(key)
+                    self.hits += 1
+                    RENDER_CACHE.labels(intent, 'hit').inc()
+                    return entry[1]
+                self.misses += 1
+            RENDER_CACHE.labels(intent, 'miss').inc()
+
+        message = build()
+        if version is not None and AnswerCache.stale_age() is None:
+            with self._lock:
+                self._messages[key] = (version, message)
+                self._messages.move_to_end(key)
+                while len(self._messages) > self.max_entries:
+                    self._messages.popitem(last=False)
+        return message
+
+    def clear(self):
+        with self._lock:
+            self._messages.clear()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._messages),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 3) if lookups else 0.0,
+            }
@@ -0,0 +1,221 @@
+import sys
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.bot.answer_cache import AnswerCache
+from src.bot.metrics import timed_query
+from src.bot.query_engine import QueryEngine
+from src.bot.team_resolver import TeamResolver
+from src.storage.snapshot import SnapshotStore
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__, 'bot.log')
+
+
+def _placeholders(values) -> str:
+    return ', '.join('?' * len(values))
+
+
+class SnapshotQueryEngine(QueryEngine):
+    """
+    QueryEngine served from the SQLite snapshot the pipeline exports after
+    each run (src/storage/snapshot.py) instead of Postgres. Same methods and
+    return shapes; reads are local, so they skip the AnswerCache timeouts.
+    A newly exported snapshot is picked up without a restart.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.db = SnapshotStore(path)
+        self.teams = TeamResolver(self.db)
+        self.answers = AnswerCache()
+        logger.info(f"Serving bot queries from snapshot {self.db.path}")
+
+    def _execute(self, query, params=None, prepared=None):
+        return self.db.execute_query(query, params)
+
+    def _open_connections(self) -> int:
+        self.db.meta()  # opens the current snapshot file
+        return 1
+
+    def refresh_data_versions(self):
+        # Nothing to read ahead: data_version() asks the open snapshot file
+        return None
+
+    def data_version(self, *entity_types: str) -> Optional[tuple]:
+        # Everything changes together when a new snapshot is swapped in
+        exported_at = self.db.meta().get('exported_at')
+        return tuple(exported_at for _ in entity_types)
+
+    @timed_query
+    def search_player(self, name_query: str) -> List[Dict[str, Any]]:
+        query = """
+            SELECT
+                player_id, player_name, nationality, position, photo_url,
+                age, height, weight, number, firstname, lastname
+            FROM dim_players
+            WHERE unicode_lower(player_name) LIKE ?
+            LIMIT 5
+        """
+        # Case-insensitive for all letters, like ILIKE in the Postgres engine
+        results = self._execute(query, (f"%{name_query.lower()}%",))
+        return [self._player_from_row(row) for row in results or []]
+
+    @timed_query
+    def get_player_latest_stats(self, player_id: int) -> Optional[Dict[str, Any]]:
+        query = """
+            SELECT
+                ms.match_date,
+                CASE WHEN p.team_id = ms.home_team_id THEN ms.home_team_name ELSE ms.away_team_name END,
+                ms.home_team_name,
+                ms.away_team_name,
+                p.minutes_played,
+                p.rating,
+                p.goals_total,
+                p.assists,
+                p.passes_accuracy,
+                p.shots_on_target
+            FROM player_latest_appearance p
+            JOIN match_summary ms ON p.fixture_id = ms.fixture_id
+            WHERE p.player_id = ?
+        """
+        results = self._execute(query, (player_id,))
+        if results:
+            return self._stats_from_row(results[0])
+        return None
+
+    @timed_query
+    def get_player_card(self, name_query: str) -> Dict[str, Any]:
+        # Two in-process lookups; nothing to save by combining them here
+        players = self.search_player(name_query)
+        stats = self.get_player_latest_stats(players[0]['id']) if len(players) == 1 else None
+        return {'players': players, 'stats': stats}
+
+    @timed_query
+    def get_player_season_stats(self, player_id: int, season: Optional[int] = None) -> List[Dict[str, Any]]:
+        query = """
+            SELECT
+                ps.season, t.team_name, ps.appearances, ps.minutes_played, ps.goals, ps.assists,
+                ps.yellow_cards, ps.red_cards, ps.avg_rating, ps.goals_per90, ps.assists_per90
+            FROM fact_player_season ps
+            JOIN dim_teams t ON ps.team_id = t.team_id
+            WHERE ps.player_id = ?
+            AND ps.league_id = 39
+            AND ps.season = COALESCE(?, (
+                SELECT MAX(season) FROM fact_player_season WHERE player_id = ? AND league_id = 39
+            ))
+            ORDER BY ps.last_match_date DESC
+        """
+        results = self._execute(query, (player_id, season, player_id))
+        return [{
+            'season': row[0],
+            'team': row[1],
+            'appearances': row[2],
+            'minutes': row[3],
+            'goals': row[4],
+            'assists': row[5],
+            'yellow_cards': row[6],
+            'red_cards': row[7],
+            'rating': float(row[8]) if row[8] else 0.0,
+            'goals_per90': float(row[9]) if row[9] is not None else 0.0,
+            'assists_per90': float(row[10]) if row[10] is not None else 0.0,
+        } for row in results or []]
+
+    @timed_query
+    def get_team_latest_results(self, team_name: str) -> List[Dict[str, Any]]:
+        team_ids = self.teams.resolve(team_name)
+        if not team_ids:
+            return []
+        ids = _placeholders(team_ids)
+        query = f"""
+            SELECT match_date, home_team_name, away_team_name, home_goals, away_goals, status FROM (
+                SELECT * FROM (
+                    SELECT match_date, home_team_name, away_team_name, home_goals, away_goals, status
+                    FROM match_summary
+                    WHERE home_team_id IN ({ids}) AND status = 'FT'
+                    ORDER BY match_date DESC LIMIT 3)
+                UNION ALL
+                SELECT * FROM (
+                    SELECT match_date, home_team_name, away_team_name, home_goals, away_goals, status
+                    FROM match_summary
+                    WHERE away_team_id IN ({ids}) AND status = 'FT'
+                    ORDER BY match_date DESC LIMIT 3)
+            )
+            ORDER BY match_date DESC
+            LIMIT 3
+        """
+        results = self._execute(query, tuple(team_ids) * 2)
+        return [{
+            'date': row[0].strftime('%Y-%m-%d'),
+            'home_team': row[1],
+            'away_team': row[2],
+            'home_goals': row[3],
+            'away_goals': row[4],
+            'status': row[5]
+        } for row in results or []]
+
+    @timed_query
+    def search_fixture(self, team1_name: str, team2_name: str) -> List[Dict[str, Any]]:
+        team1_ids = self.teams.resolve(team1_name)
+        team2_ids = self.teams.resolve(team2_name)
+        if not team1_ids or not team2_ids:
+            return []
+        t1, t2 = _placeholders(team1_ids), _placeholders(team2_ids)
+        columns = "match_date, season, home_team_name, away_team_name, home_goals, away_goals, status, venue_name"
+        query = f"""
+            SELECT {columns} FROM (
+                SELECT * FROM (
+                    SELECT {columns} FROM match_summary
+                    WHERE home_team_id IN ({t1}) AND away_team_id IN ({t2})
+                    ORDER BY match_date DESC LIMIT 5)
+                UNION ALL
+                SELECT * FROM (
+                    SELECT {columns} FROM match_summary
+                    WHERE home_team_id IN ({t2}) AND away_team_id IN ({t1})
+                    ORDER BY match_date DESC LIMIT 5)
+            )
+            ORDER BY match_date DESC
+            LIMIT 5
+        """
+        params = tuple(team1_ids) + tuple(team2_ids) + tuple(team2_ids) + tuple(team1_ids)
+        results = self._execute(query, params)
+        return [{
+            'date': row[0].strftime('%Y-%m-%d'),
+            'season': row[1],
+            'home_team': row[2],
+            'away_team': row[3],
+            'home_goals': row[4],
+            'away_goals': row[5],
+            'status': row[6],
+            'venue': row[7] or 'Unknown Venue'
+        } for row in results or []]
+
+    @timed_query
+    def get_latest_standings(self, season: int = None) -> List[Dict[str, Any]]:
+        if not season:
+            res = self._execute("SELECT MAX(season) FROM fact_standings")
+            if res and res[0][0]:
+                season = res[0][0]
+            else:
+                return []
+        query = """
+            SELECT fs.rank, t.team_name, fs.played, fs.win, fs.draw, fs.lose, fs.goals_diff, fs.points, fs.form
+            FROM fact_standings fs
+            JOIN dim_teams t ON fs.team_id = t.team_id
+            WHERE fs.league_id = 39 AND fs.season = ?
+            ORDER BY fs.rank ASC
+        """
+        results = self._execute(query, (season,))
+        return [{
+            'rank': row[0],
+            'team': row[1],
+            'played': row[2],
+            'win': row[3],
+            'draw': row[4],
+            'lose': row[5],
+            'gd': row[6],
+            'points': row[7],
+            'form': row[8]
+        } for row in results or []]
@@ -0,0 +1,135 @@
+import sys
+import re
+import time
+import difflib
+import threading
+from pathlib import Path
+from typing import List, Optional, Set
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.storage.postgres_handler import PostgresHandler
+from src.utils.configs import config
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__, 'bot.log')
+
+# Nicknames and common short forms -> team_name as stored from the API.
+# Aliases of teams that aren't in dim_teams are ignored.
+TEAM_ALIASES = {
+    'gunners': 'Arsenal',
+    'villa': 'Aston Villa',
+    'cherries': 'Bournemouth',
+    'bees': 'Brentford',
+    'seagulls': 'Brighton',
+    'blues': 'Chelsea',
+    'palace': 'Crystal Palace',
+    'eagles': 'Crystal Palace',
+    'toffees': 'Everton',
+    'cottagers': 'Fulham',
+    'tractor boys': 'Ipswich',
+    'foxes': 'Leicester',
+    'reds': 'Liverpool',
+    'man city': 'Manchester City',
+    'city': 'Manchester City',
+    'mcfc': 'Manchester City',
+    'man utd': 'Manchester United',
+    'man united': 'Manchester United',
+    'united': 'Manchester United',
+    'mufc': 'Manchester United',
+    'magpies': 'Newcastle',
+    'toon': 'Newcastle',
+    'forest': 'Nottingham Forest',
+    'nottm forest': 'Nottingham Forest',
+    'saints': 'Southampton',
+    'spurs': 'Tottenham',
+    'hammers': 'West Ham',
+    'irons': 'West Ham',
+    'wolverhampton': 'Wolves',
+}
+
+FUZZY_CUTOFF = 0.75
+
+
+def normalize(text: str) -> str:
+    """Lowercase, drop punctuation and a trailing 'fc'/'afc', collapse spaces."""
+    text = re.sub(r'[^\w\s]', ' ', (text or '').lower())
+    text = re.sub(r'\b(a?fc)\s*$', '', text.strip())
+    return ' '.join(text.split())
+
+
+class TeamResolver:
+    """
+    Maps user text ("spurs", "man utd", "ARS", "liverpol") to team_ids, so team
+    queries can filter matches by id on the (team_id, match_date) indexes
+    instead of matching names row by row.
+
+    Lookup order, stopping at the first tier that matches:
+    1. exact name, alias, team_code or short_name
+    2. names containing the text (the previous ILIKE '%text%' behaviour)
+    3. the closest name or alias by difflib similarity (typos)
+
+    Ambiguous text (e.g. a shared team_code) resolves to every team of the
+    tier. Teams are loaded from dim_teams once and reloaded after
+    TEAM_RESOLVER_TTL seconds.
+    """
+
+    def __init__(self, db_handler: Optional[PostgresHandler] = None, ttl: Optional[float] = None):
+        self.db_handler = db_handler or PostgresHandler()
+        self.ttl = config.TEAM_RESOLVER_TTL if ttl is None else ttl
+        self._lock = threading.Lock()
+        self._loaded_at = None
+        self._names = {}   # team_id -> normalized team_name
+        self._exact = {}   # normalized name/alias/code -> set of team_ids
+
+    def _load(self):
+        rows = self.db_handler.execute_query("SELECT team_id, team_name, short_name, team_code FROM dim_teams") or []
+        names, exact = {}, {}
+        by_name = {}
+        for team_id, team_name, short_name, team_code in rows:
+            name = normalize(team_name)
+            names[team_id] = name
+            by_name.setdefault(name, set()).add(team_id)
+            for key in (name, normalize(short_name), normalize(team_code)):
+                if key:
+                    exact.setdefault(key, set()).add(team_id)
+        for alias, team_name in TEAM_ALIASES.items():
+            team_ids = by_name.get(normalize(team_name))
+            if team_ids:
+                exact.setdefault(normalize(alias), set()).update(team_ids)
+        self._names, self._exact = names, exact
+        self._loaded_at = time.monotonic()
+        logger.info(f"Team resolver loaded {len(names)} teams, {len(exact)} exact keys")
+
+    def _ensure_loaded(self):
+        with self._lock:
+            if self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl:
+                self._load()
+
+    def preload(self):
+        """Load dim_teams now rather than on the first lookup."""
+        self._ensure_loaded()
+
+    def invalidate(self):
+        """Reload dim_teams on the next lookup."""
+        with self._lock:
+            self._loaded_at = None
+
+    def resolve(self, text: str) -> List[int]:
+        """team_ids matching `text`, sorted; empty if nothing is close."""
+        self._ensure_loaded()
+        key = normalize(text)
+        if not key:
+            return []
+
+        team_ids: Set[int] = set(self._exact.get(key, ()))
+        if not team_ids:
+            team_ids = {team_id for team_id, name in self._names.items() if key in name}
+        if not team_ids:
+            close = difflib.get_close_matches(key, list(self._exact), n=1, cutoff=FUZZY_CUTOFF)
+            if close:
+                team_ids = set(self._exact[close[0]])
+        if not team_ids:
+            logger.info(f"No team matches '{text}'")
+        return sorted(team_ids)
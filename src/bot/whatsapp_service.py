@@ -1,4 +1,5 @@
 import sys
+import time
 from pathlib import Path
 from twilio.rest import Client
 import os
@@ -6,6 +7,7 @@ import os
 project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
+from src.bot.metrics import TWILIO_SEND_SECONDS, TWILIO_SENDS
 from src.utils.configs import config
 from src.utils.logger import setup_logger
 from src.bot import formatter
@@ -17,10 +19,18 @@ class WhatsAppService:
     
     def __init__(self):
         self.client = Client(config.TWILIO_ACCOUNT_SID, config.TWILIO_AUTH_TOKEN)
+        if config.TWILIO_API_BASE_URL:
+            # Messages API only; see scripts/twilio_standin.py
+            self.client.api.base_url = config.TWILIO_API_BASE_URL.rstrip('/')
         self.from_number = config.TWILIO_WHATSAPP_NUMBER
 
+    def warm_up(self):
+        """Load the Twilio messages API now; the client imports it on first use (~50 ms)."""
+        self.client.messages
+
     def send_message(self, to_number: str, message: str, media_url: str = None):
         """Send a WhatsApp message."""
+        started = time.perf_counter()
         try:
             params = {
                 "body": message,
@@ -32,10 +42,14 @@ class WhatsAppService:
 
             msg = self.client.messages.create(**params)
             logger.info(f"Message sent to {to_number}: {msg.sid}")
+            TWILIO_SENDS.labels('ok').inc()
             return msg.sid
         except Exception as e:
             logger.error(f"Error sending WhatsApp message: {e}")
+            TWILIO_SENDS.labels('error').inc()
             return None
+        finally:
+            TWILIO_SEND_SECONDS.observe(time.perf_counter() - started)
 
     def format_player_stats(self, player: dict, stats: dict = None) -> str:
         return formatter.format_player_stats(player, stats)
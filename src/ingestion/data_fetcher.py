@@ -7,17 +7,25 @@ from src.utils.configs import config
 from src.utils.logger import setup_logger
 from src.ingestion.api_client import FootballAPIClient
 from src.storage.postgres_handler import PostgresHandler
+from src.storage.ingestion_ledger import IngestionLedger
+from src.utils.profiling import profile_method, new_run_id
 
 logger = setup_logger(__name__, "ingestion.log")
 
 class Datafetcher:
-    def __init__(self):
+    def __init__(self, profile=None, run_id=None):
         self.api_client = FootballAPIClient()
         self.db_handler = PostgresHandler()
+        self.ledger = IngestionLedger(self.db_handler)
+        # Profiling switch for the fetch methods (None follows EPL_PROFILE);
+        # artifacts of one fetcher share its run_id
+        self.profile = profile
+        self.run_id = run_id or new_run_id()
     # def get_stored_league(self):
     #     query = ''' SELECT * FROM raw_api_responses'''
     #     result = self.db_handler.execute_query(query)
     #     return result
+    @profile_method
     def fetch_and_store_league(self):
         logger.info('fetching epl league data')
 
@@ -39,6 +47,7 @@ class Datafetcher:
 # -- ============================================================================
 # -- FETCH AND STORE TEAMS STARTS
 # -- ============================================================================
+    @profile_method
     def fetch_and_store_teams(self):
         logger.info('Fetching EPL teams data...')
         teams = self.api_client.get_teams(league_id=39, season=2023)
@@ -57,6 +66,7 @@ class Datafetcher:
         )
         return True
         
+    @profile_method
     def fetch_and_store_teams_multi_season(self, seasons=None):
 
         if seasons is None:
@@ -101,6 +111,7 @@ class Datafetcher:
             logger.info(f"Multi-season fetch complete: {results}")
         return results
         
+    @profile_method
     def fetch_and_store_all_epl_teams_historical(self):
         logger.info('Fetching ALL historical EPL teams (2010-2024)...')
         # EPL seasons from 2010 to 2024
@@ -114,6 +125,7 @@ class Datafetcher:
 # -- ============================================================================
 # -- FETCH AND STORE FIXTURES
 # -- ============================================================================
+    @profile_method
     def fetch_and_store_fixtures(self, seasons, status=None):
 
         if seasons is None:
@@ -160,6 +172,7 @@ class Datafetcher:
             logger.info(f"Multi-season fixtures fetch complete: {results}")
         return results
     
+    @profile_method
     def fetch_and_store_all_epl_fixtures_historical(self):
         logger.info('Fetching ALL historical EPL fixtures (2010-2024)...')
         # EPL seasons from 2010 to 2024
@@ -174,28 +187,17 @@ class Datafetcher:
 # -- ============================================================================
 # -- FETCH AND STORE PLAYERS STARTS
 # -- ============================================================================    
+    @profile_method
     def fetch_and_store_player_stats(self, limit=30):
         """
         Fetch player stats for completed matches that haven't been fetched yet.
-        Checks raw_api_responses to see if we already have data for a fixture.
+        The ingestion ledger tracks which fixtures are done; fixtures that failed
+        LEDGER_MAX_ATTEMPTS times are abandoned instead of retried every run.
         """
         logger.info(f"Fetching player stats (limit={limit})...")
         
-        # 1. Find completed matches (FT, AET, PEN)
-        # 2. Exclude matches where we already have a raw response in raw_api_responses
-        query = """
-            SELECT m.fixture_id, m.match_date
-            FROM matches m
-            LEFT JOIN raw_api_responses r 
-                ON r.endpoint = '/fixtures/players' 
-                AND (r.request_params->>'fixture')::int = m.fixture_id
-            WHERE m.status IN ('FT', 'AET', 'PEN')
-            AND r.response_id IS NULL
-            ORDER BY m.match_date DESC
-            LIMIT %s
-        """
-        
-        results = self.db_handler.execute_query(query, (limit,))
+        endpoint = '/fixtures/players'
+        results = self.ledger.pending_fixtures(limit)
         
         if not results:
             logger.info("No new matches found needing player stats.")
@@ -205,7 +207,6 @@ class Datafetcher:
         logger.info(f"Found {len(fixture_ids)} matches needing stats. Fetching...")
         
         count = 0
-        import time
         
         for fixture_id in fixture_ids:
             try:
@@ -213,21 +214,29 @@ class Datafetcher:
                 
                 if stats:
                     self.db_handler.insert_raw_responses(
-                        '/fixtures/players',
+                        endpoint,
                         {'fixture': fixture_id},
-                        stats
+                        stats,
+                        ledger_entity_id=fixture_id
                     )
                     count += 1
+                else:
+                    self.ledger.record_failure(endpoint, fixture_id, 'API returned no data')
                 
                 time.sleep(7.0) # Rate limiting for 10req/min tier
                 
             except Exception as e:
                 logger.error(f"Error fetching stats for fixture {fixture_id}: {e}")
+                try:
+                    self.ledger.record_failure(endpoint, fixture_id, str(e))
+                except Exception as ledger_error:
+                    logger.error(f"Could not record failure for fixture {fixture_id}: {ledger_error}")
                 continue
                 
         logger.info(f"Successfully fetched stats for {count} matches.")
         return count
     
+    @profile_method
     def fetch_and_store_player_profiles(self, season=2024, max_pages=50):
         """
         Fetch player data from /players endpoint filtered by EPL league for a specific season.
@@ -271,6 +280,7 @@ class Datafetcher:
                 
         return total_fetched
 
+    @profile_method
     def fetch_and_store_player_profiles_multi_season(self, seasons=None):
         """
         Fetch player profiles for multiple EPL seasons.
@@ -291,6 +301,7 @@ class Datafetcher:
         logger.info(f"Multi-season player fetch complete: {results}")
         return results
 
+    @profile_method
     def fetch_and_store_missing_player_profiles(self, limit=80):
         """
         Identify players in dim_players that only have a name/skeleton data 
@@ -336,6 +347,7 @@ class Datafetcher:
         logger.info(f"Successfully fetched {count} skeleton profiles for repair.")
         return count
 
+    @profile_method
     def fetch_and_store_standings(self, season=2024):
         """Fetch and store league standings."""
         logger.info(f"Fetching standings for season {season}...")
@@ -353,6 +365,7 @@ class Datafetcher:
             logger.warning("No standings data found.")
             return False
 
+    @profile_method
     def fetch_and_store_standings_multi_season(self, seasons=None):
         if seasons is None:
             seasons = [2024]
@@ -369,6 +382,7 @@ class Datafetcher:
             
         return results
 
+    @profile_method
     def fetch_and_store_all_epl_standings_historical(self):
         logger.info("Fetching historical EPL standings (2021-2024)...")
         seasons = list(range(2021, 2025))
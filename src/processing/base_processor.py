@@ -1,71 +1,332 @@
 from pathlib import Path
 import sys
 import json
+import time
+import multiprocessing
 import pandas as pd
-from typing import List, Dict, Any, Optional
+from operator import attrgetter
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Optional, Callable, Tuple
 project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
+from src.processing.records import record_columns, record_values
 from src.storage.postgres_handler import PostgresHandler
+from src.storage.projections import read_expression
+from src.utils import instrumentation
+from src.utils.configs import config
 from src.utils.logger import setup_logger
 
 logger = setup_logger(__name__, 'processing.log')
-class BaseProcessor:
-    def __init__(self):
-        self.db_handler=PostgresHandler()
-    def get_raw_api_responses(self, endpoint):
-        query = """
-            SELECT 
+
+# Table -> [(entity set, key columns)] reported in the changed-entity feed
+CHANGE_FEED_KEYS = {
+    'matches': [('fixture_ids', ('fixture_id',))],
+    'fact_player_stats': [('fixture_ids', ('fixture_id',)), ('player_ids', ('player_id',))],
+    'dim_players': [('player_ids', ('player_id',))],
+    'dim_teams': [('team_ids', ('team_id',))],
+    'fact_standings': [('standings', ('league_id', 'season'))],
+}
+
+def raw_response_columns(endpoint: str, use_projection: bool = True) -> str:
+    """Select list for raw rows; response_data is the projection when one is current."""
+    payload = read_expression(endpoint) if use_projection else 'response_data'
+    return f"""
                 response_id,
                 endpoint,
                 request_params,
-                response_data,
-                fetched_at
+                {payload} AS response_data,
+                fetched_at,
+                pg_column_size({payload}) AS raw_bytes
+"""
+
+
+def _parse_shard(endpoint: str, low_id: int, high_id: int, parse_fn: Callable,
+                 use_projection: bool = True) -> Dict[str, Any]:
+    """
+    Worker entry point: fetch one response_id range and parse it.
+    Runs in a child process, so it opens its own database connection.
+    """
+    started = time.perf_counter()
+    cpu_started = time.process_time()
+    query = f"""
+        SELECT {raw_response_columns(endpoint, use_projection)}
+        FROM raw_api_responses
+        WHERE endpoint = %s
+        AND response_id BETWEEN %s AND %s
+        ORDER BY fetched_at DESC
+    """
+    raw_responses = PostgresHandler().execute_query(query, (endpoint, low_id, high_id)) or []
+    batches = parse_fn(raw_responses)
+    return {
+        'batches': batches,
+        'responses': len(raw_responses),
+        'raw_bytes': sum(raw[5] or 0 for raw in raw_responses),
+        'seconds': time.perf_counter() - started,
+        'cpu_seconds': time.process_time() - cpu_started,
+        'peak_rss_mb': instrumentation.peak_rss_mb(),
+    }
+
+
+class BaseProcessor:
+    def __init__(self, profile: Optional[bool] = None):
+        self.db_handler=PostgresHandler()
+        # Profiling switch for the process_* methods (None follows EPL_PROFILE)
+        self.profile = profile
+        # Set by the pipeline so profile artifacts are named after its run
+        self.run_id = None
+        # Parse projected payloads where a current projection is stored
+        self.read_projection = config.RAW_READ_PROJECTION
+        # Timing of the last parse stage, reported by the pipeline
+        self.parse_stats = {}
+        # table -> {'inserted', 'updated', 'unchanged'} across upserts since the last reset
+        self.row_changes = {}
+        # table -> (conflict columns, set of key tuples that were inserted or updated)
+        self.changed_keys = {}
+
+    def reset_change_tracking(self):
+        self.row_changes = {}
+        self.changed_keys = {}
+
+    def changed_entities(self) -> Dict[str, set]:
+        """
+        Keys of the entities this processor inserted or updated since the last
+        reset: fixture_ids, player_ids, team_ids and (league_id, season) standings.
+        """
+        entities = {name: set() for name in ('fixture_ids', 'player_ids', 'team_ids', 'standings')}
+        for table, keys in self.changed_keys.items():
+            conflict_columns, rows = keys
+            for entity, columns in CHANGE_FEED_KEYS.get(table, []):
+                positions = [conflict_columns.index(col) for col in columns]
+                for row in rows:
+                    key = tuple(row[i] for i in positions)
+                    entities[entity].add(key[0] if len(key) == 1 else key)
+        return entities
+
+    def get_raw_api_responses(self, endpoint):
+        query = f"""
+            SELECT {raw_response_columns(endpoint, self.read_projection)}
             FROM raw_api_responses
             WHERE endpoint = %s
             ORDER BY fetched_at DESC
         """
         results = self.db_handler.execute_query(query, (endpoint,))
+        if results:
+            instrumentation.record(rows_read=len(results), raw_bytes=sum(raw[5] or 0 for raw in results))
         logger.info(f"Fetched  raw responses for endpoint: {endpoint}")
         return results
 
-    def upsert_records(self, table_name, records:List[Dict],conflict_columns:List[str]):
+    def get_raw_response_ids(self, endpoint) -> List[int]:
+        query = """
+            SELECT response_id
+            FROM raw_api_responses
+            WHERE endpoint = %s
+            ORDER BY response_id
+        """
+        results = self.db_handler.execute_query(query, (endpoint,))
+        return [row[0] for row in results or []]
+
+    @staticmethod
+    def shard_ranges(response_ids: List[int], shards: int) -> List[Tuple[int, int]]:
+        """Split sorted response_ids into contiguous (low, high) ranges of similar size."""
+        if not response_ids:
+            return []
+        shards = max(1, min(shards, len(response_ids)))
+        size, extra = divmod(len(response_ids), shards)
+        ranges = []
+        start = 0
+        for i in range(shards):
+            end = start + size + (1 if i < extra else 0)
+            ranges.append((response_ids[start], response_ids[end - 1]))
+            start = end
+        return ranges
+
+    def parse_raw_responses(self, endpoint, parse_fn: Callable, workers: int = 1) -> Optional[Tuple[List, ...]]:
+        """
+        Parse every raw response of an endpoint with parse_fn.
+
+        parse_fn takes a list of raw rows and returns a tuple of row batches.
+        With workers > 1 the responses are sharded by response_id range across a
+        process pool; the shard results are merged in the same newest-first order
+        the serial path uses, so deduplication downstream behaves identically.
+        Timings land in self.parse_stats; 'parallelism' is the summed worker time
+        over wall time, i.e. how many shards were parsing at once on average.
+        It is not a speedup over the serial path, which was not run.
+        Returns None when there are no raw responses.
+        """
+        started = time.perf_counter()
+
+        if workers > 1 and multiprocessing.current_process().daemon:
+            logger.warning("Running inside a daemon process, falling back to serial parsing")
+            workers = 1
+
+        if workers <= 1:
+            raw_responses = self.get_raw_api_responses(endpoint)
+            if not raw_responses:
+                return None
+            batches = parse_fn(raw_responses)
+            elapsed = time.perf_counter() - started
+            self.parse_stats = {
+                'workers': 1,
+                'responses': len(raw_responses),
+                'wall_seconds': round(elapsed, 3),
+                'worker_seconds': round(elapsed, 3),
+                'parallelism': 1.0,
+            }
+            return batches
+
+        ranges = self.shard_ranges(self.get_raw_response_ids(endpoint), workers)
+        if not ranges:
+            return None
+
+        logger.info(f"Parsing {endpoint} in {len(ranges)} shards across {workers} workers...")
+        # spawn rather than fork: the pipeline runs stages on threads, and forking
+        # a threaded process can leave locks (e.g. logging) held in the child
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+            futures = [
+                pool.submit(_parse_shard, endpoint, low, high, parse_fn, self.read_projection)
+                for low, high in ranges
+            ]
+            shard_results = [future.result() for future in futures]
+
+        # Newest responses first, matching ORDER BY fetched_at DESC in the serial path
+        merged = None
+        for shard in reversed(shard_results):
+            if merged is None:
+                merged = tuple([] for _ in shard['batches'])
+            for rows, batch in zip(merged, shard['batches']):
+                rows.extend(batch)
+
+        elapsed = time.perf_counter() - started
+        worker_seconds = sum(shard['seconds'] for shard in shard_results)
+        instrumentation.record(
+            rows_read=sum(shard['responses'] for shard in shard_results),
+            raw_bytes=sum(shard['raw_bytes'] for shard in shard_results),
+            worker_cpu_seconds=sum(shard['cpu_seconds'] for shard in shard_results),
+        )
+        instrumentation.record_peak('worker_peak_rss_mb', round(max(shard['peak_rss_mb'] for shard in shard_results), 1))
+        self.parse_stats = {
+            'workers': workers,
+            'responses': sum(shard['responses'] for shard in shard_results),
+            'wall_seconds': round(elapsed, 3),
+            'worker_seconds': round(worker_seconds, 3),
+            'parallelism': round(worker_seconds / elapsed, 2) if elapsed else 1.0,
+        }
+        logger.info(f"Parsed {endpoint}: {self.parse_stats}")
+        return merged
+
+    def upsert_records(self, table_name, records:List[Dict],conflict_columns:List[str], only_changed: bool = True):
+        """Upsert records and return how many were submitted (see upsert_records_counted)."""
         if not records:
             logger.warning(f"No records to upsert into {table_name}")
             return 0
+        self.upsert_records_counted(table_name, records, conflict_columns, only_changed=only_changed)
+        return len(records)
+
+    def upsert_records_counted(self, table_name, records: List[Dict], conflict_columns: List[str],
+                               only_changed: bool = True, touch_column: Optional[str] = 'updated_at') -> Dict[str, int]:
+        """Dict-based variant of upsert_values, returning its counts."""
+        if not records:
+            logger.warning(f"No records to upsert into {table_name}")
+            return {'inserted': 0, 'updated': 0, 'unchanged': 0}
         df = pd.DataFrame(
             records
         )
-       
+        if touch_column and touch_column in df.columns:
+            df = df.drop(columns=[touch_column])
+        instrumentation.record(rows_parsed=len(records))
+        return self.upsert_values(table_name, list(df.columns), df.values, conflict_columns,
+                                  only_changed=only_changed, touch_column=touch_column)
+
+    def upsert_rows(self, rows: List[Any], only_changed: bool = True, keep: str = 'last') -> Dict[str, int]:
+        """
+        Upsert record objects from src.processing.records into their TABLE.
+        Rows are deduplicated on KEY (keep='last' or 'first', as in
+        DataFrame.drop_duplicates) and handed to the writer as tuples, without
+        building dicts or a DataFrame.
+        """
+        if not rows:
+            return {'inserted': 0, 'updated': 0, 'unchanged': 0}
+        instrumentation.record(rows_parsed=len(rows))
+        record_type = type(rows[0])
+        key_of = attrgetter(*record_type.KEY)
+        values_of = record_values(record_type)
+        ordered = reversed(rows) if keep == 'first' else rows
+        unique = {key_of(row): values_of(row) for row in ordered}
+        return self.upsert_values(record_type.TABLE, record_columns(record_type), list(unique.values()),
+                                  list(record_type.KEY), only_changed=only_changed)
+
+    def upsert_values(self, table_name, columns: List[str], values, conflict_columns: List[str],
+                      only_changed: bool = True, touch_column: Optional[str] = 'updated_at') -> Dict[str, int]:
+        """
+        Upsert value tuples (ordered like columns) and return
+        {'inserted', 'updated', 'unchanged'} counts.
+
+        With only_changed the conflicting row is only rewritten when at least one
+        column IS DISTINCT FROM the incoming value, so identical daily reloads
+        don't churn the heap or indexes. touch_column (if set) is excluded from
+        the comparison and set to NOW() only when the row really changes.
+        Counts are also accumulated per table in self.row_changes, and the
+        conflict keys of inserted/updated rows in self.changed_keys.
+        The running pipeline stage (src.utils.instrumentation) is credited
+        with the inserted/updated rows as rows_written.
+        """
+        counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+        if not len(values):
+            logger.warning(f"No records to upsert into {table_name}")
+            return counts
+
         # Build upsert query
-        columns = list(df.columns)
-        placeholders = ', '.join(['%s'] * len(columns))
+        columns = list(columns)
         conflict_cols = ', '.join(conflict_columns)
-        update_cols = ', '.join([
-            f"{col} = EXCLUDED.{col}" 
-            for col in columns 
-            if col not in conflict_columns
-        ])
+        value_cols = [col for col in columns if col not in conflict_columns]
+        update_cols = [f"{col} = EXCLUDED.{col}" for col in value_cols]
+        if touch_column:
+            update_cols.append(f"{touch_column} = NOW()")
+
+        where_clause = ''
+        if only_changed and value_cols:
+            where_clause = (
+                f"WHERE ({', '.join(f't.{col}' for col in value_cols)}) "
+                f"IS DISTINCT FROM ({', '.join(f'EXCLUDED.{col}' for col in value_cols)})"
+            )
 
+        # xmax = 0 only for freshly inserted tuples; rows skipped by the WHERE aren't returned
         query = f"""
-            INSERT INTO {table_name} ({', '.join(columns)})
+            INSERT INTO {table_name} AS t ({', '.join(columns)})
             VALUES %s
             ON CONFLICT ({conflict_cols})
-            DO UPDATE SET {update_cols}
+            DO UPDATE SET {', '.join(update_cols)}
+            {where_clause}
+            RETURNING (xmax = 0) AS inserted, {', '.join(f't.{col}' for col in conflict_columns)}
         """
         with self.db_handler.get_connection() as conn:
             with conn.cursor() as cur:
                 from psycopg2.extras import execute_values
-                execute_values(
+                returned = execute_values(
                     cur,
                     query,
-                    df.values,
+                    values,
                     template=None,
-                    page_size=100
+                    page_size=100,
+                    fetch=True
                 )
-        logger.info(f"Upserted {len(records)} records into {table_name}")
-        return len(records)
-                
+
+        counts['inserted'] = sum(1 for row in returned if row[0])
+        counts['updated'] = len(returned) - counts['inserted']
+        counts['unchanged'] = len(values) - len(returned)
+        instrumentation.record(rows_written=len(returned), rows_unchanged=counts['unchanged'])
+
+        table_counts = self.row_changes.setdefault(table_name, {'inserted': 0, 'updated': 0, 'unchanged': 0})
+        for key, value in counts.items():
+            table_counts[key] += value
+        _, changed = self.changed_keys.setdefault(table_name, (list(conflict_columns), set()))
+        changed.update(tuple(row[1:]) for row in returned)
+
+        logger.info(f"Upserted {len(values)} records into {table_name}: "
+                    f"{counts['inserted']} inserted, {counts['updated']} updated, {counts['unchanged']} unchanged")
+        return counts
+
 
 # if __name__ == '__main__':
     # processor= BaseProcessor()
@@ -0,0 +1,136 @@
+from pathlib import Path
+import sys
+from typing import Dict, Iterable, Optional
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.storage.postgres_handler import PostgresHandler
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__, 'processing.log')
+
+VALUE_COLUMNS = (
+    'fixture_id', 'team_id', 'match_date', 'minutes_played', 'rating',
+    'goals_total', 'assists', 'passes_accuracy', 'shots_on_target',
+)
+COLUMNS = ('player_id',) + VALUE_COLUMNS
+
+# The latest dated stats row of each player in {players} (a query yielding
+# player_id); one index probe on idx_player_stats_player_date per player
+LATEST_SQL = f"""
+    SELECT s.*
+    FROM ({{players}}) p
+    CROSS JOIN LATERAL (
+        SELECT {', '.join(COLUMNS)}
+        FROM fact_player_stats
+        WHERE player_id = p.player_id
+        AND match_date IS NOT NULL
+        ORDER BY match_date DESC NULLS LAST, fixture_id DESC
+        LIMIT 1
+    ) s
+"""
+
+
+class LatestAppearance:
+    """
+    Maintains player_latest_appearance: per player, the fixture, date and key
+    stats of their most recent appearance, so the player card is a primary
+    key fetch however long the career.
+
+    refresh_players() re-picks the pointer of the given players (those whose
+    stats or match dates a process_player_stats run changed). rebuild()
+    recomputes everything; verify() compares the table against a full
+    recomputation without writing.
+    """
+
+    def __init__(self, db_handler: Optional[PostgresHandler] = None):
+        self.db_handler = db_handler or PostgresHandler()
+
+    def _refresh(self, players_sql: str, params: tuple) -> Dict[str, int]:
+        """
+        Upsert the latest appearance of the players in `players_sql` and delete
+        the pointers of those that no longer have a dated stats row.
+        """
+        query = f"""
+            WITH players AS (
+                {players_sql}
+            ),
+            latest AS (
+                {LATEST_SQL.format(players='SELECT player_id FROM players')}
+            ),
+            removed AS (
+                DELETE FROM player_latest_appearance f
+                WHERE f.player_id IN (SELECT player_id FROM players)
+                AND NOT EXISTS (SELECT 1 FROM latest l WHERE l.player_id = f.player_id)
+                RETURNING 1
+            ),
+            upserted AS (
+                INSERT INTO player_latest_appearance AS t ({', '.join(COLUMNS)})
+                SELECT {', '.join(COLUMNS)} FROM latest
+                ON CONFLICT (player_id) DO UPDATE
+                SET {', '.join(f"{col} = EXCLUDED.{col}" for col in VALUE_COLUMNS)}, updated_at = NOW()
+                WHERE ({', '.join(f"t.{col}" for col in VALUE_COLUMNS)})
+                    IS DISTINCT FROM ({', '.join(f"EXCLUDED.{col}" for col in VALUE_COLUMNS)})
+                RETURNING (xmax = 0) AS inserted
+            )
+            SELECT
+                (SELECT COUNT(*) FROM players),
+                COUNT(*) FILTER (WHERE inserted),
+                COUNT(*) FILTER (WHERE NOT inserted),
+                (SELECT COUNT(*) FROM removed)
+            FROM upserted
+        """
+        players, inserted, updated, removed = self.db_handler.execute_query(query, params)[0]
+        return {'players': players, 'inserted': inserted, 'updated': updated, 'removed': removed}
+
+    def refresh_players(self, player_ids: Iterable[int]) -> Dict[str, int]:
+        """Re-pick the latest appearance of these players."""
+        player_ids = sorted(set(player_ids))
+        if not player_ids:
+            return {'players': 0, 'inserted': 0, 'updated': 0, 'removed': 0}
+        counts = self._refresh("SELECT unnest(%s::bigint[]) AS player_id", (player_ids,))
+        logger.info(f"Refreshed player_latest_appearance for {len(player_ids)} players: {counts}")
+        return counts
+
+    def rebuild(self) -> Dict[str, int]:
+        """Recompute every pointer (and drop pointers of players without stats)."""
+        players_sql = """
+            SELECT DISTINCT player_id FROM fact_player_stats
+            UNION
+            SELECT player_id FROM player_latest_appearance
+        """
+        counts = self._refresh(players_sql, ())
+        logger.info(f"Rebuilt player_latest_appearance: {counts}")
+        return counts
+
+    def verify(self) -> Dict[str, int]:
+        """
+        Compare player_latest_appearance with a full recomputation: pointers
+        missing from the table, pointers the recomputation doesn't produce,
+        and pointers at a different appearance or with stale stats.
+        """
+        columns = ', '.join(COLUMNS)
+        query = f"""
+            WITH fresh AS (
+                SELECT DISTINCT ON (player_id) {columns}
+                FROM fact_player_stats
+                WHERE match_date IS NOT NULL
+                ORDER BY player_id, match_date DESC, fixture_id DESC
+            ),
+            stored AS (
+                SELECT {columns} FROM player_latest_appearance
+            ),
+            fresh_only AS (SELECT * FROM fresh EXCEPT SELECT * FROM stored),
+            stored_only AS (SELECT * FROM stored EXCEPT SELECT * FROM fresh)
+            SELECT
+                (SELECT COUNT(*) FROM fresh),
+                (SELECT COUNT(*) FROM fresh_only WHERE player_id NOT IN (SELECT player_id FROM stored)),
+                (SELECT COUNT(*) FROM stored_only WHERE player_id NOT IN (SELECT player_id FROM fresh)),
+                (SELECT COUNT(*) FROM fresh_only WHERE player_id IN (SELECT player_id FROM stored))
+        """
+        expected, missing, extra, different = self.db_handler.execute_query(query)[0]
+        result = {'expected': expected, 'missing': missing, 'extra': extra, 'different': different}
+        if missing or extra or different:
+            logger.warning(f"player_latest_appearance differs from a full recomputation: {result}")
+        return result
@@ -0,0 +1,148 @@
+from pathlib import Path
+import sys
+from typing import Dict, Iterable, Optional
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.storage.postgres_handler import PostgresHandler
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__, 'processing.log')
+
+VALUE_COLUMNS = (
+    'league_id', 'season', 'match_date', 'round', 'status',
+    'home_team_id', 'home_team_name', 'away_team_id', 'away_team_name',
+    'home_goals', 'away_goals', 'venue_name',
+)
+COLUMNS = ('fixture_id',) + VALUE_COLUMNS
+
+# One row per fixture with the team and venue names resolved; {scope} narrows
+# the matches that are summarised
+SUMMARY_SQL = """
+    SELECT
+        m.fixture_id,
+        m.league_id,
+        m.season,
+        m.match_date,
+        m.round,
+        m.status,
+        m.home_team_id,
+        ht.team_name AS home_team_name,
+        m.away_team_id,
+        at.team_name AS away_team_name,
+        m.home_goals,
+        m.away_goals,
+        v.venue_name
+    FROM matches m
+    JOIN dim_teams ht ON m.home_team_id = ht.team_id
+    JOIN dim_teams at ON m.away_team_id = at.team_id
+    LEFT JOIN dim_venues v ON m.venue_id = v.venue_id
+    WHERE {scope}
+"""
+
+
+class MatchSummary:
+    """
+    Maintains match_summary: the bot's read model of a fixture (names, score,
+    status and venue), so match lookups don't join dim_teams twice per row.
+
+    refresh_fixtures() rewrites the rows of the fixtures a process_matches
+    run touched; sync_names() picks up renamed teams and venues. rebuild()
+    recomputes everything; verify() compares the table against a full
+    recomputation without writing.
+    """
+
+    def __init__(self, db_handler: Optional[PostgresHandler] = None):
+        self.db_handler = db_handler or PostgresHandler()
+
+    def _upsert(self, scope: str, params: tuple) -> Dict[str, int]:
+        query = f"""
+            WITH upserted AS (
+                INSERT INTO match_summary AS t ({', '.join(COLUMNS)})
+                {SUMMARY_SQL.format(scope=scope)}
+                ON CONFLICT (fixture_id) DO UPDATE
+                SET {', '.join(f"{col} = EXCLUDED.{col}" for col in VALUE_COLUMNS)}, updated_at = NOW()
+                WHERE ({', '.join(f"t.{col}" for col in VALUE_COLUMNS)})
+                    IS DISTINCT FROM ({', '.join(f"EXCLUDED.{col}" for col in VALUE_COLUMNS)})
+                RETURNING (xmax = 0) AS inserted
+            )
+            SELECT COUNT(*) FILTER (WHERE inserted), COUNT(*) FILTER (WHERE NOT inserted)
+            FROM upserted
+        """
+        inserted, updated = self.db_handler.execute_query(query, params)[0]
+        return {'inserted': inserted, 'updated': updated}
+
+    def refresh_fixtures(self, fixture_ids: Iterable[int]) -> Dict[str, int]:
+        """Rewrite the summary rows of these fixtures."""
+        fixture_ids = sorted(set(fixture_ids))
+        if not fixture_ids:
+            return {'inserted': 0, 'updated': 0}
+        counts = self._upsert('m.fixture_id = ANY(%s)', (fixture_ids,))
+        logger.info(f"Refreshed match_summary for {len(fixture_ids)} fixtures: {counts}")
+        return counts
+
+    def sync_names(self) -> int:
+        """
+        Copy team and venue names from the dimensions wherever they differ
+        (a renamed team or venue). Returns the number of rows updated.
+        """
+        query = """
+            UPDATE match_summary ms
+            SET home_team_name = ht.team_name,
+                away_team_name = at.team_name,
+                venue_name = v.venue_name,
+                updated_at = NOW()
+            FROM matches m
+            JOIN dim_teams ht ON m.home_team_id = ht.team_id
+            JOIN dim_teams at ON m.away_team_id = at.team_id
+            LEFT JOIN dim_venues v ON m.venue_id = v.venue_id
+            WHERE ms.fixture_id = m.fixture_id
+            AND (ms.home_team_name, ms.away_team_name, ms.venue_name)
+                IS DISTINCT FROM (ht.team_name, at.team_name, v.venue_name)
+            RETURNING 1
+        """
+        updated = len(self.db_handler.execute_query(query) or [])
+        if updated:
+            logger.info(f"Synced team/venue names on {updated} match_summary rows")
+        return updated
+
+    def rebuild(self) -> Dict[str, int]:
+        """Recompute every row (and drop rows whose fixture is gone)."""
+        counts = self._upsert('TRUE', ())
+        removed = self.db_handler.execute_query("""
+            DELETE FROM match_summary ms
+            WHERE NOT EXISTS (SELECT 1 FROM matches m WHERE m.fixture_id = ms.fixture_id)
+            RETURNING 1
+        """) or []
+        counts['removed'] = len(removed)
+        logger.info(f"Rebuilt match_summary: {counts}")
+        return counts
+
+    def verify(self) -> Dict[str, int]:
+        """
+        Compare match_summary with a full recomputation: rows missing from the
+        table, rows the recomputation doesn't produce, and rows whose values
+        differ. All zero means the incremental maintenance is exact.
+        """
+        columns = ', '.join(COLUMNS)
+        query = f"""
+            WITH fresh AS (
+                {SUMMARY_SQL.format(scope='TRUE')}
+            ),
+            stored AS (
+                SELECT {columns} FROM match_summary
+            ),
+            fresh_only AS (SELECT * FROM fresh EXCEPT SELECT * FROM stored),
+            stored_only AS (SELECT * FROM stored EXCEPT SELECT * FROM fresh)
+            SELECT
+                (SELECT COUNT(*) FROM fresh),
+                (SELECT COUNT(*) FROM fresh_only WHERE fixture_id NOT IN (SELECT fixture_id FROM stored)),
+                (SELECT COUNT(*) FROM stored_only WHERE fixture_id NOT IN (SELECT fixture_id FROM fresh)),
+                (SELECT COUNT(*) FROM fresh_only WHERE fixture_id IN (SELECT fixture_id FROM stored))
+        """
+        expected, missing, extra, different = self.db_handler.execute_query(query)[0]
+        result = {'expected': expected, 'missing': missing, 'extra': extra, 'different': different}
+        if missing or extra or different:
+            logger.warning(f"match_summary differs from a full recomputation: {result}")
+        return result
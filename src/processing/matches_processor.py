@@ -1,108 +1,125 @@
 from pathlib import Path
 import sys
-import pandas as pd
 import json
-from typing import List, Dict, Optional
+from functools import partial
+from typing import List, Dict, Optional, Tuple
 
 project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
 from src.processing.base_processor import BaseProcessor
+from src.processing.match_summary import MatchSummary
+from src.processing.records import MatchRow, FixtureVenueRow
 from src.utils.logger import setup_logger
+from src.utils.profiling import profile_method
 logger = setup_logger(__name__, 'processing.log')
 
+
+def parse_fixture_responses(raw_responses, season: Optional[int] = None) -> Tuple[List[MatchRow], List[FixtureVenueRow]]:
+    """Parse raw /fixtures responses into match and venue rows."""
+    all_matches = []
+    all_venues = []
+
+    for raw in raw_responses:
+        response_data = raw[3].get('response', [])
+
+        if not response_data:
+            logger.warning("Empty response data in raw fixture")
+            continue
+
+        for fixture_data in response_data:
+            try:
+                # Extract nested data
+                fixture = fixture_data.get('fixture', {})
+                league = fixture_data.get('league', {})
+                teams = fixture_data.get('teams', {})
+                goals = fixture_data.get('goals', {})
+                score = fixture_data.get('score', {})
+
+                # Filter by season if specified
+                if season and league.get('season') != season:
+                    continue
+
+                #Determine winner
+                winner = None
+                if fixture.get('status',{}).get('short','') == 'FT':
+
+                    home_goals = goals.get('home')
+                    away_goals = goals.get('away')
+                    if home_goals is not None and away_goals is not None:
+                        if home_goals > away_goals:
+                            winner = 'HOME'
+                        elif away_goals > home_goals:
+                            winner = 'AWAY'
+                        else:
+                            winner = 'DRAW'
+
+                # Build match record
+                all_matches.append(MatchRow(
+                    fixture.get('id'),
+                    league.get('id'),
+                    league.get('season'),
+                    teams.get('home', {}).get('id'),
+                    teams.get('away', {}).get('id'),
+                    fixture.get('venue', {}).get('id'),
+                    fixture.get('date'),
+                    league.get('round'),
+                    fixture.get('status', {}).get('short'),
+                    fixture.get('status', {}).get('long'),
+                    fixture.get('referee'),
+                    fixture.get('timezone'),
+                    goals.get('home'),
+                    goals.get('away'),
+                    score.get('halftime', {}).get('home'),
+                    score.get('halftime', {}).get('away'),
+                    score.get('fulltime', {}).get('home'),
+                    score.get('fulltime', {}).get('away'),
+                    score.get('extratime', {}).get('home'),
+                    score.get('extratime', {}).get('away'),
+                    score.get('penalty', {}).get('home'),
+                    score.get('penalty', {}).get('away'),
+                    winner,
+                ))
+
+                # Extract venue
+                venue_data = fixture.get('venue', {})
+                if venue_data.get('id'):
+                    all_venues.append(FixtureVenueRow(
+                        venue_data.get('id'),
+                        venue_data.get('name'),
+                        venue_data.get('city'),
+                    ))
+
+            except Exception as e:
+                logger.error(f"Error processing fixture: {e}", exc_info=True)
+                continue
+
+    return all_matches, all_venues
+
+
 class MatchesProcessor(BaseProcessor):
     """Process fixtures/matches data into matches and match_events tables."""
 
-    def process_matches(self, season: Optional[int] = None) -> Dict[str, int]:
+    def __init__(self, profile: Optional[bool] = None):
+        super().__init__(profile=profile)
+        self.match_summary = MatchSummary(self.db_handler)
+
+    @profile_method
+    def process_matches(self, season: Optional[int] = None, workers: int = 1) -> Dict[str, int]:
         logger.info(f"Starting matches processing for season {season or 'all'}...")
 
-        # Get raw responses for fixtures endpoint
-        raw_responses = self.get_raw_api_responses('/fixtures')
+        # Parse raw responses for fixtures endpoint (sharded across workers if requested)
+        parsed = self.parse_raw_responses(
+            '/fixtures',
+            partial(parse_fixture_responses, season=season),
+            workers=workers
+        )
 
-        if not raw_responses:
+        if parsed is None:
             logger.warning("No raw fixtures responses found")
             return {'matches': 0, 'events': 0}
-        
-        all_matches = []
-        all_events = []
-        all_venues = []
 
-        for raw in raw_responses:
-            response_data = raw[3].get('response', [])
-
-            if not response_data:
-                logger.warning("Empty response data in raw fixture")
-                continue
-            
-            for fixture_data in response_data:
-                try:
-                    # Extract nested data
-                    fixture = fixture_data.get('fixture', {})
-                    league = fixture_data.get('league', {})
-                    teams = fixture_data.get('teams', {})
-                    goals = fixture_data.get('goals', {})
-                    score = fixture_data.get('score', {})
-
-                    # Filter by season if specified
-                    if season and league.get('season') != season:
-                        continue
-                    
-                    #Determine winner
-                    winner = None
-                    if fixture.get('status',{}).get('short','') == 'FT':
-
-                        home_goals = goals.get('home')
-                        away_goals = goals.get('away')
-                        if home_goals is not None and away_goals is not None:
-                            if home_goals > away_goals:
-                                winner = 'HOME'
-                            elif away_goals > home_goals:
-                                winner = 'AWAY'
-                            else:
-                                winner = 'DRAW'
-                        
-                    # Build match record
-                    match_record = {
-                        'fixture_id': fixture.get('id'),
-                        'league_id': league.get('id'),
-                        'season': league.get('season'),
-                        'home_team_id': teams.get('home', {}).get('id'),
-                        'away_team_id': teams.get('away', {}).get('id'),
-                        'venue_id': fixture.get('venue', {}).get('id'),
-                        'match_date': fixture.get('date'),
-                        'round': league.get('round'),
-                        'status': fixture.get('status', {}).get('short'),
-                        'status_long': fixture.get('status', {}).get('long'),
-                        'referee': fixture.get('referee'),
-                        'timezone': fixture.get('timezone'),
-                        'home_goals': goals.get('home'),
-                        'away_goals': goals.get('away'),
-                        'halftime_home_goals': score.get('halftime', {}).get('home'),
-                        'halftime_away_goals': score.get('halftime', {}).get('away'),
-                        'fulltime_home_goals': score.get('fulltime', {}).get('home'),
-                        'fulltime_away_goals': score.get('fulltime', {}).get('away'),
-                        'extratime_home_goals': score.get('extratime', {}).get('home'),
-                        'extratime_away_goals': score.get('extratime', {}).get('away'),
-                        'penalty_home_goals': score.get('penalty', {}).get('home'),
-                        'penalty_away_goals': score.get('penalty', {}).get('away'),
-                        'winner': winner,
-                    }
-
-                    all_matches.append(match_record)
-
-                    # Extract venue
-                    venue_data = fixture.get('venue', {})
-                    if venue_data.get('id'):
-                        all_venues.append({
-                            'venue_id': venue_data.get('id'),
-                            'venue_name': venue_data.get('name'),
-                            'city': venue_data.get('city')
-                        })
-                
-                except Exception as e:
-                    logger.error(f"Error processing fixture: {e}", exc_info=True)
-                    continue
+        all_matches, all_venues = parsed
 
         if not all_matches:
             logger.warning("No matches extracted from raw data")
@@ -110,30 +127,28 @@ class MatchesProcessor(BaseProcessor):
         
         # Upsert Venues First
         if all_venues:
-            df_venues = pd.DataFrame(all_venues)
-            df_venues = df_venues.drop_duplicates(subset=['venue_id'], keep='last')
-            
-            venue_count = self.upsert_records(
-                table_name='dim_venues',
-                records=df_venues.to_dict('records'),
-                conflict_columns=['venue_id']
-            )
-            logger.info(f"Upserted {venue_count} venues from matches")
-
-        df_matches = pd.DataFrame(all_matches)
-        df_matches = df_matches.drop_duplicates(subset=['fixture_id'], keep='last')
-        logger.info(f"Extracted {len(df_matches)} unique matches")
-
-        # Upsert matches
-        matches_count = self.upsert_records(
-            table_name='matches',
-            records=df_matches.to_dict('records'),
-            conflict_columns=['fixture_id']
-        )
+            venue_counts = self.upsert_rows(all_venues)
+            logger.info(f"Upserted {sum(venue_counts.values())} venues from matches")
+
+        # Upsert matches (deduplicated on fixture_id by upsert_rows)
+        match_counts = self.upsert_rows(all_matches)
+        matches_count = sum(match_counts.values())
+        logger.info(f"Extracted {matches_count} unique matches")
+
+        # Bot read model: rewrite the summaries of fixtures whose match row
+        # changed, then pick up team/venue renames from the teams stage
+        columns, changed = self.changed_keys.get('matches', (['fixture_id'], set()))
+        changed_fixtures = {key[columns.index('fixture_id')] for key in changed}
+        summary_counts = self.match_summary.refresh_fixtures(changed_fixtures)
+        renamed = self.match_summary.sync_names()
 
         logger.info(f"Matches processing completed: {matches_count} matches upserted")
         
-        return {'matches': matches_count, 'events': 0}
+        return {
+            'matches': matches_count,
+            'events': 0,
+            'summary_rows': summary_counts['inserted'] + summary_counts['updated'] + renamed,
+        }
 
                 
 
@@ -1,6 +1,11 @@
 from pathlib import Path
 import sys
+import time
+import uuid
+import threading
+from datetime import datetime
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 from src.processing.league_processor import LeagueProcessor
@@ -9,6 +14,12 @@ from src.processing.teams_processor import TeamsProcessor
 from src.processing.matches_processor import MatchesProcessor
 from src.processing.players_processor import PlayersProcessor
 from src.processing.standings_processor import StandingsProcessor
+from src.storage.change_feed import ChangeFeed
+from src.storage.run_history import PipelineRunHistory
+from src.storage.snapshot import SnapshotExporter
+from src.utils.configs import config
+from src.utils.instrumentation import PipelineInstrumentation
+from src.utils.profiling import profiled
 from src.utils.logger import setup_logger
 
 
@@ -16,20 +27,229 @@ logger = setup_logger(__name__, 'processing.log')
 
 class ProcessingPipeline:
 
-    def __init__(self):
+    def __init__(self, workers=None, stage_threads=None, profile=None):
+        # Process pool size for parsing raw fixtures / player stats
+        self.workers = max(1, workers or config.PIPELINE_WORKERS)
+        # Thread pool size for running independent stages side by side
+        self.stage_threads = max(1, stage_threads or config.PIPELINE_STAGE_THREADS)
+        # Profile every stage (True), none (False) or follow EPL_PROFILE (None)
+        self.profile = profile
         self.league_processor = LeagueProcessor()
         self.seasons_processor = SeasonsProcessor()
         self.teams_processor = TeamsProcessor()
         self.matches_processor = MatchesProcessor()
         self.players_processor = PlayersProcessor()
         self.standings_processor = StandingsProcessor()
+        self.change_feed = ChangeFeed()
+        self.run_history = PipelineRunHistory()
+        self.snapshot_exporter = SnapshotExporter()
+        self.instrumentation = PipelineInstrumentation()
+        self._results_lock = threading.Lock()
+
+    def get_processors(self):
+        return [
+            self.league_processor,
+            self.seasons_processor,
+            self.teams_processor,
+            self.matches_processor,
+            self.players_processor,
+            self.standings_processor,
+        ]
+
+    def collect_row_changes(self):
+        """Sum the inserted/updated/unchanged counts of every processor per table."""
+        row_changes = {}
+        for processor in self.get_processors():
+            for table, counts in processor.row_changes.items():
+                table_counts = row_changes.setdefault(table, {'inserted': 0, 'updated': 0, 'unchanged': 0})
+                for key, value in counts.items():
+                    table_counts[key] += value
+        return row_changes
+
+    def collect_changed_entities(self):
+        """Union of the changed keys emitted by every processor."""
+        changes = {'fixture_ids': set(), 'player_ids': set(), 'team_ids': set(), 'standings': set()}
+        for processor in self.get_processors():
+            for name, keys in processor.changed_entities().items():
+                changes[name].update(keys)
+        return changes
+
+    def publish_changes(self, results):
+        """Write this run's changed entities to the change log and NOTIFY listeners."""
+        try:
+            results['changes'] = self.change_feed.publish(results['run_id'], self.collect_changed_entities())
+        except Exception as e:
+            logger.error(f"Error publishing changed entities: {e}", exc_info=True)
+            results['success'] = False
+            results['errors'].append(f"change_feed: {e}")
+
+    def export_snapshot(self, results):
+        """
+        Export the bot's read-only snapshot after a successful run that
+        changed something (or when no snapshot exists yet).
+        """
+        if not config.BOT_SNAPSHOT_EXPORT or not results['success']:
+            return
+        if not any(results['changes'].values()) and self.snapshot_exporter.path.exists():
+            logger.info("No changed entities; keeping the current bot snapshot")
+            return
+        try:
+            results['snapshot'] = self.snapshot_exporter.export(results['run_id'])
+        except Exception as e:
+            # The previous snapshot stays in place; bots keep serving it
+            logger.error(f"Error exporting bot snapshot: {e}", exc_info=True)
+            results['errors'].append(f"snapshot: {e}")
+
+    def record_run(self, results, started_at):
+        """Persist the run's totals and per-stage metrics to pipeline_runs."""
+        try:
+            self.run_history.record_run(results, started_at, datetime.utcnow())
+        except Exception as e:
+            logger.error(f"Error recording pipeline run: {e}", exc_info=True)
+            results['success'] = False
+            results['errors'].append(f"run_history: {e}")
+
+    def get_stages(self):
+        """
+        Stage name -> (callable, dependencies).
+        Dependencies follow the foreign keys between the tables each stage writes.
+        Player profiles run after player stats because both upsert dim_players and
+        the full profile should win over the skeleton rows created from stats.
+        """
+        return {
+            'leagues': (self._run_leagues, []),
+            'seasons': (self._run_seasons, ['leagues']),
+            'teams': (self._run_teams, []),
+            'matches': (self._run_matches, ['leagues', 'seasons', 'teams']),
+            'standings': (self._run_standings, ['leagues', 'seasons', 'teams']),
+            'player_stats': (self._run_player_stats, ['matches', 'teams']),
+            'player_profiles': (self._run_player_profiles, ['player_stats']),
+        }
+
+    # -- Stages ---------------------------------------------------------------
+
+    def _set_results(self, results, **values):
+        with self._results_lock:
+            results.update(values)
+
+    def _run_leagues(self, results):
+        self._set_results(results, leagues_count=self.league_processor.process_leagues())
+
+    def _run_seasons(self, results):
+        self._set_results(results, seasons_count=self.seasons_processor.process_seasons())
+
+    def _run_teams(self, results):
+        self._set_results(results, teams_count=self.teams_processor.process_teams_and_venues())
+
+    def _run_matches(self, results):
+        matches = self.matches_processor.process_matches(workers=self.workers)
+        with self._results_lock:
+            results['matches_count'] = matches
+            results['parse_stats']['matches'] = self.matches_processor.parse_stats
+
+    def _run_standings(self, results):
+        self._set_results(results, standings_count=self.standings_processor.process_standings())
+
+    def _run_player_stats(self, results):
+        # Process player stats for completed matches
+        player_results = self.players_processor.process_player_stats(workers=self.workers)
+        with self._results_lock:
+            results['players_stats_count'] = player_results.get('stats_entries', 0)
+            results['parse_stats']['player_stats'] = self.players_processor.parse_stats
+
+    def _run_player_profiles(self, results):
+        # Process player profiles (from /players/profiles endpoint)
+        profile_results = self.players_processor.process_player_profiles()
+        self._set_results(results, player_profiles_count=profile_results.get('profiles_processed', 0))
+
+    # -- Scheduling -----------------------------------------------------------
+
+    @staticmethod
+    def critical_path(stages, timings):
+        """Longest chain of dependent stages by duration: (stage names, seconds)."""
+        memo = {}
+
+        def longest(name):
+            if name not in memo:
+                _, deps = stages[name]
+                best = max((longest(dep) for dep in deps), key=lambda p: p[1], default=([], 0.0))
+                seconds = timings.get(name, {}).get('seconds', 0.0)
+                memo[name] = (best[0] + [name], best[1] + seconds)
+            return memo[name]
+
+        path, seconds = max((longest(name) for name in stages), key=lambda p: p[1], default=([], 0.0))
+        return path, round(seconds, 3)
+
+    def _run_stage(self, name, func, results, pipeline_started):
+        started = time.perf_counter()
+        with self.instrumentation.stage(name), profiled(name, results['run_id'], self.profile):
+            func(results)
+        finished = time.perf_counter()
+        return {
+            'started_at': round(started - pipeline_started, 3),
+            'seconds': round(finished - started, 3),
+        }
+
+    def run_stages(self, results):
+        """
+        Run every stage as soon as its dependencies have completed, with
+        independent stages sharing a thread pool. Stages whose dependencies
+        failed are skipped. Timings are written to results['stage_timings'].
+        """
+        stages = self.get_stages()
+        pending = dict(stages)
+        done, failed = set(), set()
+        timings = results['stage_timings']
+        pipeline_started = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self.stage_threads, thread_name_prefix='pipeline') as pool:
+            running = {}
+            while pending or running:
+                # Skip stages that can no longer run
+                for name, (_, deps) in list(pending.items()):
+                    if any(dep in failed for dep in deps):
+                        logger.warning(f"Skipping stage '{name}': a dependency failed")
+                        timings[name] = {'status': 'skipped'}
+                        failed.add(name)
+                        del pending[name]
+
+                # Submit every stage whose dependencies are done
+                for name, (func, deps) in list(pending.items()):
+                    if all(dep in done for dep in deps):
+                        logger.info(f"Starting stage '{name}'")
+                        running[pool.submit(self._run_stage, name, func, results, pipeline_started)] = name
+                        del pending[name]
+
+                if not running:
+                    break
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    try:
+                        timings[name] = {'status': 'success', **future.result()}
+                        done.add(name)
+                        logger.info(f"Stage '{name}' finished in {timings[name]['seconds']}s")
+                    except Exception as e:
+                        logger.error(f"Error in stage '{name}': {e}", exc_info=True)
+                        timings[name] = {'status': 'failed'}
+                        failed.add(name)
+                        results['success'] = False
+                        results['errors'].append(f"{name}: {e}")
+
+        path, seconds = self.critical_path(stages, timings)
+        results['critical_path'] = {'stages': path, 'seconds': seconds}
+        results['wall_seconds'] = round(time.perf_counter() - pipeline_started, 3)
+        return results
 
     def run_full_processing(self):
         logger.info("=" * 60)
         logger.info("Starting full processing pipeline...")
         logger.info("=" * 60)
 
+        started_at = datetime.utcnow()
         results = {
+            'run_id': f"{started_at:%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:6]}",
             'success': True,
             'leagues_count':0,
             'seasons_count':0,
@@ -38,36 +258,66 @@ class ProcessingPipeline:
             'standings_count': 0,
             'players_stats_count': 0,
             'player_profiles_count': 0,
+            'workers': self.workers,
+            'parse_stats': {},
+            'stage_timings': {},
+            'critical_path': {},
+            'wall_seconds': 0,
+            'stage_metrics': {},
+            'run_totals': {},
+            'row_changes': {},
+            'changes': {},
+            'snapshot': {},
             'errors': []
         }
 
+        for processor in self.get_processors():
+            processor.reset_change_tracking()
+            processor.run_id = results['run_id']
+        self.instrumentation = PipelineInstrumentation()
+
         try:
-            results['leagues_count']= self.league_processor.process_leagues()
-            results['seasons_count']= self.seasons_processor.process_seasons()
-            results['teams_count']= self.teams_processor.process_teams_and_venues()
-            results['matches_count'] = self.matches_processor.process_matches()
-            results['standings_count'] = self.standings_processor.process_standings()
-            
-            # Process player stats for completed matches
-            player_results = self.players_processor.process_player_stats()
-            results['players_stats_count'] = player_results.get('stats_entries', 0)
-            
-            # Process player profiles (from /players/profiles endpoint)
-            profile_results = self.players_processor.process_player_profiles()
-            results['player_profiles_count'] = profile_results.get('profiles_processed', 0)
+            self.instrumentation.start()
+            try:
+                self.run_stages(results)
+            finally:
+                self.instrumentation.stop()
+            results['stage_metrics'] = self.instrumentation.summary()
+            results['run_totals'] = self.instrumentation.totals(results['stage_metrics'])
+            results['row_changes'] = self.collect_row_changes()
+            self.publish_changes(results)
+            self.export_snapshot(results)
 
-            logger.info("Processing pipeline completed successfully!")
+            if results['success']:
+                logger.info("Processing pipeline completed successfully!")
+            else:
+                logger.warning(f"Processing pipeline completed with errors: {results['errors']}")
             logger.info(f"Leagues: {results['leagues_count']}")
             logger.info(f"Seasons: {results['seasons_count']}")
             logger.info(f"Standings: {results['standings_count']}")
             logger.info(f"Player Stats: {results['players_stats_count']}")
             logger.info(f"Player Profiles: {results['player_profiles_count']}")
-            
-            
+            for stage, stats in results['parse_stats'].items():
+                logger.info(f"Parse {stage}: {stats.get('wall_seconds')}s wall, "
+                            f"{stats.get('workers')} workers, parallelism x{stats.get('parallelism')}")
+            for table, counts in results['row_changes'].items():
+                logger.info(f"Rows {table}: {counts['inserted']} inserted, "
+                            f"{counts['updated']} updated, {counts['unchanged']} unchanged")
+            for stage, metrics in results['stage_metrics'].items():
+                logger.info(f"Stage {stage}: {metrics['wall_seconds']}s wall, {metrics['cpu_seconds']}s CPU, "
+                            f"{metrics['rows_read']} rows read ({metrics['raw_bytes']} bytes), "
+                            f"{metrics['rows_parsed']} parsed, {metrics['rows_written']} written, "
+                            f"peak RSS {metrics['peak_rss_mb']} MB")
+            logger.info(f"Changed entities: {results['changes']}")
+            logger.info(f"Wall time: {results['wall_seconds']}s, critical path: "
+                        f"{' -> '.join(results['critical_path']['stages'])} "
+                        f"({results['critical_path']['seconds']}s)")
+
+
         except Exception as e:
             logger.error(f"Error in processing pipeline: {e}", exc_info=True)
             results['success'] = False
             results['errors'].append(str(e))
-            
+
+        self.record_run(results, started_at)
         return results
-    
@@ -0,0 +1,153 @@
+from pathlib import Path
+import sys
+from typing import Dict, Iterable, Optional
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.storage.postgres_handler import PostgresHandler
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__, 'processing.log')
+
+KEY_COLUMNS = ('player_id', 'league_id', 'season', 'team_id')
+VALUE_COLUMNS = (
+    'appearances', 'minutes_played', 'goals', 'assists', 'yellow_cards', 'red_cards',
+    'avg_rating', 'goals_per90', 'assists_per90', 'last_match_date',
+)
+COLUMNS = KEY_COLUMNS + VALUE_COLUMNS
+
+# One row per (player, league, season, team) from fact_player_stats; {scope} narrows
+# the stats rows that are aggregated (always whole player-seasons)
+AGGREGATE_SQL = """
+    SELECT
+        s.player_id,
+        m.league_id,
+        m.season,
+        s.team_id,
+        COUNT(*) FILTER (WHERE s.minutes_played > 0) AS appearances,
+        COALESCE(SUM(s.minutes_played), 0) AS minutes_played,
+        COALESCE(SUM(s.goals_total), 0) AS goals,
+        COALESCE(SUM(s.assists), 0) AS assists,
+        COALESCE(SUM(s.yellow_cards), 0) AS yellow_cards,
+        COALESCE(SUM(s.red_cards), 0) AS red_cards,
+        ROUND(AVG(s.rating), 2) AS avg_rating,
+        ROUND(COALESCE(SUM(s.goals_total), 0) * 90.0 / NULLIF(SUM(s.minutes_played), 0), 3) AS goals_per90,
+        ROUND(COALESCE(SUM(s.assists), 0) * 90.0 / NULLIF(SUM(s.minutes_played), 0), 3) AS assists_per90,
+        MAX(m.match_date) AS last_match_date
+    FROM fact_player_stats s
+    JOIN matches m ON m.fixture_id = s.fixture_id
+    WHERE {scope}
+    GROUP BY s.player_id, m.league_id, m.season, s.team_id
+"""
+
+
+class PlayerSeasonAggregate:
+    """
+    Maintains fact_player_season: apps, minutes, goals, assists, cards, average
+    rating and per-90 rates per player, league, season and team.
+
+    refresh_fixtures() recomputes only the player-seasons that appear in the
+    given fixtures (the ones a process_player_stats run touched), so a run's
+    cost follows the size of the update rather than of the history.
+    rebuild() recomputes everything; verify() compares the table against a
+    full recomputation without writing.
+    """
+
+    def __init__(self, db_handler: Optional[PostgresHandler] = None):
+        self.db_handler = db_handler or PostgresHandler()
+
+    def _refresh(self, affected_sql: str, params: tuple) -> Dict[str, int]:
+        """
+        Upsert the aggregates of the player-seasons in `affected_sql` and
+        delete their rows that no longer have stats (e.g. a corrected team).
+        """
+        match_keys = ' AND '.join(f"x.{col} = f.{col}" for col in KEY_COLUMNS)
+        query = f"""
+            WITH affected AS (
+                {affected_sql}
+            ),
+            fresh AS (
+                {AGGREGATE_SQL.format(scope='(s.player_id, m.league_id, m.season) IN (SELECT player_id, league_id, season FROM affected)')}
+            ),
+            removed AS (
+                DELETE FROM fact_player_season f
+                WHERE (f.player_id, f.league_id, f.season) IN (SELECT player_id, league_id, season FROM affected)
+                AND NOT EXISTS (SELECT 1 FROM fresh x WHERE {match_keys})
+                RETURNING 1
+            ),
+            upserted AS (
+                INSERT INTO fact_player_season AS t ({', '.join(COLUMNS)})
+                SELECT {', '.join(COLUMNS)} FROM fresh
+                ON CONFLICT ({', '.join(KEY_COLUMNS)}) DO UPDATE
+                SET {', '.join(f"{col} = EXCLUDED.{col}" for col in VALUE_COLUMNS)}, updated_at = NOW()
+                WHERE ({', '.join(f"t.{col}" for col in VALUE_COLUMNS)})
+                    IS DISTINCT FROM ({', '.join(f"EXCLUDED.{col}" for col in VALUE_COLUMNS)})
+                RETURNING (xmax = 0) AS inserted
+            )
+            SELECT
+                (SELECT COUNT(*) FROM affected),
+                COUNT(*) FILTER (WHERE inserted),
+                COUNT(*) FILTER (WHERE NOT inserted),
+                (SELECT COUNT(*) FROM removed)
+            FROM upserted
+        """
+        player_seasons, inserted, updated, removed = self.db_handler.execute_query(query, params)[0]
+        return {'player_seasons': player_seasons, 'inserted': inserted, 'updated': updated, 'removed': removed}
+
+    def refresh_fixtures(self, fixture_ids: Iterable[int]) -> Dict[str, int]:
+        """Recompute every player-season with stats in these fixtures."""
+        fixture_ids = sorted(set(fixture_ids))
+        if not fixture_ids:
+            return {'player_seasons': 0, 'inserted': 0, 'updated': 0, 'removed': 0}
+        affected_sql = """
+            SELECT DISTINCT s.player_id, m.league_id, m.season
+            FROM fact_player_stats s
+            JOIN matches m ON m.fixture_id = s.fixture_id
+            WHERE s.fixture_id = ANY(%s)
+        """
+        counts = self._refresh(affected_sql, (fixture_ids,))
+        logger.info(f"Refreshed fact_player_season from {len(fixture_ids)} fixtures: {counts}")
+        return counts
+
+    def rebuild(self) -> Dict[str, int]:
+        """Recompute every player-season (and drop rows without stats)."""
+        affected_sql = """
+            SELECT DISTINCT s.player_id, m.league_id, m.season
+            FROM fact_player_stats s
+            JOIN matches m ON m.fixture_id = s.fixture_id
+            UNION
+            SELECT player_id, league_id, season FROM fact_player_season
+        """
+        counts = self._refresh(affected_sql, ())
+        logger.info(f"Rebuilt fact_player_season: {counts}")
+        return counts
+
+    def verify(self) -> Dict[str, int]:
+        """
+        Compare fact_player_season with a full recomputation: rows missing from
+        the table, rows the recomputation doesn't produce, and rows whose
+        values differ. All zero means the incremental maintenance is exact.
+        """
+        columns = ', '.join(COLUMNS)
+        keys = ', '.join(KEY_COLUMNS)
+        query = f"""
+            WITH fresh AS (
+                {AGGREGATE_SQL.format(scope='TRUE')}
+            ),
+            stored AS (
+                SELECT {columns} FROM fact_player_season
+            ),
+            fresh_only AS (SELECT * FROM fresh EXCEPT SELECT * FROM stored),
+            stored_only AS (SELECT * FROM stored EXCEPT SELECT * FROM fresh)
+            SELECT
+                (SELECT COUNT(*) FROM fresh),
+                (SELECT COUNT(*) FROM fresh_only WHERE ({keys}) NOT IN (SELECT {keys} FROM stored)),
+                (SELECT COUNT(*) FROM stored_only WHERE ({keys}) NOT IN (SELECT {keys} FROM fresh)),
+                (SELECT COUNT(*) FROM fresh_only WHERE ({keys}) IN (SELECT {keys} FROM stored))
+        """
+        expected, missing, extra, different = self.db_handler.execute_query(query)[0]
+        result = {'expected': expected, 'missing': missing, 'extra': extra, 'different': different}
+        if missing or extra or different:
+            logger.warning(f"fact_player_season differs from a full recomputation: {result}")
+        return result
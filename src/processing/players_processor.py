@@ -1,161 +1,223 @@
 from pathlib import Path
 import sys
-import pandas as pd
 import json
 import time
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 
 project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
 from src.processing.base_processor import BaseProcessor
+from src.processing.records import PlayerRow, PlayerProfileRow, PlayerStatRow
+from src.processing.latest_appearance import LatestAppearance
+from src.processing.player_season import PlayerSeasonAggregate
 from src.utils.logger import setup_logger
+from src.utils.profiling import profile_method
 
 logger = setup_logger(__name__, 'processing.log')
 
+def _to_int(value) -> int:
+    """Coerce API counters to int; missing or malformed values become 0 (Postgres INTEGER columns)."""
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _to_rating(value) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_player_stats_responses(raw_responses) -> Tuple[List[PlayerRow], List[PlayerStatRow]]:
+    """Parse raw /fixtures/players responses into skeleton player and stat rows."""
+    all_players = []
+    all_stats = []
+
+    for raw in raw_responses:
+        fixture_id = None
+        try:
+            # raw structure: (id, endpoint, params, response_data, fetched_at, raw_bytes)
+            response_data = raw[3]
+            request_params = raw[2]
+            fixture_id = request_params.get('fixture')
+
+            if not response_data or not response_data.get('response'):
+                continue
+
+            fixture_players = []
+            fixture_stats = []
+
+            for team_data in response_data['response']:
+                team_id = team_data['team']['id']
+
+                for player_entry in team_data['players']:
+                    player_info = player_entry['player']
+                    stats_info = player_entry['statistics'][0]
+                    games = stats_info['games']
+                    shots = stats_info['shots']
+                    goals = stats_info['goals']
+                    passes = stats_info['passes']
+                    tackles = stats_info['tackles']
+                    duels = stats_info['duels']
+                    dribbles = stats_info['dribbles']
+                    fouls = stats_info['fouls']
+                    cards = stats_info['cards']
+                    penalty = stats_info['penalty']
+
+                    # Dimension row
+                    fixture_players.append(PlayerRow(
+                        player_info['id'],
+                        player_info['name'],
+                        player_info['photo'],
+                    ))
+
+                    # Fact row
+                    fixture_stats.append(PlayerStatRow(
+                        _to_int(fixture_id),
+                        _to_int(player_info['id']),
+                        _to_int(team_id),
+                        _to_int(games['minutes']),
+                        _to_rating(games['rating']),
+                        games['captain'],
+                        games['substitute'],
+                        _to_int(stats_info['offsides']),
+                        _to_int(shots['total']),
+                        _to_int(shots['on']),
+                        _to_int(goals['total']),
+                        _to_int(goals['conceded']),
+                        _to_int(goals['assists']),
+                        _to_int(goals['saves']),
+                        _to_int(passes['total']),
+                        _to_int(passes['key']),
+                        passes['accuracy'],
+                        _to_int(tackles['total']),
+                        _to_int(tackles['blocks']),
+                        _to_int(tackles['interceptions']),
+                        _to_int(duels['total']),
+                        _to_int(duels['won']),
+                        _to_int(dribbles['attempts']),
+                        _to_int(dribbles['success']),
+                        _to_int(dribbles['past']),
+                        _to_int(fouls['drawn']),
+                        _to_int(fouls['committed']),
+                        _to_int(cards['yellow']),
+                        _to_int(cards['red']),
+                        _to_int(penalty['won']),
+                        _to_int(penalty['commited']),
+                        _to_int(penalty['scored']),
+                        _to_int(penalty['missed']),
+                        _to_int(penalty['saved']),
+                    ))
+
+            all_players.extend(fixture_players)
+            all_stats.extend(fixture_stats)
+
+        except Exception as e:
+            logger.error(f"Error processing stats for fixture {fixture_id}: {e}", exc_info=True)
+            continue
+
+    return all_players, all_stats
+
+
 class PlayersProcessor(BaseProcessor):
     """Process detailed player statistics for fixtures."""
     
-    def __init__(self):
-        super().__init__()
+    def __init__(self, profile: Optional[bool] = None):
+        super().__init__(profile=profile)
         # Removed direct API client usage
+        self.season_aggregate = PlayerSeasonAggregate(self.db_handler)
+        self.latest_appearance = LatestAppearance(self.db_handler)
 
-    def process_player_stats(self) -> Dict[str, int]:
+    @profile_method
+    def process_player_stats(self, workers: int = 1) -> Dict[str, int]:
         """
         Process player stats from raw_api_responses table.
+        Parsing can be sharded across a process pool with workers > 1; the
+        merged rows are written in bulk by this process.
         """
         logger.info("Starting player stats processing...")
         
-        # 1. Get raw responses from DB
-        raw_responses = self.get_raw_api_responses('/fixtures/players')
+        # 1. Parse raw responses from DB
+        parsed = self.parse_raw_responses(
+            '/fixtures/players',
+            parse_player_stats_responses,
+            workers=workers
+        )
         
-        if not raw_responses:
+        if parsed is None:
             logger.info("No raw player stats responses found.")
             return {'players_processed': 0, 'stats_entries': 0}
-            
-        logger.info(f"Found {len(raw_responses)} raw player stats responses. Processing...")
-        
+
+        player_rows, stat_rows = parsed
+        logger.info(f"Parsed {len(stat_rows)} player stat rows from {self.parse_stats.get('responses', 0)} raw responses.")
+
         total_players_upserted = 0
         total_stats_upserted = 0
-        
-        for raw in raw_responses:
-            try:
-                # raw structure: (id, endpoint, params, response_data, fetched_at)
-                response_data = raw[3]
-                request_params = raw[2]
-                fixture_id = request_params.get('fixture')
-                
-                if not response_data or not response_data.get('response'):
-                    continue
-                
-                fixture_players = []
-                fixture_stats = []
-                
-                # 3. Parse Response
-                for team_data in response_data['response']:
-                    team_id = team_data['team']['id']
-                    
-                    for player_entry in team_data['players']:
-                        player_info = player_entry['player']
-                        stats_info = player_entry['statistics'][0]
-                        
-                        # Prepare Dimension Record
-                        p_record = {
-                            'player_id': player_info['id'],
-                            'player_name': player_info['name'],
-                            'photo_url': player_info['photo']
-                        }
-                        fixture_players.append(p_record)
-                        
-                        # Prepare Fact Record
-                        s_record = {
-                            'fixture_id': fixture_id,
-                            'player_id': player_info['id'],
-                            'team_id': team_id,
-                            'minutes_played': stats_info['games']['minutes'],
-                            'rating': stats_info['games']['rating'],
-                            'captain': stats_info['games']['captain'],
-                            'substitute': stats_info['games']['substitute'],
-                            'offside': stats_info['offsides'],
-                            'shots_total': stats_info['shots']['total'],
-                            'shots_on_target': stats_info['shots']['on'],
-                            'goals_total': stats_info['goals']['total'],
-                            'goals_conceded': stats_info['goals']['conceded'],
-                            'assists': stats_info['goals']['assists'],
-                            'saves': stats_info['goals']['saves'],
-                            'passes_total': stats_info['passes']['total'],
-                            'passes_key': stats_info['passes']['key'],
-                            'passes_accuracy': stats_info['passes']['accuracy'],
-                            'tackles_total': stats_info['tackles']['total'],
-                            'blocks': stats_info['tackles']['blocks'],
-                            'interceptions': stats_info['tackles']['interceptions'],
-                            'duels_total': stats_info['duels']['total'],
-                            'duels_won': stats_info['duels']['won'],
-                            'dribbles_attempts': stats_info['dribbles']['attempts'],
-                            'dribbles_success': stats_info['dribbles']['success'],
-                            'dribbles_past': stats_info['dribbles']['past'],
-                            'fouls_drawn': stats_info['fouls']['drawn'],
-                            'fouls_committed': stats_info['fouls']['committed'],
-                            'yellow_cards': stats_info['cards']['yellow'],
-                            'red_cards': stats_info['cards']['red'],
-                            'penalty_won': stats_info['penalty']['won'],
-                            'penalty_commited': stats_info['penalty']['commited'],
-                            'penalty_scored': stats_info['penalty']['scored'],
-                            'penalty_missed': stats_info['penalty']['missed'],
-                            'penalty_saved': stats_info['penalty']['saved'],
-                        }
-                        fixture_stats.append(s_record)
-
-                # 4. Upsert Data
-                if fixture_players:
-                    df_p = pd.DataFrame(fixture_players).drop_duplicates(subset=['player_id'])
-                    self.upsert_records(
-                        'dim_players', 
-                        df_p.to_dict('records'), 
-                        ['player_id']
-                    )
-                    total_players_upserted += len(df_p)
-                
-                if fixture_stats:
-                    df_s = pd.DataFrame(fixture_stats)
-                    
-                    # Robust Int Casting: prevent Pandas from sending floats (due to NaNs) to Postgres Integer columns
-                    int_cols = [
-                        'minutes_played', 'offside', 'shots_total', 'shots_on_target', 
-                        'goals_total', 'goals_conceded', 'assists', 'saves', 
-                        'passes_total', 'passes_key', 'tackles_total', 'blocks', 
-                        'interceptions', 'duels_total', 'duels_won', 'dribbles_attempts', 
-                        'dribbles_success', 'dribbles_past', 'fouls_drawn', 'fouls_committed', 
-                        'yellow_cards', 'red_cards', 'penalty_won', 'penalty_commited', 
-                        'penalty_scored', 'penalty_missed', 'penalty_saved'
-                    ]
-                    
-                    # Also include the BIGINT IDs just to be safe with type consistency
-                    id_cols = ['fixture_id', 'player_id', 'team_id']
-                    
-                    for col in int_cols + id_cols:
-                        if col in df_s.columns:
-                            df_s[col] = pd.to_numeric(df_s[col], errors='coerce').fillna(0).astype('int64')
 
-                    df_s['rating'] = pd.to_numeric(df_s['rating'], errors='coerce')
-                    
-                    self.upsert_records(
-                        'fact_player_stats',
-                        df_s.to_dict('records'),
-                        ['fixture_id', 'player_id']
-                    )
-                    total_stats_upserted += len(df_s)
-                    
+        # 2. Upsert dimension rows first (facts reference dim_players)
+        if player_rows:
+            total_players_upserted = sum(self.upsert_rows(player_rows).values())
+
+        # 3. Upsert facts in bulk, falling back to per-fixture writes so one bad
+        # fixture (e.g. a match not processed yet) doesn't block the rest
+        if stat_rows:
+            try:
+                total_stats_upserted = sum(self.upsert_rows(stat_rows).values())
             except Exception as e:
-                logger.error(f"Error processing stats for fixture {fixture_id}: {e}", exc_info=True)
-                continue
+                logger.warning(f"Bulk player stats upsert failed ({e}), retrying per fixture...")
+                by_fixture = {}
+                for row in stat_rows:
+                    by_fixture.setdefault(row.fixture_id, []).append(row)
+                for fixture_id, fixture_rows in by_fixture.items():
+                    try:
+                        total_stats_upserted += sum(self.upsert_rows(fixture_rows).values())
+                    except Exception as e:
+                        logger.error(f"Error processing stats for fixture {fixture_id}: {e}", exc_info=True)
+                        continue
+
+        # 4. Copy match dates onto the stats rows (feeds idx_player_stats_player_date)
+        redated_players = self.sync_stat_match_dates() if stat_rows else set()
+
+        # 5. Season aggregates for the player-seasons in fixtures whose stats changed
+        columns, changed = self.changed_keys.get('fact_player_stats', (['fixture_id', 'player_id'], set()))
+        changed_fixtures = {key[columns.index('fixture_id')] for key in changed}
+        season_counts = self.season_aggregate.refresh_fixtures(changed_fixtures)
+
+        # 6. Latest-appearance pointers of players with new/changed or re-dated stats
+        changed_players = {key[columns.index('player_id')] for key in changed}
+        latest_counts = self.latest_appearance.refresh_players(changed_players | redated_players)
                 
         logger.info(f"Player stats processing complete. Upserted {total_stats_upserted} stat entries.")
         return {
             'players_processed': total_players_upserted,
-            'stats_entries': total_stats_upserted
+            'stats_entries': total_stats_upserted,
+            'season_rows': season_counts['inserted'] + season_counts['updated'],
+            'latest_rows': latest_counts['inserted'] + latest_counts['updated'],
         }
 
+    def sync_stat_match_dates(self) -> set:
+        """
+        Set fact_player_stats.match_date from matches wherever it is missing or
+        stale (e.g. a rescheduled fixture). Returns the ids of the players whose
+        stat rows were updated.
+        """
+        query = """
+            UPDATE fact_player_stats s
+            SET match_date = m.match_date
+            FROM matches m
+            WHERE s.fixture_id = m.fixture_id
+            AND s.match_date IS DISTINCT FROM m.match_date
+            RETURNING s.player_id
+        """
+        rows = self.db_handler.execute_query(query) or []
+        if rows:
+            logger.info(f"Synced match_date on {len(rows)} player stat rows")
+        return {row[0] for row in rows}
+
+    @profile_method
     def process_player_profiles(self) -> Dict[str, int]:
         """
         Process player profiles from /players raw responses (EPL targeted).
@@ -185,38 +247,33 @@ class PlayersProcessor(BaseProcessor):
                     player = item.get('player', {})
                     birth = player.get('birth', {})
                     
-                    p_record = {
-                        'player_id': player.get('id'),
-                        'player_name': player.get('name'),
-                        'firstname': player.get('firstname'),
-                        'lastname': player.get('lastname'),
-                        'age': player.get('age'),
-                        'birth_date': birth.get('date'),
-                        'birth_place': birth.get('place'),
-                        'birth_country': birth.get('country'),
-                        'nationality': player.get('nationality'),
-                        'height': player.get('height'),
-                        'weight': player.get('weight'),
-                        'number': player.get('number'),
-                        'position': player.get('position'),
-                        'photo_url': player.get('photo')
-                    }
-                    all_players.append(p_record)
+                    all_players.append(PlayerProfileRow(
+                        player.get('id'),
+                        player.get('name'),
+                        player.get('firstname'),
+                        player.get('lastname'),
+                        _to_int(player.get('age')),
+                        birth.get('date'),
+                        birth.get('place'),
+                        birth.get('country'),
+                        player.get('nationality'),
+                        player.get('height'),
+                        player.get('weight'),
+                        _to_int(player.get('number')),
+                        player.get('position'),
+                        player.get('photo'),
+                    ))
                     
             except Exception as e:
                 logger.error(f"Error parsing profile response: {e}", exc_info=True)
                 continue
         
         if all_players:
-            df = pd.DataFrame(all_players).drop_duplicates(subset=['player_id'],)
-            
-            # Ensure integer columns don't have NaNs which cast them to float
-            for col in ['age', 'number']:
-                if col in df.columns:
-                    df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype(int)
-            
-            self.upsert_records('dim_players', df.to_dict('records'), ['player_id'])
-            logger.info(f"Upserted {len(df)} player profiles.")
-            return {'profiles_processed': len(df)}
+            # Integer columns are already coerced (missing -> 0) by _to_int;
+            # the newest response wins for players listed more than once
+            counts = self.upsert_rows(all_players, keep='first')
+            profiles_count = sum(counts.values())
+            logger.info(f"Upserted {profiles_count} player profiles.")
+            return {'profiles_processed': profiles_count}
         
         return {'profiles_processed': 0}
@@ -0,0 +1,184 @@
+"""
+Compact row types produced by the processors.
+
+Each record is a slotted dataclass whose field order matches the target
+table's columns, so rows go straight to BaseProcessor.upsert_rows without a
+per-row dict or a DataFrame round trip. TABLE and KEY name the upsert target
+and its conflict columns.
+"""
+from dataclasses import dataclass, fields
+from operator import attrgetter
+from typing import ClassVar, Optional, Tuple
+
+
+def record_columns(record_type) -> Tuple[str, ...]:
+    """Column names of a record type, in insert order."""
+    return tuple(f.name for f in fields(record_type))
+
+
+def record_values(record_type):
+    """Fast row -> tuple getter for a record type (avoids dataclasses.astuple deep copies)."""
+    return attrgetter(*record_columns(record_type))
+
+
+@dataclass(slots=True)
+class VenueRow:
+    TABLE: ClassVar[str] = 'dim_venues'
+    KEY: ClassVar[Tuple[str, ...]] = ('venue_id',)
+
+    venue_id: int
+    venue_name: Optional[str]
+    address: Optional[str]
+    city: Optional[str]
+    capacity: Optional[int]
+    surface: Optional[str]
+    image_url: Optional[str]
+
+
+@dataclass(slots=True)
+class FixtureVenueRow:
+    """The subset of venue columns present on /fixtures; leaves address, capacity etc. untouched."""
+    TABLE: ClassVar[str] = 'dim_venues'
+    KEY: ClassVar[Tuple[str, ...]] = ('venue_id',)
+
+    venue_id: int
+    venue_name: Optional[str]
+    city: Optional[str]
+
+
+@dataclass(slots=True)
+class TeamRow:
+    TABLE: ClassVar[str] = 'dim_teams'
+    KEY: ClassVar[Tuple[str, ...]] = ('team_id',)
+
+    team_id: int
+    team_name: Optional[str]
+    short_name: Optional[str]
+    team_code: Optional[str]
+    country: Optional[str]
+    founded_year: Optional[int]
+    is_national: bool
+    logo_url: Optional[str]
+    venue_id: Optional[int]
+
+
+@dataclass(slots=True)
+class MatchRow:
+    TABLE: ClassVar[str] = 'matches'
+    KEY: ClassVar[Tuple[str, ...]] = ('fixture_id',)
+
+    fixture_id: int
+    league_id: Optional[int]
+    season: Optional[int]
+    home_team_id: Optional[int]
+    away_team_id: Optional[int]
+    venue_id: Optional[int]
+    match_date: Optional[str]
+    round: Optional[str]
+    status: Optional[str]
+    status_long: Optional[str]
+    referee: Optional[str]
+    timezone: Optional[str]
+    home_goals: Optional[int]
+    away_goals: Optional[int]
+    halftime_home_goals: Optional[int]
+    halftime_away_goals: Optional[int]
+    fulltime_home_goals: Optional[int]
+    fulltime_away_goals: Optional[int]
+    extratime_home_goals: Optional[int]
+    extratime_away_goals: Optional[int]
+    penalty_home_goals: Optional[int]
+    penalty_away_goals: Optional[int]
+    winner: Optional[str]
+
+
+@dataclass(slots=True)
+class StandingRow:
+    TABLE: ClassVar[str] = 'fact_standings'
+    KEY: ClassVar[Tuple[str, ...]] = ('league_id', 'season', 'team_id')
+
+    league_id: int
+    season: int
+    rank: Optional[int]
+    team_id: int
+    points: Optional[int]
+    goals_diff: Optional[int]
+    form: Optional[str]
+    played: Optional[int]
+    win: Optional[int]
+    draw: Optional[int]
+    lose: Optional[int]
+    description: Optional[str]
+
+
+@dataclass(slots=True)
+class PlayerRow:
+    """Skeleton player created from match stats; full profiles use PlayerProfileRow."""
+    TABLE: ClassVar[str] = 'dim_players'
+    KEY: ClassVar[Tuple[str, ...]] = ('player_id',)
+
+    player_id: int
+    player_name: Optional[str]
+    photo_url: Optional[str]
+
+
+@dataclass(slots=True)
+class PlayerProfileRow:
+    TABLE: ClassVar[str] = 'dim_players'
+    KEY: ClassVar[Tuple[str, ...]] = ('player_id',)
+
+    player_id: int
+    player_name: Optional[str]
+    firstname: Optional[str]
+    lastname: Optional[str]
+    age: int
+    birth_date: Optional[str]
+    birth_place: Optional[str]
+    birth_country: Optional[str]
+    nationality: Optional[str]
+    height: Optional[str]
+    weight: Optional[str]
+    number: int
+    position: Optional[str]
+    photo_url: Optional[str]
+
+
+@dataclass(slots=True)
+class PlayerStatRow:
+    TABLE: ClassVar[str] = 'fact_player_stats'
+    KEY: ClassVar[Tuple[str, ...]] = ('fixture_id', 'player_id')
+
+    fixture_id: int
+    player_id: int
+    team_id: int
+    minutes_played: int
+    rating: Optional[float]
+    captain: Optional[bool]
+    substitute: Optional[bool]
+    offside: int
+    shots_total: int
+    shots_on_target: int
+    goals_total: int
+    goals_conceded: int
+    assists: int
+    saves: int
+    passes_total: int
+    passes_key: int
+    passes_accuracy: Optional[str]
+    tackles_total: int
+    blocks: int
+    interceptions: int
+    duels_total: int
+    duels_won: int
+    dribbles_attempts: int
+    dribbles_success: int
+    dribbles_past: int
+    fouls_drawn: int
+    fouls_committed: int
+    yellow_cards: int
+    red_cards: int
+    penalty_won: int
+    penalty_commited: int
+    penalty_scored: int
+    penalty_missed: int
+    penalty_saved: int
@@ -5,11 +5,13 @@ project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 from src.processing.base_processor import BaseProcessor
 from src.utils.logger import setup_logger
+from src.utils.profiling import profile_method
 
 logger = setup_logger(__name__, 'processing.log')
 
 
 class SeasonsProcessor(BaseProcessor):
+    @profile_method
     def process_seasons(self) -> int:
         logger.info("Starting seasons processing...")
 
@@ -1,15 +1,17 @@
 from src.processing.base_processor import BaseProcessor
+from src.processing.records import StandingRow
 from src.utils.logger import setup_logger
-import pandas as pd
+from src.utils.profiling import profile_method
 import logging
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 
 logger = setup_logger(__name__, 'processing.log')
 
 class StandingsProcessor(BaseProcessor):
-    def __init__(self):
-        super().__init__()
+    def __init__(self, profile: Optional[bool] = None):
+        super().__init__(profile=profile)
 
+    @profile_method
     def process_standings(self) -> int:
         """
         Fetch raw standings data and process into fact_standings.
@@ -41,40 +43,31 @@ class StandingsProcessor(BaseProcessor):
                         team = row.get('team', {})
                         all_matches = row.get('all', {})
                         
-                        standing_record = {
-                            'league_id': league_id,
-                            'season': season,
-                            'rank': row.get('rank'),
-                            'team_id': team.get('id'),
-                            'points': row.get('points'),
-                            'goals_diff': row.get('goalsDiff'),
-                            'form': row.get('form'),
-                            'played': all_matches.get('played'),
-                            'win': all_matches.get('win'),
-                            'draw': all_matches.get('draw'),
-                            'lose': all_matches.get('lose'),
-                            'description': row.get('description'),
-                            'updated_at': 'NOW()' # psycopg2 will handle this if passed correctly, but upsert_records uses df.values
-                        }
-                        all_standings.append(standing_record)
+                        all_standings.append(StandingRow(
+                            league_id,
+                            season,
+                            row.get('rank'),
+                            team.get('id'),
+                            row.get('points'),
+                            row.get('goalsDiff'),
+                            row.get('form'),
+                            all_matches.get('played'),
+                            all_matches.get('win'),
+                            all_matches.get('draw'),
+                            all_matches.get('lose'),
+                            row.get('description'),
+                        ))
 
         if not all_standings:
             return 0
 
-        df = pd.DataFrame(all_standings)
-        # Drop updated_at from dataframe for manual inclusion in query or use current time
-        df['updated_at'] = pd.Timestamp.now()
-        
         # Ensure we only keep the latest record for each unique combination
         # Actually, since we process multiple raw responses, we should probably deduplicate
         # by league_id, season, team_id and keep the latest rank/points.
-        df = df.drop_duplicates(subset=['league_id', 'season', 'team_id'], keep='last')
-
-        standings_count = self.upsert_records(
-            table_name='fact_standings',
-            records=df.to_dict('records'),
-            conflict_columns=['league_id', 'season', 'team_id']
-        )
+        # upsert_rows deduplicates on StandingRow.KEY; updated_at is bumped only
+        # when a row actually changes
+        counts = self.upsert_rows(all_standings)
+        standings_count = sum(counts.values())
 
         logger.info(f"Standings processing completed: {standings_count} entries")
         return standings_count
@@ -1,17 +1,19 @@
 from pathlib import Path
 import sys
-import pandas as pd
 import json
 
 project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
 from src.processing.base_processor import BaseProcessor
+from src.processing.records import TeamRow, VenueRow
 from src.utils.logger import setup_logger
+from src.utils.profiling import profile_method
 
 logger = setup_logger(__name__, 'processing.log')
 
 class TeamsProcessor(BaseProcessor):
+    @profile_method
     def process_teams_and_venues(self, seasons=None) -> dict:
 
         logger.info("Starting teams and venues processing...")
@@ -67,63 +69,45 @@ class TeamsProcessor(BaseProcessor):
                 venue = item.get('venue', {})
 
                 # Process team record
-                team_record = {
-                    'team_id': team.get('id'),
-                    'team_name': team.get('name'),
-                    'short_name': team.get('code'),  # 3-letter code (e.g., MUN)
-                    'team_code': team.get('code'),
-                    'country': team.get('country'),
-                    'founded_year': team.get('founded'),
-                    'is_national': team.get('national', False),
-                    'logo_url': team.get('logo'),
-                    'venue_id': venue.get('id')  # Foreign key to venues
-                }
-                all_teams.append(team_record)
+                all_teams.append(TeamRow(
+                    team.get('id'),
+                    team.get('name'),
+                    team.get('code'),  # short_name: 3-letter code (e.g., MUN)
+                    team.get('code'),
+                    team.get('country'),
+                    team.get('founded'),
+                    team.get('national', False),
+                    team.get('logo'),
+                    venue.get('id')  # Foreign key to venues
+                ))
 
                 # Process venue record (if exists)
                 if venue.get('id'):
-                    venue_record = {
-                        'venue_id': venue.get('id'),
-                        'venue_name': venue.get('name'),
-                        'address': venue.get('address'),
-                        'city': venue.get('city'),
-                        'capacity': venue.get('capacity'),
-                        'surface': venue.get('surface'),
-                        'image_url': venue.get('image')
-                    }
-                    all_venues.append(venue_record)
+                    all_venues.append(VenueRow(
+                        venue.get('id'),
+                        venue.get('name'),
+                        venue.get('address'),
+                        venue.get('city'),
+                        venue.get('capacity'),
+                        venue.get('surface'),
+                        venue.get('image')
+                    ))
         
         logger.info(f"Extracted data from seasons: {sorted(seasons_processed)}")
         logger.info(f"Total teams before dedup: {len(all_teams)}")
         logger.info(f"Total venues before dedup: {len(all_venues)}")
 
-        # Remove duplicates
-        df_teams = pd.DataFrame(all_teams)
-        df_teams = df_teams.drop_duplicates(subset=['team_id'], keep='last')
-
-        df_venues = pd.DataFrame(all_venues)
-        df_venues = df_venues.drop_duplicates(subset=['venue_id'], keep='last')
-
-        logger.info(f"After deduplication: {len(df_teams)} unique teams, {len(df_venues)} unique venues")
-
-        # Upsert venues first (teams reference venues)
+        # Upsert venues first (teams reference venues); upsert_rows removes
+        # duplicates, keeping the last record per id
         venues_count = 0
-        if not df_venues.empty:
-            venues_count = self.upsert_records(
-                table_name='dim_venues',
-                records=df_venues.to_dict('records'),
-                conflict_columns=['venue_id']
-            )
+        if all_venues:
+            venues_count = sum(self.upsert_rows(all_venues).values())
             logger.info(f"Processed {venues_count} venues")
         
         # Upsert teams
         teams_count = 0
-        if not df_teams.empty:
-            teams_count = self.upsert_records(
-                table_name='dim_teams',
-                records=df_teams.to_dict('records'),
-                conflict_columns=['team_id']
-            )
+        if all_teams:
+            teams_count = sum(self.upsert_rows(all_teams).values())
             logger.info(f"Processed {teams_count} teams")
 
         logger.info(f"Teams and venues processing completed!")
@@ -0,0 +1,139 @@
+import json
+import select
+import psycopg2
+from psycopg2.extras import execute_values
+from pathlib import Path
+import sys
+from typing import Dict, List, Optional, Any, Iterator
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+from src.storage.postgres_handler import PostgresHandler
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__, 'database.log')
+
+# Entity set reported by the processors -> entity_type stored in the change log
+ENTITY_TYPES = {
+    'fixture_ids': 'fixture',
+    'player_ids': 'player',
+    'team_ids': 'team',
+    'standings': 'standings',
+}
+
+# NOTIFY payloads must stay under 8000 bytes
+MAX_NOTIFY_BYTES = 7500
+
+
+def format_entity_key(key) -> str:
+    """Scalar ids are stored as-is; (league_id, season) standings keys as '39:2024'."""
+    if isinstance(key, tuple):
+        return ':'.join(str(part) for part in key)
+    return str(key)
+
+
+class ChangeFeed:
+    """
+    Changed-entity feed written by the processing pipeline.
+
+    Every run appends the keys it inserted/updated to pipeline_change_log and
+    sends one NOTIFY on CHANNEL in the same transaction, so listeners only hear
+    about changes that were committed. The payload carries the run_id and
+    per-type counts (plus the keys themselves when they fit); consumers can
+    always read the full set back with get_changes(run_id=...).
+    """
+
+    CHANNEL = 'epl_changes'
+
+    def __init__(self, db_handler: Optional[PostgresHandler] = None):
+        self.db_handler = db_handler or PostgresHandler()
+
+    def publish(self, run_id: str, changes: Dict[str, set]) -> Dict[str, int]:
+        rows = [
+            (run_id, ENTITY_TYPES[name], format_entity_key(key))
+            for name, keys in changes.items()
+            for key in keys
+        ]
+        counts = {ENTITY_TYPES[name]: len(keys) for name, keys in changes.items()}
+
+        if not rows:
+            logger.info(f"Run {run_id}: no changed entities to publish")
+            return counts
+
+        payload = {'run_id': run_id, 'counts': counts}
+        with_keys = dict(payload, keys={
+            ENTITY_TYPES[name]: sorted(format_entity_key(key) for key in keys)
+            for name, keys in changes.items() if keys
+        })
+        if len(json.dumps(with_keys)) <= MAX_NOTIFY_BYTES:
+            payload = with_keys
+
+        with self.db_handler.get_connection() as conn:
+            with conn.cursor() as cur:
+                execute_values(
+                    cur,
+                    "INSERT INTO pipeline_change_log (run_id, entity_type, entity_key) VALUES %s",
+                    rows,
+                    page_size=500
+                )
+                cur.execute("SELECT pg_notify(%s, %s)", (self.CHANNEL, json.dumps(payload)))
+
+        logger.info(f"Run {run_id}: published {len(rows)} changed entities {counts}")
+        return counts
+
+    def get_changes(self, run_id: Optional[str] = None, since_change_id: Optional[int] = None,
+                    entity_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Read change log entries for a run and/or after a change_id checkpoint."""
+        conditions, params = [], []
+        if run_id:
+            conditions.append("run_id = %s")
+            params.append(run_id)
+        if since_change_id is not None:
+            conditions.append("change_id > %s")
+            params.append(since_change_id)
+        if entity_type:
+            conditions.append("entity_type = %s")
+            params.append(entity_type)
+
+        query = f"""
+            SELECT change_id, run_id, entity_type, entity_key, changed_at
+            FROM pipeline_change_log
+            {'WHERE ' + ' AND '.join(conditions) if conditions else ''}
+            ORDER BY change_id
+        """
+        results = self.db_handler.execute_query(query, tuple(params))
+        return [
+            {
+                'change_id': row[0],
+                'run_id': row[1],
+                'entity_type': row[2],
+                'entity_key': row[3],
+                'changed_at': row[4],
+            }
+            for row in results or []
+        ]
+
+    def listen(self, timeout: float = 60.0) -> Iterator[Dict[str, Any]]:
+        """
+        Block on LISTEN and yield each decoded payload as it arrives.
+        Yields nothing for a quiet timeout period and then keeps waiting; close
+        the generator to stop listening.
+        """
+        conn = psycopg2.connect(**self.db_handler.connection_params)
+        conn.autocommit = True
+        try:
+            with conn.cursor() as cur:
+                cur.execute(f"LISTEN {self.CHANNEL}")
+            logger.info(f"Listening for changes on '{self.CHANNEL}'...")
+            while True:
+                if select.select([conn], [], [], timeout) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    notify = conn.notifies.pop(0)
+                    try:
+                        yield json.loads(notify.payload)
+                    except ValueError:
+                        logger.warning(f"Ignoring malformed change payload: {notify.payload[:200]}")
+        finally:
+            conn.close()
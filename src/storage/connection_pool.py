@@ -0,0 +1,124 @@
+import re
+import threading
+from pathlib import Path
+import sys
+from typing import Any, Dict, List
+
+import psycopg2
+import psycopg2.extensions
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__, 'database.log')
+
+# psycopg2 placeholders: %(name)s, %s, and the %% escape
+_PLACEHOLDER = re.compile(r'%\((\w+)\)s|%s|%%')
+
+
+class PooledConnection(psycopg2.extensions.connection):
+    """A connection that remembers which prepared statements exist on its session."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared = set()
+        self.pool = None
+        self.uses = 0
+
+
+class ConnectionPool:
+    """
+    Keeps up to `size` idle connections to one server for reuse.
+
+    acquire() hands out an idle connection or opens a new one; release()
+    keeps it if there's room and it's still open, so an exhausted pool
+    never blocks, it just opens short-lived extra connections. A connection
+    that broke (closed by psycopg2 after a server or network error) is
+    dropped along with its prepared statements; its replacement prepares
+    them again on first use.
+    """
+
+    def __init__(self, connection_params: Dict[str, Any], size: int):
+        self.connection_params = dict(connection_params, connection_factory=PooledConnection)
+        self.size = size
+        self._idle: List[PooledConnection] = []
+        self._lock = threading.Lock()
+
+    def acquire(self) -> PooledConnection:
+        with self._lock:
+            while self._idle:
+                conn = self._idle.pop()
+                if not conn.closed:
+                    conn.uses += 1
+                    return conn
+        conn = psycopg2.connect(**self.connection_params)
+        conn.pool = self
+        conn.uses = 1
+        return conn
+
+    def release(self, conn: PooledConnection):
+        if not conn.closed and conn.info.transaction_status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                conn.close()
+        if conn.closed:
+            logger.warning(f"Dropping a broken pooled connection after {conn.uses} uses")
+            return
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+class PreparedStatement:
+    """
+    A query kept as a named server-side prepared statement.
+
+    The query is written like any other (psycopg2 %s / %(name)s
+    placeholders); it's rewritten to $n parameters once. execute() issues
+    PREPARE the first time a connection sees the statement and EXECUTE from
+    then on, so the server parses and plans it once per session (generic
+    plans once the custom ones stop paying off).
+    """
+
+    def __init__(self, name: str, query: str):
+        self.name = name
+        self.args = []  # per $n: positional index or parameter name
+        named = {}
+
+        def number(match):
+            token = match.group(0)
+            if token == '%%':
+                return '%'
+            key = match.group(1)
+            if key is None:
+                key = sum(1 for a in self.args if isinstance(a, int))
+            elif key in named:
+                return f'${named[key]}'
+            self.args.append(key)
+            if isinstance(key, str):
+                named[key] = len(self.args)
+            return f'${len(self.args)}'
+
+        self.sql = _PLACEHOLDER.sub(number, query)
+        placeholders = ', '.join(['%s'] * len(self.args))
+        self.execute_sql = f"EXECUTE {name} ({placeholders})" if self.args else f"EXECUTE {name}"
+
+    def values(self, params) -> List[Any]:
+        return [params[arg] for arg in self.args]
+
+    def execute(self, cur, params=None):
+        prepared = cur.connection.prepared
+        if self.name not in prepared:
+            cur.execute(f"PREPARE {self.name} AS {self.sql}")
+            prepared.add(self.name)
+        cur.execute(self.execute_sql, self.values(params) if self.args else None)
@@ -0,0 +1,131 @@
+from pathlib import Path
+import sys
+from typing import List, Dict, Optional
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+from src.storage.postgres_handler import PostgresHandler
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__, 'database.log')
+
+# Managed index set: one entry per hot access path, with the query it serves.
+# Keep sql/ddl/create_tables.sql in step; scripts/check_query_plans.py verifies
+# the plans against a synthetic database.
+MANAGED_INDEXES = [
+    {
+        'name': 'idx_raw_endpoint_fetched',
+        'serves': 'BaseProcessor.get_raw_api_responses (endpoint, newest first)',
+        'ddl': "CREATE INDEX IF NOT EXISTS idx_raw_endpoint_fetched ON raw_api_responses(endpoint, fetched_at DESC)",
+    },
+    {
+        'name': 'idx_raw_endpoint_response',
+        'serves': 'BaseProcessor.get_raw_response_ids / parse shards (endpoint, response_id range)',
+        'ddl': "CREATE INDEX IF NOT EXISTS idx_raw_endpoint_response ON raw_api_responses(endpoint, response_id)",
+    },
+    {
+        'name': 'idx_matches_completed_date',
+        'serves': "Completed matches newest first (status IN ('FT','AET','PEN'))",
+        'ddl': """
+            CREATE INDEX IF NOT EXISTS idx_matches_completed_date
+            ON matches(match_date DESC)
+            WHERE status IN ('FT', 'AET', 'PEN')
+        """,
+    },
+    {
+        'name': 'idx_match_summary_home_date',
+        'serves': 'QueryEngine team results / head-to-head (home side)',
+        'ddl': "CREATE INDEX IF NOT EXISTS idx_match_summary_home_date ON match_summary(home_team_id, match_date DESC)",
+    },
+    {
+        'name': 'idx_match_summary_away_date',
+        'serves': 'QueryEngine team results / head-to-head (away side)',
+        'ddl': "CREATE INDEX IF NOT EXISTS idx_match_summary_away_date ON match_summary(away_team_id, match_date DESC)",
+    },
+    {
+        'name': 'idx_matches_home_team_date',
+        'serves': 'Team match lookups on matches (home side)',
+        'ddl': "CREATE INDEX IF NOT EXISTS idx_matches_home_team_date ON matches(home_team_id, match_date DESC)",
+    },
+    {
+        'name': 'idx_matches_away_team_date',
+        'serves': 'Team match lookups on matches (away side)',
+        'ddl': "CREATE INDEX IF NOT EXISTS idx_matches_away_team_date ON matches(away_team_id, match_date DESC)",
+    },
+    {
+        'name': 'idx_matches_league_season',
+        'serves': 'Season-scoped match lookups',
+        'ddl': "CREATE INDEX IF NOT EXISTS idx_matches_league_season ON matches(league_id, season)",
+    },
+    {
+        'name': 'idx_player_stats_player_date',
+        'serves': 'LatestAppearance refresh (player_id, latest match_date)',
+        'ddl': """
+            CREATE INDEX IF NOT EXISTS idx_player_stats_player_date
+            ON fact_player_stats(player_id, match_date DESC NULLS LAST)
+        """,
+    },
+    {
+        'name': 'idx_players_skeleton',
+        'serves': 'Datafetcher.fetch_and_store_missing_player_profiles (firstname IS NULL)',
+        'ddl': "CREATE INDEX IF NOT EXISTS idx_players_skeleton ON dim_players(player_id) WHERE firstname IS NULL",
+    },
+    {
+        'name': 'idx_players_name_trgm',
+        'serves': "QueryEngine.search_player (player_name ILIKE '%...%')",
+        'extension': 'pg_trgm',
+        'ddl': "CREATE INDEX IF NOT EXISTS idx_players_name_trgm ON dim_players USING gin (player_name gin_trgm_ops)",
+    },
+]
+
+# Superseded by a managed index above
+RETIRED_INDEXES = [
+    'idx_player_stats_player',  # prefix of idx_player_stats_player_date
+    'idx_raw_player_stats_fixture',  # pending fixtures come from ingestion_ledger's primary key
+]
+
+
+def ensure_indexes(db_handler: Optional[PostgresHandler] = None) -> Dict[str, List[str]]:
+    """
+    Create every managed index that is missing and drop retired ones.
+    Indexes needing an extension that can't be installed are skipped with a
+    warning. Returns the names created/skipped/dropped.
+    """
+    db_handler = db_handler or PostgresHandler()
+    result = {'ensured': [], 'skipped': [], 'dropped': []}
+
+    for index in MANAGED_INDEXES:
+        extension = index.get('extension')
+        try:
+            with db_handler.get_connection() as conn:
+                with conn.cursor() as cur:
+                    if extension:
+                        cur.execute(f"CREATE EXTENSION IF NOT EXISTS {extension}")
+                    cur.execute(index['ddl'])
+            result['ensured'].append(index['name'])
+        except Exception as e:
+            if not extension:
+                raise
+            logger.warning(f"Skipping index {index['name']}: extension {extension} unavailable ({e})")
+            result['skipped'].append(index['name'])
+
+    with db_handler.get_connection() as conn:
+        with conn.cursor() as cur:
+            for name in RETIRED_INDEXES:
+                cur.execute(f"DROP INDEX IF EXISTS {name}")
+                result['dropped'].append(name)
+
+    logger.info(f"Managed indexes: {len(result['ensured'])} ensured, "
+                f"{len(result['skipped'])} skipped, {len(result['dropped'])} retired")
+    return result
+
+
+def missing_indexes(db_handler: Optional[PostgresHandler] = None) -> List[str]:
+    """Managed index names not present in the database."""
+    db_handler = db_handler or PostgresHandler()
+    rows = db_handler.execute_query(
+        "SELECT indexname FROM pg_indexes WHERE indexname = ANY(%s)",
+        ([index['name'] for index in MANAGED_INDEXES],)
+    )
+    present = {row[0] for row in rows or []}
+    return [index['name'] for index in MANAGED_INDEXES if index['name'] not in present]
@@ -0,0 +1,134 @@
+from pathlib import Path
+import sys
+from typing import List, Tuple, Optional, Dict, Any
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+from src.storage.postgres_handler import PostgresHandler
+from src.utils.configs import config
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__, 'ingestion.log')
+
+# Ledger statuses
+FETCHED = 'fetched'
+FAILED = 'failed'        # will be retried
+ABANDONED = 'abandoned'  # failed max_attempts times; no longer retried
+
+MARK_FETCHED_SQL = """
+    INSERT INTO ingestion_ledger AS l (endpoint, entity_id, status, attempts, response_id,
+                                       first_attempt_at, last_attempt_at, fetched_at)
+    VALUES (%s, %s, 'fetched', 1, %s, NOW(), NOW(), NOW())
+    ON CONFLICT (endpoint, entity_id) DO UPDATE
+    SET status = 'fetched',
+        attempts = l.attempts + 1,
+        response_id = EXCLUDED.response_id,
+        last_error = NULL,
+        last_attempt_at = NOW(),
+        fetched_at = NOW()
+"""
+
+
+class IngestionLedger:
+    """
+    Fetch status per (endpoint, entity_id), e.g. ('/fixtures/players', fixture_id).
+
+    A successful fetch is marked in the same transaction as its raw insert
+    (PostgresHandler.insert_raw_responses(..., ledger_entity_id=...)), so the
+    ledger never claims a response that wasn't stored. Failures bump attempts
+    and keep the last error; after max_attempts the entity is abandoned and
+    drops out of pending().
+    """
+
+    def __init__(self, db_handler: Optional[PostgresHandler] = None, max_attempts: Optional[int] = None):
+        self.db_handler = db_handler or PostgresHandler()
+        self.max_attempts = max_attempts or config.LEDGER_MAX_ATTEMPTS
+
+    @staticmethod
+    def mark_fetched(cur, endpoint: str, entity_id: int, response_id: int):
+        """Record a stored response using the caller's cursor (and transaction)."""
+        cur.execute(MARK_FETCHED_SQL, (endpoint, entity_id, response_id))
+
+    def record_failure(self, endpoint: str, entity_id: int, error: str) -> str:
+        """Count a failed attempt; returns the resulting status ('failed' or 'abandoned')."""
+        query = """
+            INSERT INTO ingestion_ledger AS l (endpoint, entity_id, status, attempts, last_error,
+                                               first_attempt_at, last_attempt_at)
+            VALUES (%s, %s, CASE WHEN %s <= 1 THEN 'abandoned' ELSE 'failed' END, 1, %s, NOW(), NOW())
+            ON CONFLICT (endpoint, entity_id) DO UPDATE
+            SET attempts = l.attempts + 1,
+                status = CASE WHEN l.attempts + 1 >= %s THEN 'abandoned' ELSE 'failed' END,
+                last_error = EXCLUDED.last_error,
+                last_attempt_at = NOW()
+            WHERE l.status <> 'fetched'
+            RETURNING l.status, l.attempts
+        """
+        error = (error or 'unknown error')[:1000]
+        results = self.db_handler.execute_query(
+            query, (endpoint, entity_id, self.max_attempts, error, self.max_attempts)
+        )
+        if not results:
+            return FETCHED
+        status, attempts = results[0]
+        if status == ABANDONED:
+            logger.warning(f"Giving up on {endpoint} {entity_id} after {attempts} attempts: {error}")
+        return status
+
+    def pending_fixtures(self, limit: int) -> List[Tuple[int, Any]]:
+        """
+        Completed matches whose player stats are neither fetched nor abandoned,
+        newest first: (fixture_id, match_date). An anti join probing the
+        ledger's primary key while walking idx_matches_completed_date.
+        """
+        query = """
+            SELECT m.fixture_id, m.match_date
+            FROM matches m
+            WHERE m.status IN ('FT', 'AET', 'PEN')
+            AND NOT EXISTS (
+                SELECT 1
+                FROM ingestion_ledger l
+                WHERE l.endpoint = '/fixtures/players'
+                AND l.entity_id = m.fixture_id
+                AND l.status IN ('fetched', 'abandoned')
+            )
+            ORDER BY m.match_date DESC
+            LIMIT %s
+        """
+        return self.db_handler.execute_query(query, (limit,)) or []
+
+    def backfill_from_raw(self, endpoint: str, param_key: str) -> int:
+        """
+        Mark entities that already have a raw response as fetched (one-off for
+        databases that predate the ledger). Idempotent.
+        """
+        query = """
+            INSERT INTO ingestion_ledger (endpoint, entity_id, status, attempts, response_id,
+                                          first_attempt_at, last_attempt_at, fetched_at)
+            SELECT endpoint, (request_params->>%s)::bigint, 'fetched', 1, MAX(response_id),
+                   MIN(fetched_at), MAX(fetched_at), MAX(fetched_at)
+            FROM raw_api_responses
+            WHERE endpoint = %s
+            AND request_params->>%s ~ '^[0-9]+$'
+            GROUP BY endpoint, (request_params->>%s)::bigint
+            ON CONFLICT (endpoint, entity_id) DO NOTHING
+        """
+        with self.db_handler.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(query, (param_key, endpoint, param_key, param_key))
+                inserted = cur.rowcount
+        logger.info(f"Ledger backfill for {endpoint}: {inserted} entities marked fetched")
+        return inserted
+
+    def summary(self, endpoint: Optional[str] = None) -> Dict[str, Dict[str, int]]:
+        """endpoint -> {status: count}."""
+        query = f"""
+            SELECT endpoint, status, COUNT(*)
+            FROM ingestion_ledger
+            {'WHERE endpoint = %s' if endpoint else ''}
+            GROUP BY endpoint, status
+        """
+        results = self.db_handler.execute_query(query, (endpoint,) if endpoint else None)
+        summary = {}
+        for row_endpoint, status, count in results or []:
+            summary.setdefault(row_endpoint, {})[status] = count
+        return summary
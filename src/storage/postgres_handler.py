@@ -1,4 +1,5 @@
 import psycopg2
+import psycopg2.errors
 from psycopg2.extras import execute_values, RealDictCursor
 from typing import List, Dict, Optional, Any
 from pathlib import Path
@@ -9,6 +10,10 @@ project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 from src.utils.configs import config
 from src.utils.logger import setup_logger
+from src.storage.statement_stats import TimedCursor, statement_stats
+from src.storage.projections import storage_payloads
+from src.storage.replica import get_monitor
+from src.storage.connection_pool import ConnectionPool, PreparedStatement
 from contextlib import contextmanager
 
 from src.ingestion.api_client import FootballAPIClient
@@ -16,9 +21,21 @@ from src.ingestion.api_client import FootballAPIClient
 logger = setup_logger(__name__, 'database.log')
 
 class PostgresHandler:
-    """Handler for PostgreSQL database operations."""
-    
-    def __init__(self):
+    """
+    Handler for PostgreSQL database operations.
+
+    Connections have a role: 'primary' (writes, and reads that must see them)
+    or 'read'. With POSTGRES_READ_DSN set, 'read' connections go to the
+    replica while its lag is within REPLICA_MAX_LAG_SECONDS and to the
+    primary otherwise. `role` is the default for this handler's connections.
+
+    With pool_size, connections are kept open in a pool per server instead
+    of being opened per call, and execute_prepared() runs statements as
+    server-side prepared statements on them.
+    """
+
+    def __init__(self, connect_timeout: Optional[int] = None, role: str = 'primary', pool_size: int = 0):
+        self.role = role
         self.connection_params = {
             'host': config.POSTGRES_HOST,
             'port': config.POSTGRES_PORT,
@@ -26,46 +43,158 @@ class PostgresHandler:
             'user': config.POSTGRES_USER,
             'password': config.POSTGRES_PASSWORD
         }
+        self.read_params = {'dsn': config.POSTGRES_READ_DSN} if config.POSTGRES_READ_DSN else None
+        for params in filter(None, (self.connection_params, self.read_params)):
+            if connect_timeout:
+                params['connect_timeout'] = connect_timeout
+            if config.QUERY_STATS_ENABLED:
+                # Every statement run through these connections is timed (see statement_stats)
+                params['cursor_factory'] = TimedCursor
+        self.replica = get_monitor(self.read_params, self.connection_params) if self.read_params else None
+        self.pools = {}
+        if pool_size:
+            self.pools['primary'] = ConnectionPool(self.connection_params, pool_size)
+            if self.read_params:
+                self.pools['read'] = ConnectionPool(self.read_params, pool_size)
+        self._statements: Dict[str, PreparedStatement] = {}
+
+    def _open(self, target: str):
+        pool = self.pools.get(target)
+        if pool is not None:
+            return pool.acquire()
+        return psycopg2.connect(**(self.read_params if target == 'read' else self.connection_params))
+
+    def _connect(self, role: str):
+        if role == 'read' and self.replica is not None and self.replica.usable():
+            try:
+                return self._open('read')
+            except psycopg2.OperationalError as e:
+                self.replica.mark_down(e)
+        return self._open('primary')
 
     @contextmanager
-    def get_connection(self):
-        """Context manager for database connections."""
+    def get_connection(self, role: Optional[str] = None):
+        """Context manager for database connections ('primary' or 'read', default self.role)."""
         conn = None
         try:
-            conn = psycopg2.connect(**self.connection_params)
+            conn = self._connect(role or self.role)
             yield conn
             conn.commit()
         except Exception as e:
-            if conn:
+            if conn and not conn.closed:
                 conn.rollback()
+            elif conn and getattr(conn, 'pool', None) is not None:
+                # The server dropped a pooled connection (restart, failover): its
+                # idle siblings are most likely dead too, so reconnect from scratch
+                conn.pool.close()
             logger.error(f"Database error: {e}")
             raise
         finally:
             if conn:
-                conn.close()
+                pool = getattr(conn, 'pool', None)
+                if pool is not None:
+                    pool.release(conn)
+                else:
+                    conn.close()
 
-    def execute_query(self, query, params:Optional[tuple]=None, fetch=True):
-        # query = '''
-
-        #     '''
-        with self.get_connection() as conn:
+    def execute_query(self, query, params:Optional[tuple]=None, fetch=True, timeout_ms: Optional[int] = None,
+                      role: Optional[str] = None):
+        """Run one statement; timeout_ms sets statement_timeout for its transaction."""
+        with self.get_connection(role) as conn:
             with conn.cursor() as cur:
+                if timeout_ms:
+                    cur.execute("SET LOCAL statement_timeout = %s", (int(timeout_ms),))
                 cur.execute(query, params)
                 if fetch:
                     return cur.fetchall() 
                 return None
 
-    def insert_raw_responses(self, endpoint, request_params, response_data):
-        
+    def execute_prepared(self, name: str, query, params=None, fetch=True, timeout_ms: Optional[int] = None,
+                         role: Optional[str] = None):
+        """
+        execute_query() through the prepared statement `name` (PREPAREd once
+        per pooled connection). Without a pool this is plain execute_query().
+        """
+        if not self.pools:
+            return self.execute_query(query, params, fetch, timeout_ms, role)
+        statement = self._statements.get(name)
+        if statement is None:
+            statement = self._statements[name] = PreparedStatement(name, query)
+        for attempt in (1, 2):
+            conn = None
+            try:
+                with self.get_connection(role) as conn:
+                    return self._run_prepared(conn, statement, params, fetch, timeout_ms)
+            except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                # A pooled connection the server dropped while idle (restart,
+                # idle timeout): once more on a new connection (get_connection
+                # has emptied the pool)
+                if attempt == 2 or conn is None or not conn.closed or conn.uses == 1:
+                    raise
+
+    @staticmethod
+    def _run_prepared(conn, statement: PreparedStatement, params, fetch, timeout_ms):
+        for attempt in (1, 2):
+            try:
+                with conn.cursor() as cur:
+                    if timeout_ms:
+                        cur.execute("SET LOCAL statement_timeout = %s", (int(timeout_ms),))
+                    statement.execute(cur, params)
+                    return cur.fetchall() if fetch else None
+            except psycopg2.errors.InvalidSqlStatementName:
+                # Deallocated on the server (DISCARD ALL, a transaction pooler): prepare again
+                if attempt == 2:
+                    raise
+                conn.rollback()
+                conn.prepared.clear()
+
+    def warm_pool(self, role: Optional[str] = None) -> int:
+        """Open the pool's connections now rather than on first use. Returns how many were opened."""
+        size = max((pool.size for pool in self.pools.values()), default=0)
+        if (role or self.role) == 'read' and self.replica is not None:
+            self.replica.check()  # route the warm connections by a current measurement
+        conns = []
+        try:
+            for _ in range(size):
+                conns.append(self._connect(role or self.role))
+        finally:
+            for conn in conns:
+                conn.pool.release(conn)
+        return len(conns)
+
+    def close_pools(self):
+        for pool in self.pools.values():
+            pool.close()
+
+    @staticmethod
+    def get_statement_stats(order_by: str = 'total_ms', limit: Optional[int] = None) -> Dict[str, Dict[str, Any]]:
+        """Per normalised statement: calls, rows, latency percentiles (ms) and call sites."""
+        return statement_stats.summary(order_by=order_by, limit=limit)
+
+    @staticmethod
+    def reset_statement_stats():
+        statement_stats.reset()
+
+    def insert_raw_responses(self, endpoint, request_params, response_data, ledger_entity_id=None):
+        """
+        Store one API response, with its projection when RAW_PROJECTION is on.
+        With ledger_entity_id, the entity is marked fetched in ingestion_ledger
+        in the same transaction.
+        """
         query = """
-        INSERT INTO raw_api_responses (endpoint, request_params, response_data)
-        VALUES (%s, %s, %s)
+        INSERT INTO raw_api_responses (endpoint, request_params, response_data, projected_data, projection_version)
+        VALUES (%s, %s, %s, %s, %s)
         RETURNING response_id
     """
+        stored, projected, version = storage_payloads(endpoint, response_data)
         
         with self.get_connection() as conn:
             with conn.cursor() as cur:
-                cur.execute(query, (endpoint, json.dumps(request_params),
-                    json.dumps(response_data)))
-                return cur.fetchone()[0]
+                cur.execute(query, (endpoint, json.dumps(request_params), json.dumps(stored),
+                    json.dumps(projected) if projected is not None else None, version))
+                response_id = cur.fetchone()[0]
+                if ledger_entity_id is not None:
+                    from src.storage.ingestion_ledger import IngestionLedger
+                    IngestionLedger.mark_fetched(cur, endpoint, ledger_entity_id, response_id)
+                return response_id
 
@@ -0,0 +1,190 @@
+import json
+from pathlib import Path
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+from src.utils.configs import config
+
+# Per-endpoint projection schema: the dotted paths the processors read from a raw
+# payload. Lists are walked transparently, so 'response.fixture.id' keeps the id
+# of every fixture in the response. A path ending on an object keeps it whole.
+# The projection keeps the payload's nesting, so parse functions read a
+# projection exactly like the full payload.
+#
+# Bump 'version' whenever a processor starts reading a path that isn't listed:
+# rows with an older projection are read from the full payload until
+# reproject() has rebuilt them.
+PROJECTIONS = {
+    '/fixtures': {
+        'version': 1,
+        'paths': [
+            'response.fixture.id',
+            'response.fixture.date',
+            'response.fixture.referee',
+            'response.fixture.timezone',
+            'response.fixture.status.short',
+            'response.fixture.status.long',
+            'response.fixture.venue.id',
+            'response.fixture.venue.name',
+            'response.fixture.venue.city',
+            'response.league.id',
+            'response.league.season',
+            'response.league.round',
+            'response.teams.home.id',
+            'response.teams.away.id',
+            'response.goals',
+            'response.score',
+        ],
+    },
+    '/fixtures/players': {
+        'version': 1,
+        'paths': [
+            'response.team.id',
+            'response.players.player.id',
+            'response.players.player.name',
+            'response.players.player.photo',
+            'response.players.statistics.games.minutes',
+            'response.players.statistics.games.rating',
+            'response.players.statistics.games.captain',
+            'response.players.statistics.games.substitute',
+            'response.players.statistics.offsides',
+            'response.players.statistics.shots',
+            'response.players.statistics.goals',
+            'response.players.statistics.passes.total',
+            'response.players.statistics.passes.key',
+            'response.players.statistics.passes.accuracy',
+            'response.players.statistics.tackles',
+            'response.players.statistics.duels',
+            'response.players.statistics.dribbles',
+            'response.players.statistics.fouls',
+            'response.players.statistics.cards',
+            'response.players.statistics.penalty',
+        ],
+    },
+    '/players': {
+        'version': 1,
+        'paths': [
+            'response.player',
+        ],
+    },
+}
+
+MODES = ('off', 'alongside', 'only')
+
+
+def compile_paths(paths: List[str]) -> Dict[str, Any]:
+    """Dotted paths -> nested dict of keys; None marks 'keep the whole value'."""
+    tree = {}
+    for path in paths:
+        node = tree
+        keys = path.split('.')
+        for key in keys[:-1]:
+            child = node.get(key, {})
+            if child is None:
+                break  # a shorter path already keeps this whole subtree
+            node = node.setdefault(key, child)
+        else:
+            node[keys[-1]] = None
+    return tree
+
+
+_COMPILED = {endpoint: compile_paths(schema['paths']) for endpoint, schema in PROJECTIONS.items()}
+
+
+def project(data: Any, tree: Optional[Dict[str, Any]]) -> Any:
+    """Copy of `data` keeping only the keys in `tree` (missing keys stay missing)."""
+    if tree is None:
+        return data
+    if isinstance(data, list):
+        return [project(item, tree) for item in data]
+    if not isinstance(data, dict):
+        return data
+    return {key: project(data[key], subtree) for key, subtree in tree.items() if key in data}
+
+
+def projection_version(endpoint: str) -> Optional[int]:
+    schema = PROJECTIONS.get(endpoint)
+    return schema['version'] if schema else None
+
+
+def project_response(endpoint: str, response_data: Any) -> Optional[Any]:
+    """The projection of a payload, or None if the endpoint has no schema."""
+    tree = _COMPILED.get(endpoint)
+    if tree is None or not isinstance(response_data, dict):
+        return None
+    return project(response_data, tree)
+
+
+def storage_payloads(endpoint: str, response_data: Any,
+                     mode: Optional[str] = None) -> Tuple[Any, Optional[Any], Optional[int]]:
+    """
+    (response_data, projected_data, projection_version) to store for a payload.
+
+    'off'       full payload only
+    'alongside' full payload plus the projection (processors read the projection)
+    'only'      the projection stored as response_data; the full payload is dropped
+    """
+    mode = mode or config.RAW_PROJECTION
+    if mode not in MODES:
+        raise ValueError(f"RAW_PROJECTION must be one of {MODES}, got {mode!r}")
+    projected = project_response(endpoint, response_data) if mode != 'off' else None
+    if projected is None:
+        return response_data, None, None
+    if mode == 'only':
+        return projected, None, projection_version(endpoint)
+    return response_data, projected, projection_version(endpoint)
+
+
+def read_expression(endpoint: str) -> str:
+    """
+    SQL for the payload processors should parse: the projection when it is
+    current, the stored response_data otherwise (which is itself the
+    projection for rows stored in 'only' mode).
+    """
+    version = projection_version(endpoint)
+    if version is None:
+        return 'response_data'
+    return (f"CASE WHEN projection_version = {int(version)} AND projected_data IS NOT NULL "
+            f"THEN projected_data ELSE response_data END")
+
+
+def reproject(db_handler, endpoint: str, batch_size: int = 200) -> int:
+    """
+    (Re)build projections for rows of `endpoint` whose full payload is stored
+    and whose projection is missing or out of date. Returns rows updated.
+    """
+    from psycopg2.extras import execute_values
+
+    version = projection_version(endpoint)
+    if version is None:
+        return 0
+    select = """
+        SELECT response_id, fetched_at, response_data
+        FROM raw_api_responses
+        WHERE endpoint = %s
+        AND (projected_data IS NOT NULL OR projection_version IS NULL)
+        AND projection_version IS DISTINCT FROM %s
+        ORDER BY response_id
+        LIMIT %s
+    """
+    update = """
+        UPDATE raw_api_responses r
+        SET projected_data = v.projected_data::jsonb, projection_version = %s
+        FROM (VALUES %%s) AS v(response_id, fetched_at, projected_data)
+        WHERE r.endpoint = %s
+        AND r.response_id = v.response_id
+        AND r.fetched_at = v.fetched_at::timestamp
+    """
+    updated = 0
+    while True:
+        rows = db_handler.execute_query(select, (endpoint, version, batch_size))
+        if not rows:
+            return updated
+        values = [(response_id, fetched_at, json.dumps(project_response(endpoint, data)))
+                  for response_id, fetched_at, data in rows]
+        with db_handler.get_connection() as conn:
+            with conn.cursor() as cur:
+                execute_values(cur, cur.mogrify(update, (version, endpoint)).decode(), values)
+        updated += len(rows)
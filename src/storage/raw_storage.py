@@ -0,0 +1,453 @@
+import json
+import os
+from datetime import date, datetime
+from pathlib import Path
+import sys
+from typing import Dict, List, Optional, Iterator, Tuple, Any
+
+import zstandard
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+from src.storage.postgres_handler import PostgresHandler
+from src.utils.configs import config
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__, 'raw_storage.log')
+
+# Endpoint -> partition suffix. raw_api_responses is LIST partitioned by endpoint
+# and each endpoint partition is RANGE partitioned by month of fetched_at; other
+# endpoints land in raw_api_responses_other.
+RAW_ENDPOINTS = {
+    '/leagues': 'leagues',
+    '/teams': 'teams',
+    '/fixtures': 'fixtures',
+    '/fixtures/players': 'fixture_players',
+    '/players': 'players',
+    '/standings': 'standings',
+}
+
+RAW_COLUMNS = ('response_id', 'endpoint', 'request_params', 'response_data', 'fetched_at', 'created_at',
+               'projected_data', 'projection_version')
+
+ARCHIVE_BATCH_SIZE = 500
+
+
+def _month_start(value) -> date:
+    return date(value.year, value.month, 1)
+
+
+def _next_month(month: date) -> date:
+    return date(month.year + (month.month == 12), month.month % 12 + 1, 1)
+
+
+class RawStorage:
+    """
+    Partition maintenance and archival for raw_api_responses.
+
+    Every fetch stores a full snapshot, so most rows are superseded by a newer
+    response to the same (endpoint, request_params). archive_superseded() moves
+    those (once older than RAW_ARCHIVE_GRACE_DAYS) into zstd-compressed JSON
+    lines files under RAW_ARCHIVE_DIR and drops month partitions left empty, so
+    processor scans only touch partitions holding current snapshots. Archived
+    rows keep their response_id and can be read back (iter_archived) or
+    restored into the table for reprocessing (restore).
+
+    Archiving deletes the rows, so it only runs when the archive directory
+    is declared durable (RAW_ARCHIVE_DURABLE); otherwise they stay put.
+    """
+
+    def __init__(self, db_handler: Optional[PostgresHandler] = None, archive_dir: Optional[str] = None,
+                 durable: Optional[bool] = None):
+        self.db_handler = db_handler or PostgresHandler()
+        archive_dir = Path(archive_dir or config.RAW_ARCHIVE_DIR)
+        self.archive_dir = archive_dir if archive_dir.is_absolute() else project_root / archive_dir
+        self.durable = config.RAW_ARCHIVE_DURABLE if durable is None else durable
+
+    # ------------------------------------------------------------------
+    # Partitions
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def endpoint_partition(endpoint: str) -> str:
+        return f"raw_api_responses_{RAW_ENDPOINTS[endpoint]}"
+
+    def is_partitioned(self) -> bool:
+        rows = self.db_handler.execute_query(
+            "SELECT relkind FROM pg_class WHERE oid = to_regclass('raw_api_responses')"
+        )
+        return bool(rows) and rows[0][0] == 'p'
+
+    def ensure_partitions(self, months_ahead: Optional[int] = None,
+                          months: Optional[Dict[str, set]] = None) -> List[str]:
+        """
+        Create the endpoint partitions, month partitions from the current month
+        to months_ahead ahead, any extra `months` ({endpoint: {date}}) and a
+        partition for every month that has rows sitting in a default partition
+        (those rows are moved). Returns the partitions created.
+        """
+        with self.db_handler.get_connection() as conn:
+            with conn.cursor() as cur:
+                created = self._ensure_partitions(cur, months_ahead, months)
+        if created:
+            logger.info(f"Created raw partitions: {created}")
+        return created
+
+    def _ensure_partitions(self, cur, months_ahead: Optional[int] = None,
+                           months: Optional[Dict[str, set]] = None) -> List[str]:
+        months_ahead = config.RAW_PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+        created = []
+        current = _month_start(datetime.utcnow())
+        upcoming = [current]
+        for _ in range(months_ahead):
+            upcoming.append(_next_month(upcoming[-1]))
+
+        for endpoint in RAW_ENDPOINTS:
+            if self._ensure_endpoint_partition(cur, endpoint):
+                created.append(self.endpoint_partition(endpoint))
+
+        for endpoint in RAW_ENDPOINTS:
+            default = f"{self.endpoint_partition(endpoint)}_default"
+            cur.execute(f"SELECT DISTINCT date_trunc('month', fetched_at)::date FROM {default}")
+            wanted = set(upcoming) | {row[0] for row in cur.fetchall()}
+            wanted |= set((months or {}).get(endpoint, ()))
+            for month in sorted(wanted):
+                name = self._ensure_month_partition(cur, endpoint, month)
+                if name:
+                    created.append(name)
+        return created
+
+    def _ensure_endpoint_partition(self, cur, endpoint: str) -> bool:
+        name = self.endpoint_partition(endpoint)
+        cur.execute("SELECT to_regclass(%s)", (name,))
+        if cur.fetchone()[0]:
+            return False
+        moved = self._move_out(cur, 'raw_api_responses_other', "endpoint = %s", (endpoint,))
+        cur.execute(f"""
+            CREATE TABLE {name} PARTITION OF raw_api_responses
+            FOR VALUES IN (%s) PARTITION BY RANGE (fetched_at)
+        """, (endpoint,))
+        cur.execute(f"CREATE TABLE {name}_default PARTITION OF {name} DEFAULT")
+        self._move_back(cur, moved)
+        return True
+
+    def _ensure_month_partition(self, cur, endpoint: str, month: date) -> Optional[str]:
+        parent = self.endpoint_partition(endpoint)
+        name = f"{parent}_{month:%Y%m}"
+        cur.execute("SELECT to_regclass(%s)", (name,))
+        if cur.fetchone()[0]:
+            return None
+        # A new range partition may not overlap rows already in the default partition
+        moved = self._move_out(cur, f"{parent}_default", "fetched_at >= %s AND fetched_at < %s",
+                               (month, _next_month(month)))
+        cur.execute(f"""
+            CREATE TABLE {name} PARTITION OF {parent}
+            FOR VALUES FROM ('{month.isoformat()}') TO ('{_next_month(month).isoformat()}')
+        """)
+        self._move_back(cur, moved)
+        return name
+
+    @staticmethod
+    def _move_out(cur, table: str, condition: str, params: tuple) -> int:
+        cur.execute(f"""
+            CREATE TEMP TABLE raw_moving ON COMMIT DROP AS
+            WITH moved AS (DELETE FROM {table} WHERE {condition} RETURNING {', '.join(RAW_COLUMNS)})
+            SELECT * FROM moved
+        """, params)
+        return cur.rowcount
+
+    @staticmethod
+    def _move_back(cur, moved: int):
+        if moved:
+            cur.execute(f"""
+                INSERT INTO raw_api_responses ({', '.join(RAW_COLUMNS)})
+                SELECT {', '.join(RAW_COLUMNS)} FROM raw_moving
+            """)
+            logger.info(f"Moved {moved} raw rows out of a default partition")
+        cur.execute("DROP TABLE raw_moving")
+
+    def partition_existing_table(self) -> int:
+        """
+        One-off migration of an unpartitioned raw_api_responses: rename it,
+        create the partitioned table with a partition for every month in the
+        data, copy the rows (response_ids kept) and drop the old table, all in
+        one transaction. A raw_api_responses_unpartitioned left behind by an
+        interrupted run of the earlier, multi-transaction migration is copied
+        over and dropped. Returns the rows copied (0 if nothing to migrate).
+        """
+        rows = self.db_handler.execute_query("""
+            SELECT to_regclass('raw_api_responses_unpartitioned') IS NOT NULL,
+                   (SELECT relkind FROM pg_class WHERE oid = to_regclass('raw_api_responses'))
+        """)
+        leftover, relkind = rows[0]
+        if relkind == 'p' and not leftover:
+            return 0
+        ddl = """
+            ALTER TABLE raw_api_responses RENAME TO raw_api_responses_unpartitioned;
+            ALTER TABLE raw_api_responses_unpartitioned
+                RENAME CONSTRAINT raw_api_responses_pkey TO raw_api_responses_unpartitioned_pkey;
+            DROP INDEX IF EXISTS idx_raw_endpoint_fetched;
+            DROP INDEX IF EXISTS idx_raw_endpoint_response;
+            DROP INDEX IF EXISTS idx_raw_player_stats_fixture;
+            ALTER SEQUENCE raw_api_responses_response_id_seq OWNED BY NONE;
+        """ + PARTITIONED_TABLE_DDL + """
+            ALTER SEQUENCE raw_api_responses_response_id_seq OWNED BY raw_api_responses.response_id;
+        """
+        # Partition DDL is transactional: a failure anywhere leaves the table as it was
+        with self.db_handler.get_connection() as conn:
+            with conn.cursor() as cur:
+                if relkind != 'p':
+                    cur.execute(ddl)
+                else:
+                    logger.warning("Resuming an interrupted raw_api_responses partitioning migration")
+                cur.execute("""
+                    SELECT DISTINCT endpoint, date_trunc('month', COALESCE(fetched_at, created_at, NOW()))::date
+                    FROM raw_api_responses_unpartitioned
+                """)
+                months = {}
+                for endpoint, month in cur.fetchall():
+                    months.setdefault(endpoint, set()).add(month)
+                self._ensure_partitions(cur, months=months)
+                cur.execute(f"""
+                    INSERT INTO raw_api_responses ({', '.join(RAW_COLUMNS)})
+                    SELECT response_id, endpoint, request_params, response_data,
+                           COALESCE(fetched_at, created_at, NOW()), created_at,
+                           projected_data, projection_version
+                    FROM raw_api_responses_unpartitioned
+                    ON CONFLICT DO NOTHING
+                """)
+                copied = cur.rowcount
+                cur.execute("DROP TABLE raw_api_responses_unpartitioned")
+        logger.info(f"Partitioned raw_api_responses: {copied} rows copied")
+        return copied
+
+    def drop_empty_partitions(self) -> List[str]:
+        """Drop month partitions before the current month that hold no rows."""
+        current = _month_start(datetime.utcnow())
+        dropped = []
+        with self.db_handler.get_connection() as conn:
+            with conn.cursor() as cur:
+                for endpoint in RAW_ENDPOINTS:
+                    parent = self.endpoint_partition(endpoint)
+                    cur.execute("""
+                        SELECT c.relname
+                        FROM pg_inherits i
+                        JOIN pg_class c ON c.oid = i.inhrelid
+                        WHERE i.inhparent = to_regclass(%s)
+                        AND c.relname ~ '_[0-9]{6}$'
+                    """, (parent,))
+                    for (name,) in cur.fetchall():
+                        month = date(int(name[-6:-2]), int(name[-2:]), 1)
+                        if month >= current:
+                            continue
+                        cur.execute(f"SELECT EXISTS (SELECT 1 FROM {name})")
+                        if not cur.fetchone()[0]:
+                            cur.execute(f"DROP TABLE {name}")
+                            dropped.append(name)
+        if dropped:
+            logger.info(f"Dropped {len(dropped)} empty raw partitions: {dropped}")
+        return dropped
+
+    # ------------------------------------------------------------------
+    # Archival
+    # ------------------------------------------------------------------
+
+    def _archive_endpoint_dir(self, endpoint: str) -> Path:
+        slug = RAW_ENDPOINTS.get(endpoint) or endpoint.strip('/').replace('/', '_') or 'root'
+        return self.archive_dir / slug
+
+    def _archive_path(self, endpoint: str, month: date, stamp: str) -> Path:
+        return self._archive_endpoint_dir(endpoint) / f"{month:%Y-%m}" / f"{stamp}.jsonl.zst"
+
+    def archive_superseded(self, grace_days: Optional[int] = None, dry_run: bool = False) -> Dict[str, Any]:
+        """
+        Move every response that has a newer response to the same
+        (endpoint, request_params) and is older than grace_days into zstd
+        archive files, one per endpoint and month of fetched_at. Files are
+        written and synced before the rows are deleted, in the transaction
+        that selected them. Without a durable archive directory nothing is
+        archived (dry runs still report).
+        """
+        grace_days = config.RAW_ARCHIVE_GRACE_DAYS if grace_days is None else grace_days
+        stamp = f"{datetime.utcnow():%Y%m%dT%H%M%S}"
+        summary = {'rows': 0, 'raw_bytes': 0, 'archive_bytes': 0, 'files': [], 'endpoints': {}}
+        if not dry_run and not self.durable:
+            logger.warning(f"Not archiving superseded raw responses: {self.archive_dir} is not declared "
+                           f"durable (RAW_ARCHIVE_DURABLE), so the rows stay in raw_api_responses")
+            summary['skipped'] = 'archive directory not durable'
+            return summary
+
+        query = f"""
+            WITH ranked AS (
+                SELECT response_id, endpoint, fetched_at,
+                       row_number() OVER (PARTITION BY endpoint, request_params
+                                          ORDER BY fetched_at DESC, response_id DESC) AS newer
+                FROM raw_api_responses
+            )
+            SELECT {', '.join('r.' + col for col in RAW_COLUMNS)}, pg_column_size(r.response_data)
+            FROM raw_api_responses r
+            JOIN ranked USING (response_id, endpoint, fetched_at)
+            WHERE ranked.newer > 1
+            AND r.fetched_at < NOW() - make_interval(days => %s)
+            ORDER BY r.endpoint, r.fetched_at
+            FOR UPDATE OF r
+        """
+
+        with self.db_handler.get_connection() as conn:
+            with conn.cursor(name='raw_archive') as cur:
+                cur.itersize = ARCHIVE_BATCH_SIZE
+                cur.execute(query, (grace_days,))
+                writers = {}
+                archived_keys = []
+                try:
+                    for row in cur:
+                        record = dict(zip(RAW_COLUMNS, row[:len(RAW_COLUMNS)]))
+                        # Projections can be rebuilt from the full payload (projections.reproject)
+                        record.pop('projected_data')
+                        endpoint = record['endpoint']
+                        key = (endpoint, _month_start(record['fetched_at']))
+                        archived_keys.append((record['response_id'], endpoint, record['fetched_at']))
+                        summary['rows'] += 1
+                        summary['raw_bytes'] += row[-1] or 0
+                        endpoint_summary = summary['endpoints'].setdefault(endpoint, {'rows': 0})
+                        endpoint_summary['rows'] += 1
+                        if dry_run:
+                            continue
+                        if key not in writers:
+                            path = self._archive_path(*key, stamp)
+                            path.parent.mkdir(parents=True, exist_ok=True)
+                            handle = open(path, 'wb')
+                            # One compressor per open stream; they can't share a context
+                            compressor = zstandard.ZstdCompressor(level=config.RAW_ARCHIVE_ZSTD_LEVEL)
+                            writers[key] = (path, handle, compressor.stream_writer(handle))
+                        line = json.dumps(record, default=str, separators=(',', ':')) + '\n'
+                        writers[key][2].write(line.encode('utf-8'))
+                finally:
+                    for path, handle, stream in writers.values():
+                        stream.flush(zstandard.FLUSH_FRAME)
+                        handle.flush()
+                        os.fsync(handle.fileno())
+                        stream.close()
+                        summary['files'].append(str(path))
+                        summary['archive_bytes'] += path.stat().st_size
+
+            if archived_keys and not dry_run:
+                with conn.cursor() as cur:
+                    cur.execute("""
+                        DELETE FROM raw_api_responses r
+                        USING unnest(%s::int[], %s::varchar[], %s::timestamp[]) AS a(response_id, endpoint, fetched_at)
+                        WHERE r.response_id = a.response_id
+                        AND r.endpoint = a.endpoint
+                        AND r.fetched_at = a.fetched_at
+                    """, ([k[0] for k in archived_keys], [k[1] for k in archived_keys],
+                          [k[2] for k in archived_keys]))
+
+        if not dry_run and summary['rows']:
+            summary['dropped_partitions'] = self.drop_empty_partitions()
+        ratio = summary['raw_bytes'] / summary['archive_bytes'] if summary['archive_bytes'] else 0
+        logger.info(f"{'Would archive' if dry_run else 'Archived'} {summary['rows']} superseded raw responses "
+                    f"({summary['raw_bytes'] / 1e6:.1f} MB in table, {summary['archive_bytes'] / 1e6:.1f} MB "
+                    f"compressed, {ratio:.1f}x) into {len(summary['files'])} files")
+        return summary
+
+    def iter_archived(self, endpoint: str, since: Optional[date] = None,
+                      until: Optional[date] = None) -> Iterator[Tuple[Any, ...]]:
+        """
+        Archived responses of an endpoint as raw rows in the shape processors
+        read (response_id, endpoint, request_params, response_data, fetched_at,
+        raw_bytes), newest month first. Months are bounded by since/until
+        (inclusive); rows archived more than once are yielded once.
+        """
+        endpoint_dir = self._archive_endpoint_dir(endpoint)
+        if not endpoint_dir.exists():
+            return
+        seen = set()
+        decompressor = zstandard.ZstdDecompressor()
+        for month_dir in sorted(endpoint_dir.iterdir(), reverse=True):
+            month = datetime.strptime(month_dir.name, '%Y-%m').date()
+            if (since and month < _month_start(since)) or (until and month > _month_start(until)):
+                continue
+            for path in sorted(month_dir.glob('*.jsonl.zst'), reverse=True):
+                with open(path, 'rb') as handle, decompressor.stream_reader(handle, read_across_frames=True) as reader:
+                    buffer = b''
+                    for chunk in iter(lambda: reader.read(1 << 20), b''):
+                        buffer += chunk
+                        *lines, buffer = buffer.split(b'\n')
+                        for line in lines:
+                            record = json.loads(line)
+                            if record['response_id'] in seen:
+                                continue
+                            seen.add(record['response_id'])
+                            yield (record['response_id'], record['endpoint'], record['request_params'],
+                                   record['response_data'], datetime.fromisoformat(record['fetched_at']),
+                                   len(line))
+
+    def restore(self, endpoint: str, since: Optional[date] = None, until: Optional[date] = None) -> int:
+        """
+        Put archived responses back into raw_api_responses (same response_ids)
+        so the normal pipeline reprocesses them. Rows still in the table are
+        skipped. The next archive run moves them out again.
+        """
+        batch = []
+        restored = 0
+
+        def flush():
+            nonlocal restored
+            from psycopg2.extras import execute_values
+            with self.db_handler.get_connection() as conn:
+                with conn.cursor() as cur:
+                    execute_values(cur, f"""
+                        INSERT INTO raw_api_responses ({', '.join(RAW_COLUMNS[:5])})
+                        VALUES %s
+                        ON CONFLICT DO NOTHING
+                    """, batch)
+                    restored += cur.rowcount
+
+        if endpoint in RAW_ENDPOINTS:
+            months = {_month_start(row[4]) for row in self.iter_archived(endpoint, since, until)}
+            self.ensure_partitions(months={endpoint: months})
+        for row in self.iter_archived(endpoint, since, until):
+            batch.append((row[0], row[1], json.dumps(row[2]), json.dumps(row[3]), row[4]))
+            if len(batch) >= ARCHIVE_BATCH_SIZE:
+                flush()
+                batch = []
+        if batch:
+            flush()
+        logger.info(f"Restored {restored} archived {endpoint} responses")
+        return restored
+
+    def run_maintenance(self, grace_days: Optional[int] = None) -> Dict[str, Any]:
+        """Daily job: create upcoming partitions, then archive superseded snapshots."""
+        created = self.ensure_partitions()
+        summary = self.archive_superseded(grace_days)
+        summary['created_partitions'] = created
+        return summary
+
+    def partition_sizes(self) -> List[Tuple[str, int, int]]:
+        """(partition, estimated rows, bytes) for every leaf partition of raw_api_responses."""
+        query = """
+            SELECT c.relname, c.reltuples::bigint, pg_total_relation_size(c.oid)
+            FROM pg_partition_tree('raw_api_responses') t
+            JOIN pg_class c ON c.oid = t.relid
+            WHERE t.isleaf
+            ORDER BY c.relname
+        """
+        return self.db_handler.execute_query(query) or []
+
+
+# Parent table and catch-all partition as in sql/ddl/create_tables.sql, reusing
+# the sequence of the table being migrated
+PARTITIONED_TABLE_DDL = """
+    CREATE TABLE raw_api_responses (
+        response_id INTEGER NOT NULL DEFAULT nextval('raw_api_responses_response_id_seq'),
+        endpoint VARCHAR(100) NOT NULL,
+        request_params JSONB,
+        response_data JSONB NOT NULL,
+        fetched_at TIMESTAMP NOT NULL DEFAULT NOW(),
+        created_at TIMESTAMP DEFAULT NOW(),
+        projected_data JSONB,
+        projection_version SMALLINT,
+        PRIMARY KEY (response_id, endpoint, fetched_at)
+    ) PARTITION BY LIST (endpoint);
+    CREATE TABLE raw_api_responses_other PARTITION OF raw_api_responses DEFAULT;
+"""
@@ -0,0 +1,166 @@
+import threading
+import time
+from pathlib import Path
+import sys
+from typing import Any, Dict, Optional
+
+import psycopg2
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+from src.utils.configs import config
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__, 'database.log')
+
+# Seconds the replica is behind the primary, given the primary's current WAL
+# position: 0 once the replica has replayed up to it (an idle primary leaves
+# pg_last_xact_replay_timestamp() old), or when the server isn't a standby at
+# all. Behind with nothing replayed yet counts as infinitely behind. Comparing
+# with the primary rather than with the replica's own received WAL matters
+# when the WAL receiver has disconnected: replay then catches up with what was
+# received and the replica would look current while falling further behind.
+LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_replay_lsn() >= %s::pg_lsn THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())::float8, 'Infinity')
+    END
+"""
+
+# Without the primary's position (primary unreachable): only a replica still
+# streaming from it can tell that it has replayed everything there is.
+STREAMING_LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN NOT EXISTS (SELECT 1 FROM pg_stat_wal_receiver WHERE status = 'streaming') THEN 'Infinity'
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())::float8, 'Infinity')
+    END
+"""
+
+
+class ReplicaMonitor:
+    """
+    Decides whether reads may go to the replica: its replay lag behind the
+    primary is measured at most every REPLICA_LAG_CHECK_SECONDS and must be
+    within REPLICA_MAX_LAG_SECONDS. An unreachable replica counts as unusable
+    until the next check. Shared by every PostgresHandler using the same read
+    DSN.
+
+    usable() is on the request path, so it only reads the last result; a
+    due check runs on a background thread, one at a time, and a slow or
+    unreachable replica delays nothing but that thread. Until the first
+    check completes reads go to the primary; check() measures synchronously.
+    """
+
+    def __init__(self, connection_params: Dict[str, Any], primary_params: Optional[Dict[str, Any]] = None,
+                 max_lag: Optional[float] = None, check_interval: Optional[float] = None):
+        self.connection_params = connection_params
+        self.primary_params = primary_params
+        self.max_lag = config.REPLICA_MAX_LAG_SECONDS if max_lag is None else max_lag
+        self.check_interval = config.REPLICA_LAG_CHECK_SECONDS if check_interval is None else check_interval
+        self._lock = threading.Lock()
+        self._checked_at = None
+        self._checking = False
+        self._lag = None
+        self._usable = False
+
+    @staticmethod
+    def _connect(params: Dict[str, Any]):
+        params = {k: v for k, v in params.items() if k != 'cursor_factory'}
+        params.setdefault('connect_timeout', config.BOT_CONNECT_TIMEOUT)
+        return psycopg2.connect(**params)
+
+    def _primary_lsn(self) -> Optional[str]:
+        if self.primary_params is None:
+            return None
+        try:
+            conn = self._connect(self.primary_params)
+            try:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT pg_current_wal_lsn()::text")
+                    return cur.fetchone()[0]
+            finally:
+                conn.close()
+        except psycopg2.Error as e:
+            logger.warning(f"Primary WAL position unavailable for the replica lag check: {e}")
+            return None
+
+    def _measure(self) -> Optional[float]:
+        # The primary first: a replica that has replayed past this point was current when we looked
+        primary_lsn = self._primary_lsn()
+        try:
+            conn = self._connect(self.connection_params)
+            try:
+                with conn.cursor() as cur:
+                    if primary_lsn is None:
+                        cur.execute(STREAMING_LAG_SQL)
+                    else:
+                        cur.execute(LAG_SQL, (primary_lsn,))
+                    return float(cur.fetchone()[0])
+            finally:
+                conn.close()
+        except psycopg2.Error as e:
+            logger.warning(f"Replica lag check failed: {e}")
+            return None
+
+    def _set_state(self, lag: Optional[float]):
+        usable = lag is not None and lag <= self.max_lag
+        if usable != self._usable:
+            if usable:
+                logger.info(f"Replica lag {lag:.1f}s; routing reads to the replica")
+            elif lag is None:
+                logger.warning("Replica unreachable; routing reads to the primary")
+            else:
+                logger.warning(f"Replica lag {lag:.1f}s > {self.max_lag}s; routing reads to the primary")
+        self._lag, self._usable = lag, usable
+
+    def check(self) -> bool:
+        """Measure the lag now (blocking) and return whether the replica is usable."""
+        lag = self._measure()
+        with self._lock:
+            self._checked_at = time.monotonic()
+            self._set_state(lag)
+            return self._usable
+
+    def _check_in_background(self):
+        try:
+            self.check()
+        finally:
+            with self._lock:
+                self._checking = False
+
+    def usable(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            due = self._checked_at is None or now - self._checked_at >= self.check_interval
+            if due and not self._checking:
+                self._checking = True
+                threading.Thread(target=self._check_in_background, name='replica-lag-check', daemon=True).start()
+            return self._usable
+
+    def mark_down(self, error: Exception):
+        """A read connection failed: use the primary until the next check."""
+        with self._lock:
+            logger.warning(f"Replica connection failed: {error}")
+            self._checked_at = time.monotonic()
+            self._set_state(None)
+
+    def status(self) -> Dict[str, Any]:
+        usable = self.check()
+        return {'usable': usable, 'lag_seconds': self._lag, 'max_lag_seconds': self.max_lag}
+
+
+_monitors: Dict[str, ReplicaMonitor] = {}
+_monitors_lock = threading.Lock()
+
+
+def get_monitor(connection_params: Dict[str, Any],
+                primary_params: Optional[Dict[str, Any]] = None) -> ReplicaMonitor:
+    """The process-wide monitor for this read DSN (lag measured against primary_params)."""
+    key = connection_params['dsn']
+    with _monitors_lock:
+        if key not in _monitors:
+            _monitors[key] = ReplicaMonitor(connection_params, primary_params)
+        return _monitors[key]
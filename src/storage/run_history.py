@@ -0,0 +1,67 @@
+import json
+from datetime import datetime
+from pathlib import Path
+import sys
+from typing import Dict, List, Optional, Any
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+from src.storage.postgres_handler import PostgresHandler
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__, 'database.log')
+
+RUN_COLUMNS = (
+    'run_id', 'started_at', 'finished_at', 'success', 'wall_seconds', 'cpu_seconds',
+    'rows_read', 'raw_bytes', 'rows_parsed', 'rows_written', 'peak_rss_mb', 'workers',
+    'stage_metrics', 'row_changes', 'errors',
+)
+
+
+class PipelineRunHistory:
+    """
+    History of processing pipeline runs in pipeline_runs: one row per run with
+    run-level totals as columns (for trend queries and alerts) and the
+    per-stage metrics, row changes and errors as JSONB.
+    """
+
+    def __init__(self, db_handler: Optional[PostgresHandler] = None):
+        self.db_handler = db_handler or PostgresHandler()
+
+    def record_run(self, results: Dict[str, Any], started_at: datetime, finished_at: datetime):
+        totals = results.get('run_totals', {})
+        query = f"""
+            INSERT INTO pipeline_runs ({', '.join(RUN_COLUMNS)})
+            VALUES ({', '.join(['%s'] * len(RUN_COLUMNS))})
+            ON CONFLICT (run_id) DO NOTHING
+        """
+        params = (
+            results['run_id'],
+            started_at,
+            finished_at,
+            results['success'],
+            results.get('wall_seconds'),
+            totals.get('cpu_seconds'),
+            totals.get('rows_read'),
+            totals.get('raw_bytes'),
+            totals.get('rows_parsed'),
+            totals.get('rows_written'),
+            totals.get('peak_rss_mb'),
+            results.get('workers'),
+            json.dumps(results.get('stage_metrics', {})),
+            json.dumps(results.get('row_changes', {})),
+            json.dumps(results.get('errors', [])),
+        )
+        self.db_handler.execute_query(query, params, fetch=False)
+        logger.info(f"Recorded pipeline run {results['run_id']} ({'success' if results['success'] else 'failed'})")
+
+    def get_recent_runs(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Most recent runs first, as dicts keyed by column name."""
+        query = f"""
+            SELECT {', '.join(RUN_COLUMNS)}
+            FROM pipeline_runs
+            ORDER BY started_at DESC
+            LIMIT %s
+        """
+        results = self.db_handler.execute_query(query, (limit,))
+        return [dict(zip(RUN_COLUMNS, row)) for row in results or []]
@@ -0,0 +1,248 @@
+import os
+import sqlite3
+import threading
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from pathlib import Path
+import sys
+from typing import Any, Dict, List, Optional
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+from src.storage.postgres_handler import PostgresHandler
+from src.utils.configs import config
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__, 'snapshot.log')
+
+# What the bot reads, as (sqlite table DDL, Postgres SELECT). Columns declared
+# TIMESTAMP come back as datetime (sqlite3.PARSE_DECLTYPES).
+SNAPSHOT_TABLES = {
+    'dim_teams': (
+        """CREATE TABLE dim_teams (
+            team_id INTEGER PRIMARY KEY, team_name TEXT NOT NULL, short_name TEXT, team_code TEXT
+        )""",
+        "SELECT team_id, team_name, short_name, team_code FROM dim_teams",
+    ),
+    'dim_players': (
+        """CREATE TABLE dim_players (
+            player_id INTEGER PRIMARY KEY, player_name TEXT NOT NULL, nationality TEXT, position TEXT,
+            photo_url TEXT, age INTEGER, height TEXT, weight TEXT, number INTEGER, firstname TEXT, lastname TEXT
+        )""",
+        """SELECT player_id, player_name, nationality, position, photo_url,
+                  age, height, weight, number, firstname, lastname
+           FROM dim_players""",
+    ),
+    'player_latest_appearance': (
+        """CREATE TABLE player_latest_appearance (
+            player_id INTEGER PRIMARY KEY, fixture_id INTEGER NOT NULL, team_id INTEGER NOT NULL,
+            match_date TIMESTAMP NOT NULL, minutes_played INTEGER, rating REAL, goals_total INTEGER,
+            assists INTEGER, passes_accuracy TEXT, shots_on_target INTEGER
+        )""",
+        """SELECT player_id, fixture_id, team_id, match_date, minutes_played, rating, goals_total,
+                  assists, passes_accuracy, shots_on_target
+           FROM player_latest_appearance""",
+    ),
+    'match_summary': (
+        """CREATE TABLE match_summary (
+            fixture_id INTEGER PRIMARY KEY, league_id INTEGER NOT NULL, season INTEGER NOT NULL,
+            match_date TIMESTAMP NOT NULL, round TEXT, status TEXT NOT NULL,
+            home_team_id INTEGER NOT NULL, home_team_name TEXT NOT NULL,
+            away_team_id INTEGER NOT NULL, away_team_name TEXT NOT NULL,
+            home_goals INTEGER, away_goals INTEGER, venue_name TEXT
+        )""",
+        """SELECT fixture_id, league_id, season, match_date, round, status, home_team_id, home_team_name,
+                  away_team_id, away_team_name, home_goals, away_goals, venue_name
+           FROM match_summary""",
+    ),
+    'fact_player_season': (
+        """CREATE TABLE fact_player_season (
+            player_id INTEGER NOT NULL, league_id INTEGER NOT NULL, season INTEGER NOT NULL,
+            team_id INTEGER NOT NULL, appearances INTEGER, minutes_played INTEGER, goals INTEGER,
+            assists INTEGER, yellow_cards INTEGER, red_cards INTEGER, avg_rating REAL,
+            goals_per90 REAL, assists_per90 REAL, last_match_date TIMESTAMP,
+            PRIMARY KEY (player_id, league_id, season, team_id)
+        )""",
+        """SELECT player_id, league_id, season, team_id, appearances, minutes_played, goals, assists,
+                  yellow_cards, red_cards, avg_rating, goals_per90, assists_per90, last_match_date
+           FROM fact_player_season""",
+    ),
+    'fact_standings': (
+        """CREATE TABLE fact_standings (
+            league_id INTEGER NOT NULL, season INTEGER NOT NULL, rank INTEGER NOT NULL,
+            team_id INTEGER NOT NULL, points INTEGER, goals_diff INTEGER, form TEXT,
+            played INTEGER, win INTEGER, draw INTEGER, lose INTEGER,
+            PRIMARY KEY (league_id, season, rank, team_id)
+        )""",
+        """SELECT league_id, season, rank, team_id, points, goals_diff, form, played, win, draw, lose
+           FROM fact_standings""",
+    ),
+}
+
+# The access paths of the bot queries (see src/bot/snapshot_engine.py)
+SNAPSHOT_INDEXES = [
+    "CREATE INDEX idx_match_summary_home_date ON match_summary(home_team_id, match_date DESC)",
+    "CREATE INDEX idx_match_summary_away_date ON match_summary(away_team_id, match_date DESC)",
+]
+
+FETCH_BATCH = 5000
+
+
+def _unicode_lower(value: Optional[str]) -> Optional[str]:
+    # SQLite's lower() and LIKE only fold ASCII; Postgres ILIKE folds every letter
+    return value.lower() if isinstance(value, str) else value
+
+
+def _sqlite_value(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ')
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def snapshot_path(path: Optional[str] = None) -> Path:
+    """The snapshot file; a relative BOT_SNAPSHOT_PATH is taken from the project root."""
+    path = Path(path or config.BOT_SNAPSHOT_PATH)
+    return path if path.is_absolute() else project_root / path
+
+
+class SnapshotExporter:
+    """
+    Writes the tables the bot reads to a read-only SQLite file.
+
+    The file is built next to the target under a temporary name and moved
+    into place with os.replace(), so a reader sees either the previous
+    snapshot or the new one, never a partial file.
+    """
+
+    def __init__(self, db_handler: Optional[PostgresHandler] = None, path: Optional[str] = None):
+        self.db_handler = db_handler or PostgresHandler()
+        self.path = snapshot_path(path)
+
+    def _copy_table(self, target: sqlite3.Connection, table: str, select_sql: str) -> int:
+        columns = None
+        copied = 0
+        with self.db_handler.get_connection() as conn:
+            # Named cursor: rows are streamed in batches rather than fetched at once
+            with conn.cursor(name=f"snapshot_{table}") as cur:
+                cur.itersize = FETCH_BATCH
+                cur.execute(select_sql)
+                while True:
+                    rows = cur.fetchmany(FETCH_BATCH)
+                    if not rows:
+                        break
+                    if columns is None:
+                        columns = len(rows[0])
+                        insert = f"INSERT INTO {table} VALUES ({', '.join('?' * columns)})"
+                    target.executemany(insert, ([_sqlite_value(v) for v in row] for row in rows))
+                    copied += len(rows)
+        return copied
+
+    def export(self, run_id: Optional[str] = None) -> Dict[str, Any]:
+        """Build a new snapshot and swap it in. Returns rows per table, bytes and seconds."""
+        started = time.perf_counter()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+        rows = {}
+        target = sqlite3.connect(str(tmp_path))
+        try:
+            target.execute("PRAGMA journal_mode = OFF")
+            target.execute("PRAGMA synchronous = OFF")
+            for table, (ddl, select_sql) in SNAPSHOT_TABLES.items():
+                target.execute(ddl)
+                rows[table] = self._copy_table(target, table, select_sql)
+            for ddl in SNAPSHOT_INDEXES:
+                target.execute(ddl)
+            target.execute("CREATE TABLE snapshot_meta (key TEXT PRIMARY KEY, value TEXT)")
+            target.executemany("INSERT INTO snapshot_meta VALUES (?, ?)", [
+                ('run_id', run_id or ''),
+                ('exported_at', datetime.utcnow().isoformat(sep=' ')),
+            ])
+            target.commit()
+            target.execute("ANALYZE")
+            target.execute("VACUUM")
+        except Exception:
+            target.close()
+            tmp_path.unlink(missing_ok=True)
+            raise
+        target.close()
+
+        with open(tmp_path, 'rb') as f:
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+        result = {
+            'path': str(self.path),
+            'rows': rows,
+            'bytes': self.path.stat().st_size,
+            'seconds': round(time.perf_counter() - started, 3),
+        }
+        logger.info(f"Exported bot snapshot for run {run_id}: {result}")
+        return result
+
+
+class SnapshotStore:
+    """
+    Read-only access to the snapshot file with the execute_query() interface
+    of PostgresHandler (qmark placeholders).
+
+    Each thread keeps its own connection. At most every check_interval
+    seconds the file's identity is compared with the open one; when the
+    exporter has swapped in a new file, threads reopen on their next query.
+    Queries already running finish on the old file, which stays readable
+    until its last connection closes.
+    """
+
+    def __init__(self, path: Optional[str] = None, check_interval: Optional[float] = None):
+        self.path = snapshot_path(path)
+        self.check_interval = config.BOT_SNAPSHOT_CHECK_SECONDS if check_interval is None else check_interval
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._identity = None
+        self._generation = 0
+        self._checked_at = 0.0
+
+    def _file_identity(self):
+        stat = self.path.stat()
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _current_generation(self) -> int:
+        now = time.monotonic()
+        with self._lock:
+            if self._identity is None or now - self._checked_at >= self.check_interval:
+                self._checked_at = now
+                identity = self._file_identity()
+                if identity != self._identity:
+                    if self._identity is not None:
+                        logger.info(f"Bot snapshot {self.path} replaced; switching to the new file")
+                    self._identity = identity
+                    self._generation += 1
+            return self._generation
+
+    def _connection(self) -> sqlite3.Connection:
+        generation = self._current_generation()
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.generation != generation:
+            if conn is not None:
+                conn.close()
+            # immutable: the file is never written in place, only replaced
+            conn = sqlite3.connect(f"file:{self.path}?mode=ro&immutable=1", uri=True,
+                                   detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False)
+            conn.create_function('unicode_lower', 1, _unicode_lower, deterministic=True)
+            self._local.conn, self._local.generation = conn, generation
+        return conn
+
+    def execute_query(self, query: str, params: Optional[tuple] = None, fetch: bool = True,
+                      timeout_ms: Optional[int] = None) -> Optional[List[tuple]]:
+        rows = self._connection().execute(query, params or ()).fetchall()
+        return rows if fetch else None
+
+    def meta(self) -> Dict[str, str]:
+        return dict(self.execute_query("SELECT key, value FROM snapshot_meta"))
@@ -0,0 +1,244 @@
+import math
+import queue
+import re
+import sys
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+import psycopg2
+import psycopg2.extensions
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+from src.utils.configs import config
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__, 'slow_queries.log')
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_KEYWORD_LITERAL = re.compile(r"\b(?:NULL|TRUE|FALSE)\b", re.IGNORECASE)
+_VALUES_LIST = re.compile(r"\bVALUES\b.*?(?=\bON\s+CONFLICT\b|\bRETURNING\b|$)", re.IGNORECASE | re.DOTALL)
+_WHITESPACE = re.compile(r"\s+")
+
+# Frames from these files are skipped when looking for the caller of a statement
+# (the shared upsert/raw-read helpers too, so processors show up as the call site)
+_INTERNAL_FILES = ('statement_stats.py', 'postgres_handler.py', 'base_processor.py', 'contextlib.py', 'psycopg2')
+
+OVERFLOW_KEY = '<other statements>'
+
+
+def normalize_query(query) -> str:
+    """
+    Collapse a statement to its shape: literals become ?, VALUES lists (as
+    expanded by execute_values) become (...), whitespace is squeezed.
+    """
+    if isinstance(query, bytes):
+        query = query.decode('utf-8', errors='replace')
+    query = _STRING_LITERAL.sub('?', query)
+    query = _NUMBER_LITERAL.sub('?', query)
+    query = _KEYWORD_LITERAL.sub('?', query)
+    query = _VALUES_LIST.sub('VALUES (...) ', query)
+    return _WHITESPACE.sub(' ', query).strip()
+
+
+def _call_site() -> str:
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if not any(part in filename for part in _INTERNAL_FILES):
+            return f"{Path(filename).name}:{frame.f_lineno} {frame.f_code.co_name}"
+        frame = frame.f_back
+    return 'unknown'
+
+
+def _percentile(sorted_values, pct: float) -> float:
+    # Nearest-rank percentile
+    index = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class _Statement:
+    __slots__ = ('calls', 'rows', 'errors', 'total_ms', 'max_ms', 'latencies', 'call_sites')
+
+    def __init__(self, window: int):
+        self.calls = 0
+        self.rows = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.latencies = deque(maxlen=window)
+        self.call_sites = {}
+
+
+class StatementStats:
+    """
+    Latency, row count and call sites per normalised statement, with rolling
+    percentiles over the last `window` executions of each statement.
+
+    Statements slower than slow_ms are logged to logs/slow_queries.log. A
+    slow SELECT also gets an EXPLAIN (ANALYZE, BUFFERS), at most once per
+    statement every explain_cooldown seconds, because ANALYZE runs the query
+    again. The EXPLAIN is deferred to a background thread with its own
+    connection to the same server, so the caller (e.g. a bot request) doesn't
+    pay for the second run; the plan is logged as a follow-up line. Being a
+    separate session, it can't see the caller's uncommitted rows or temp
+    tables. At most EXPLAIN_QUEUE_SIZE plans wait; more are dropped.
+    """
+
+    EXPLAIN_QUEUE_SIZE = 20
+    EXPLAIN_TIMEOUT_MS = 30000
+
+    MAX_CALL_SITES = 10
+
+    def __init__(self, slow_ms: float = 200.0, window: int = 1000, max_statements: int = 500,
+                 explain: bool = True, explain_cooldown: float = 300.0):
+        self.slow_ms = slow_ms
+        self.window = window
+        self.max_statements = max_statements
+        self.explain = explain
+        self.explain_cooldown = explain_cooldown
+        self._lock = threading.Lock()
+        self._statements: Dict[str, _Statement] = {}
+        self._last_explained: Dict[str, float] = {}
+        self._explains: "queue.Queue" = queue.Queue(maxsize=self.EXPLAIN_QUEUE_SIZE)
+        self._explain_thread = None
+
+    def record(self, cursor, query, params, elapsed_ms: float, failed: bool = False):
+        normalized = normalize_query(query)
+        call_site = _call_site()
+        rows = max(cursor.rowcount, 0) if not failed else 0
+
+        with self._lock:
+            key = normalized
+            if key not in self._statements and len(self._statements) >= self.max_statements:
+                key = OVERFLOW_KEY
+            stats = self._statements.get(key)
+            if stats is None:
+                stats = self._statements[key] = _Statement(self.window)
+            stats.calls += 1
+            stats.rows += rows
+            stats.errors += 1 if failed else 0
+            stats.total_ms += elapsed_ms
+            stats.max_ms = max(stats.max_ms, elapsed_ms)
+            stats.latencies.append(elapsed_ms)
+            if call_site in stats.call_sites or len(stats.call_sites) < self.MAX_CALL_SITES:
+                stats.call_sites[call_site] = stats.call_sites.get(call_site, 0) + 1
+
+        if elapsed_ms >= self.slow_ms and not failed:
+            self._log_slow(cursor, query, params, normalized, elapsed_ms, rows, call_site)
+
+    def _log_slow(self, cursor, query, params, normalized, elapsed_ms, rows, call_site):
+        logger.warning(f"Slow statement ({elapsed_ms:.1f} ms, {rows} rows) at {call_site}: {normalized[:1000]}")
+        self._queue_explain(cursor, query, params, normalized, call_site)
+
+    def _queue_explain(self, cursor, query, params, normalized, call_site):
+        if not self.explain or not normalized.upper().startswith('SELECT'):
+            return
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_explained.get(normalized, float('-inf')) < self.explain_cooldown:
+                return
+            self._last_explained[normalized] = now
+            if self._explain_thread is None:
+                self._explain_thread = threading.Thread(target=self._explain_worker, name='statement-stats-explain',
+                                                        daemon=True)
+                self._explain_thread.start()
+
+        info = cursor.connection.info
+        # dsn_parameters leaves the password out; cursor_factory isn't in it, so EXPLAINs aren't recorded
+        conninfo = {key: value for key, value in info.dsn_parameters.items() if value}
+        if info.password:
+            conninfo['password'] = info.password
+        try:
+            self._explains.put_nowait((conninfo, query, params, normalized, call_site))
+        except queue.Full:
+            logger.info(f"EXPLAIN queue full, skipping plan for {call_site}")
+
+    def _explain_worker(self):
+        while True:
+            conninfo, query, params, normalized, call_site = self._explains.get()
+            plan = self._explain(conninfo, query, params)
+            if plan:
+                logger.warning(f"Plan of slow statement at {call_site}: {normalized[:200]}\n{plan}")
+
+    def _explain(self, conninfo, query, params) -> Optional[str]:
+        conn = None
+        try:
+            conn = psycopg2.connect(**conninfo)
+            with conn.cursor() as explain_cur:
+                explain_cur.execute("SET LOCAL statement_timeout = %s", (self.EXPLAIN_TIMEOUT_MS,))
+                prefix = b"EXPLAIN (ANALYZE, BUFFERS) " if isinstance(query, bytes) else "EXPLAIN (ANALYZE, BUFFERS) "
+                explain_cur.execute(prefix + query, params)
+                return '\n'.join(row[0] for row in explain_cur.fetchall())
+        except Exception as e:
+            logger.warning(f"Could not EXPLAIN slow statement: {e}")
+            return None
+        finally:
+            if conn is not None:
+                conn.close()  # discards the transaction the ANALYZE ran in
+
+    def summary(self, order_by: str = 'total_ms', limit: Optional[int] = None) -> Dict[str, Dict[str, Any]]:
+        """Normalised statement -> calls, rows, errors, total/mean/max and p50/p95/p99 latency (ms), call sites."""
+        with self._lock:
+            snapshot = {
+                key: (stats.calls, stats.rows, stats.errors, stats.total_ms, stats.max_ms,
+                      sorted(stats.latencies), dict(stats.call_sites))
+                for key, stats in self._statements.items()
+            }
+        summary = {}
+        for key, (calls, rows, errors, total_ms, max_ms, latencies, call_sites) in snapshot.items():
+            summary[key] = {
+                'calls': calls,
+                'rows': rows,
+                'errors': errors,
+                'total_ms': round(total_ms, 2),
+                'mean_ms': round(total_ms / calls, 2) if calls else 0.0,
+                'max_ms': round(max_ms, 2),
+                'p50_ms': round(_percentile(latencies, 50), 2) if latencies else 0.0,
+                'p95_ms': round(_percentile(latencies, 95), 2) if latencies else 0.0,
+                'p99_ms': round(_percentile(latencies, 99), 2) if latencies else 0.0,
+                'call_sites': call_sites,
+            }
+        ordered = sorted(summary.items(), key=lambda item: item[1][order_by], reverse=True)
+        return dict(ordered[:limit] if limit else ordered)
+
+    def reset(self):
+        with self._lock:
+            self._statements.clear()
+            self._last_explained.clear()
+
+
+statement_stats = StatementStats(
+    slow_ms=config.SLOW_QUERY_MS,
+    window=config.QUERY_STATS_WINDOW,
+    explain=config.SLOW_QUERY_EXPLAIN,
+    explain_cooldown=config.SLOW_QUERY_EXPLAIN_COOLDOWN,
+)
+
+
+class TimedCursor(psycopg2.extensions.cursor):
+    """Cursor that reports every execute() to statement_stats (execute_values pages included)."""
+
+    def execute(self, query, vars=None):
+        started = time.perf_counter()
+        try:
+            result = super().execute(query, vars)
+        except Exception:
+            statement_stats.record(self, query, vars, (time.perf_counter() - started) * 1000, failed=True)
+            raise
+        statement_stats.record(self, query, vars, (time.perf_counter() - started) * 1000)
+        return result
+
+    def executemany(self, query, vars_list):
+        started = time.perf_counter()
+        try:
+            result = super().executemany(query, vars_list)
+        except Exception:
+            statement_stats.record(self, query, None, (time.perf_counter() - started) * 1000, failed=True)
+            raise
+        statement_stats.record(self, query, None, (time.perf_counter() - started) * 1000)
+        return result
@@ -21,7 +21,44 @@ class Config:
     POSTGRES_DB = os.getenv('POSTGRES_DB', 'epl_stats')
     POSTGRES_USER = os.getenv('POSTGRES_USER', 'postgres')
     POSTGRES_PASSWORD = os.getenv('POSTGRES_PASSWORD')
-    
+    # Read replica (see src/storage/replica.py): libpq DSN, e.g. 'host=replica port=5432 dbname=epl_stats user=bot';
+    # empty sends every role to the primary
+    POSTGRES_READ_DSN = os.getenv('POSTGRES_READ_DSN', '')
+    REPLICA_MAX_LAG_SECONDS = float(os.getenv('REPLICA_MAX_LAG_SECONDS', 30))  # reads fall back to the primary beyond this
+    REPLICA_LAG_CHECK_SECONDS = float(os.getenv('REPLICA_LAG_CHECK_SECONDS', 5))  # how often the replica lag is measured
+
+    # Processing
+    PIPELINE_WORKERS = int(os.getenv('PIPELINE_WORKERS', 1))  # process pool size for raw response parsing
+    PIPELINE_STAGE_THREADS = int(os.getenv('PIPELINE_STAGE_THREADS', 3))  # independent stages run side by side
+
+    # Raw response storage (see src/storage/raw_storage.py)
+    RAW_ARCHIVE_DIR = os.getenv('RAW_ARCHIVE_DIR', 'data/archive/raw')  # relative to the project root
+    # Set only where RAW_ARCHIVE_DIR outlives the container (the compose bind mount); until then
+    # superseded raw rows are kept in the table rather than deleted after archiving
+    RAW_ARCHIVE_DURABLE = os.getenv('RAW_ARCHIVE_DURABLE', 'false').lower() == 'true'
+    RAW_ARCHIVE_GRACE_DAYS = int(os.getenv('RAW_ARCHIVE_GRACE_DAYS', 7))  # superseded snapshots younger than this stay in the table
+    RAW_ARCHIVE_ZSTD_LEVEL = int(os.getenv('RAW_ARCHIVE_ZSTD_LEVEL', 10))
+    RAW_PARTITION_MONTHS_AHEAD = int(os.getenv('RAW_PARTITION_MONTHS_AHEAD', 1))
+    # Projected payloads (see src/storage/projections.py): 'off', 'alongside' or 'only'
+    RAW_PROJECTION = os.getenv('RAW_PROJECTION', 'off').lower()
+    RAW_READ_PROJECTION = os.getenv('RAW_READ_PROJECTION', 'true').lower() == 'true'  # processors parse the projection when present
+
+    # Ingestion ledger (see src/storage/ingestion_ledger.py)
+    LEDGER_MAX_ATTEMPTS = int(os.getenv('LEDGER_MAX_ATTEMPTS', 5))  # failed fetches before an entity is abandoned
+
+    # Statement timing (see src/storage/statement_stats.py)
+    QUERY_STATS_ENABLED = os.getenv('QUERY_STATS_ENABLED', 'true').lower() == 'true'
+    QUERY_STATS_WINDOW = int(os.getenv('QUERY_STATS_WINDOW', 1000))  # executions kept per statement for percentiles
+    SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', 200))
+    SLOW_QUERY_EXPLAIN = os.getenv('SLOW_QUERY_EXPLAIN', 'true').lower() == 'true'
+    SLOW_QUERY_EXPLAIN_COOLDOWN = float(os.getenv('SLOW_QUERY_EXPLAIN_COOLDOWN', 300))  # seconds between EXPLAINs of one statement
+
+    # Profiling (see src/utils/profiling.py): 'all' or e.g. 'matches,Datafetcher.fetch_and_store_player_stats'
+    PROFILE = os.getenv('EPL_PROFILE', '')
+    PROFILE_DIR = os.getenv('EPL_PROFILE_DIR', 'logs/profiles')
+    PROFILE_TOP_N = int(os.getenv('EPL_PROFILE_TOP_N', 40))
+    PROFILE_TRACEMALLOC_FRAMES = int(os.getenv('EPL_PROFILE_TRACEMALLOC_FRAMES', 1))
+
     # @property
     # def database_url(self):
     #     return f"postgresql://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
@@ -31,10 +68,37 @@ class Config:
     # AWS_SECRET_ACCESS_KEY = os.getenv('AWS_SECRET_ACCESS_KEY')
     # S3_BUCKET = os.getenv('S3_BUCKET', 'epl-stats-data')
     
+    # Bot queries
+    TEAM_RESOLVER_TTL = float(os.getenv('TEAM_RESOLVER_TTL', 3600))  # seconds before dim_teams is reloaded for name resolution
+    # Bounded-latency serving (see src/bot/answer_cache.py)
+    BOT_CONNECT_TIMEOUT = int(os.getenv('BOT_CONNECT_TIMEOUT', 2))  # seconds to wait for a bot connection
+    BOT_STATEMENT_TIMEOUT_MS = int(os.getenv('BOT_STATEMENT_TIMEOUT_MS', 1000))  # intents without their own timeout
+    BOT_STATEMENT_TIMEOUTS = os.getenv('BOT_STATEMENT_TIMEOUTS', '')  # per-intent overrides, e.g. 'standings=300,player_card=800'
+    BOT_TIMEOUT_GRACE_MS = int(os.getenv('BOT_TIMEOUT_GRACE_MS', 250))  # extra wait past statement_timeout before serving stale
+    BOT_ANSWER_CACHE_SIZE = int(os.getenv('BOT_ANSWER_CACHE_SIZE', 5000))  # last good answers kept (LRU)
+    BOT_STALE_MAX_AGE = float(os.getenv('BOT_STALE_MAX_AGE', 86400))  # older answers are never served
+    BOT_QUERY_THREADS = int(os.getenv('BOT_QUERY_THREADS', 8))
+    BOT_DB_POOL_SIZE = int(os.getenv('BOT_DB_POOL_SIZE', 8))  # idle connections kept per server; 0 connects per query
+    # Rendered messages (see src/bot/render_cache.py)
+    BOT_RENDER_CACHE_SIZE = int(os.getenv('BOT_RENDER_CACHE_SIZE', 2000))  # messages kept (LRU)
+    BOT_DATA_VERSION_CHECK_SECONDS = float(os.getenv('BOT_DATA_VERSION_CHECK_SECONDS', 5))  # how often pipeline changes are looked up
+    # Read-only snapshot for bot replicas (see src/storage/snapshot.py)
+    BOT_BACKEND = os.getenv('BOT_BACKEND', 'postgres').lower()  # 'postgres' or 'snapshot'
+    BOT_SNAPSHOT_PATH = os.getenv('BOT_SNAPSHOT_PATH', 'data/snapshots/bot_snapshot.sqlite')  # relative to the project root
+    # Pipeline exports after each run; only useful where the bot can read the file (compose shares a volume)
+    BOT_SNAPSHOT_EXPORT = os.getenv('BOT_SNAPSHOT_EXPORT', 'false').lower() == 'true'
+    BOT_SNAPSHOT_CHECK_SECONDS = float(os.getenv('BOT_SNAPSHOT_CHECK_SECONDS', 5))  # how often readers look for a new file
+
+    # Bot service startup (see src/bot/app.py)
+    BOT_PORT = int(os.getenv('BOT_PORT', 5000))
+    BOT_RELOAD = os.getenv('BOT_RELOAD', 'false').lower() == 'true'  # uvicorn auto-reload, development only
+    BOT_WARMUP_RETRY_SECONDS = float(os.getenv('BOT_WARMUP_RETRY_SECONDS', 10))  # after a failed warm-up at startup
+
     # Bot / WhatsApp (Twilio)
     TWILIO_ACCOUNT_SID = os.getenv('TWILIO_ACCOUNT_SID')
     TWILIO_AUTH_TOKEN = os.getenv('TWILIO_AUTH_TOKEN')
     TWILIO_WHATSAPP_NUMBER = os.getenv('TWILIO_WHATSAPP_NUMBER', 'whatsapp:+14155238886') # Twilio sandbox number
+    TWILIO_API_BASE_URL = os.getenv('TWILIO_API_BASE_URL')  # e.g. a local stand-in for load tests; unset = api.twilio.com
     
     # # Spark
     # SPARK_APP_NAME = 'EPL-Stats-Pipeline'
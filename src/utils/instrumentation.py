@@ -0,0 +1,149 @@
+"""Per-stage resource accounting for the processing pipeline."""
+import contextvars
+import os
+import resource
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Optional
+
+# Metrics of the stage running in the current thread (None outside a stage)
+_current_stage = contextvars.ContextVar('pipeline_stage', default=None)
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def current_rss_mb() -> float:
+    """Resident set size of this process right now, falling back to the peak where /proc is missing."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    """High-water RSS of this process (ru_maxrss is KiB on Linux)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def record(**counters):
+    """
+    Add counters (rows_read, raw_bytes, rows_parsed, rows_written, ...) to the
+    stage running in this thread. A no-op outside an instrumented stage, so
+    processors can call it unconditionally.
+    """
+    stage = _current_stage.get()
+    if stage is not None:
+        stage.add(**counters)
+
+
+def record_peak(name: str, value: float):
+    """Keep the maximum of a gauge (e.g. a worker process's peak RSS) for the current stage."""
+    stage = _current_stage.get()
+    if stage is not None:
+        stage.peak(name, value)
+
+
+class StageMetrics:
+    """Counters and gauges for one pipeline stage."""
+
+    COUNTERS = ('rows_read', 'raw_bytes', 'rows_parsed', 'rows_written', 'rows_unchanged', 'worker_cpu_seconds')
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.values: Dict[str, Any] = {counter: 0 for counter in self.COUNTERS}
+
+    def add(self, **counters):
+        with self._lock:
+            for key, value in counters.items():
+                self.values[key] = self.values.get(key, 0) + value
+
+    def peak(self, name: str, value: float):
+        with self._lock:
+            self.values[name] = max(self.values.get(name, 0), value)
+
+
+class PipelineInstrumentation:
+    """
+    Measures wall time, CPU time, row/byte counters and peak RSS per stage.
+
+    Stages run on a thread pool, so CPU time is the stage thread's own
+    (time.thread_time) plus whatever its parse workers reported. RSS is
+    per process: a background sampler records the highest RSS seen while
+    each stage was running, which includes memory held by stages that ran
+    alongside it.
+    """
+
+    def __init__(self, sample_interval: float = 0.05):
+        self.sample_interval = sample_interval
+        self.stages: Dict[str, StageMetrics] = {}
+        self._active: Dict[str, StageMetrics] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+
+    def start(self):
+        self._stop.clear()
+        self._sampler = threading.Thread(target=self._sample_rss, name='rss-sampler', daemon=True)
+        self._sampler.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._sampler:
+            self._sampler.join()
+            self._sampler = None
+
+    def _sample_rss(self):
+        while not self._stop.wait(self.sample_interval):
+            rss = current_rss_mb()
+            with self._lock:
+                active = list(self._active.values())
+            for stage in active:
+                stage.peak('peak_rss_mb', rss)
+
+    @contextmanager
+    def stage(self, name: str):
+        """Instrument the block as stage `name`; counters recorded inside it are attributed to it."""
+        metrics = StageMetrics(name)
+        metrics.peak('peak_rss_mb', current_rss_mb())
+        with self._lock:
+            self.stages[name] = metrics
+            self._active[name] = metrics
+        token = _current_stage.set(metrics)
+        wall_started = time.perf_counter()
+        cpu_started = time.thread_time()
+        try:
+            yield metrics
+        finally:
+            metrics.values['wall_seconds'] = time.perf_counter() - wall_started
+            metrics.values['cpu_seconds'] = time.thread_time() - cpu_started
+            metrics.peak('peak_rss_mb', current_rss_mb())
+            _current_stage.reset(token)
+            with self._lock:
+                self._active.pop(name, None)
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """Stage name -> metrics, rounded for results and storage."""
+        summary = {}
+        for name, metrics in self.stages.items():
+            values = dict(metrics.values)
+            values['cpu_seconds'] = values.get('cpu_seconds', 0) + values.pop('worker_cpu_seconds', 0)
+            summary[name] = {
+                key: round(value, 3) if isinstance(value, float) else value
+                for key, value in values.items()
+            }
+        return summary
+
+    @staticmethod
+    def totals(summary: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """Run-level totals: counters and CPU are summed, peak RSS is the maximum."""
+        totals = {'rows_read': 0, 'raw_bytes': 0, 'rows_parsed': 0, 'rows_written': 0, 'cpu_seconds': 0.0,
+                  'peak_rss_mb': peak_rss_mb()}
+        for values in summary.values():
+            for key in ('rows_read', 'raw_bytes', 'rows_parsed', 'rows_written', 'cpu_seconds'):
+                totals[key] += values.get(key, 0)
+        totals['cpu_seconds'] = round(totals['cpu_seconds'], 3)
+        totals['peak_rss_mb'] = round(totals['peak_rss_mb'], 1)
+        return totals
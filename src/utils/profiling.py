@@ -0,0 +1,173 @@
+"""
+On-demand profiling for pipeline stages, processors and ingestion methods.
+
+Switched on per target with the EPL_PROFILE environment variable ('all', or a
+comma-separated list such as 'matches,Datafetcher.fetch_and_store_player_stats')
+or with a profile=True argument on ProcessingPipeline, a processor or
+Datafetcher. Each profiled call writes two artifacts under PROFILE_DIR, named
+<run_id>_<target>:
+
+    .prof  cProfile stats (pstats / snakeviz compatible)
+    .txt   top functions by cumulative time and top tracemalloc allocations
+
+Profiling never raises into the profiled code: failures to start or to write
+artifacts are logged and the call runs unprofiled. Reports are capped at
+PROFILE_TOP_N entries, so one production run stays cheap to keep.
+"""
+import cProfile
+import functools
+import io
+import pstats
+import threading
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from src.utils.configs import config
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__, 'profiling.log')
+
+_OFF = ('', '0', 'false', 'off', 'no')
+_ALL = ('1', 'true', 'on', 'yes', 'all')
+
+# cProfile hooks the current thread only, and a nested profiler would replace
+# the outer one, so each thread profiles at most one target at a time
+_thread_state = threading.local()
+
+# tracemalloc is process-wide; concurrent stages share one tracing session
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0
+
+
+def new_run_id() -> str:
+    return f"{datetime.utcnow():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:6]}"
+
+
+def profiling_enabled(target: str, override: Optional[bool] = None) -> bool:
+    """
+    Whether `target` ('matches', 'MatchesProcessor.process_matches', ...) should
+    be profiled. An explicit override wins over EPL_PROFILE; list entries match
+    the full target, its class or its method name.
+    """
+    if override is not None:
+        return override
+    setting = (config.PROFILE or '').strip().lower()
+    if setting in _OFF:
+        return False
+    if setting in _ALL:
+        return True
+    wanted = {item.strip() for item in setting.split(',') if item.strip()}
+    return bool(wanted & {target.lower(), *target.lower().split('.')})
+
+
+def _start_tracemalloc() -> bool:
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        if _tracemalloc_users == 0 and tracemalloc.is_tracing():
+            return False  # someone else owns tracing; don't stop it under them
+        if _tracemalloc_users == 0:
+            tracemalloc.start(config.PROFILE_TRACEMALLOC_FRAMES)
+        _tracemalloc_users += 1
+        return True
+
+
+def _stop_tracemalloc():
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        _tracemalloc_users -= 1
+        if _tracemalloc_users == 0:
+            tracemalloc.stop()
+
+
+def _artifact_path(run_id: str, target: str) -> Path:
+    profile_dir = Path(config.PROFILE_DIR)
+    profile_dir.mkdir(parents=True, exist_ok=True)
+    safe_target = ''.join(ch if ch.isalnum() or ch in '-_.' else '_' for ch in target)
+    return profile_dir / f"{run_id}_{safe_target}"
+
+
+def _write_artifacts(path: Path, target: str, profiler: cProfile.Profile,
+                     start_snapshot, end_snapshot, traced_peak: int):
+    top_n = config.PROFILE_TOP_N
+    profiler.dump_stats(f"{path}.prof")
+
+    report = io.StringIO()
+    report.write(f"Profile of {target}\n\n")
+    report.write(f"== cProfile: top {top_n} by cumulative time ==\n")
+    pstats.Stats(profiler, stream=report).strip_dirs().sort_stats('cumulative').print_stats(top_n)
+
+    if start_snapshot is not None and end_snapshot is not None:
+        filters = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            tracemalloc.Filter(False, pstats.__file__),
+            tracemalloc.Filter(False, cProfile.__file__),
+        ]
+        stats = end_snapshot.filter_traces(filters).compare_to(start_snapshot.filter_traces(filters), 'lineno')
+        report.write(f"\n== tracemalloc: top {top_n} allocations (net growth during the call) ==\n")
+        report.write(f"peak traced memory: {traced_peak / (1024 * 1024):.1f} MB "
+                     f"(process-wide, includes concurrent stages)\n")
+        for stat in stats[:top_n]:
+            report.write(f"{stat}\n")
+
+    Path(f"{path}.txt").write_text(report.getvalue())
+
+
+@contextmanager
+def profiled(target: str, run_id: Optional[str] = None, enabled: Optional[bool] = None):
+    """Profile the block as `target` if enabled; otherwise (or when nested) a no-op."""
+    if not profiling_enabled(target, enabled) or getattr(_thread_state, 'active', None):
+        yield
+        return
+
+    run_id = run_id or new_run_id()
+    profiler = cProfile.Profile()
+    tracing = False
+    start_snapshot = None
+    try:
+        tracing = _start_tracemalloc()
+        if tracing:
+            start_snapshot = tracemalloc.take_snapshot()
+        profiler.enable()
+    except Exception as e:
+        logger.warning(f"Could not start profiling {target}: {e}")
+        if tracing:
+            _stop_tracemalloc()
+        yield
+        return
+
+    _thread_state.active = target
+    logger.info(f"Profiling {target} (run {run_id})")
+    try:
+        yield
+    finally:
+        profiler.disable()
+        _thread_state.active = None
+        try:
+            end_snapshot = tracemalloc.take_snapshot() if tracing else None
+            traced_peak = tracemalloc.get_traced_memory()[1] if tracing else 0
+            path = _artifact_path(run_id, target)
+            _write_artifacts(path, target, profiler, start_snapshot, end_snapshot, traced_peak)
+            logger.info(f"Wrote profile of {target} to {path}.prof / .txt")
+        except Exception as e:
+            logger.warning(f"Could not write profile of {target}: {e}")
+        finally:
+            if tracing:
+                _stop_tracemalloc()
+
+
+def profile_method(func):
+    """
+    Profile a method as '<Class>.<method>' when enabled. The instance's
+    `profile` attribute (None = follow EPL_PROFILE) and `run_id` are used when set.
+    """
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        target = f"{type(self).__name__}.{func.__name__}"
+        with profiled(target, getattr(self, 'run_id', None), getattr(self, 'profile', None)):
+            return func(self, *args, **kwargs)
+    return wrapper